@@ -1,16 +1,20 @@
 import sys
+import multiprocessing
 import warnings
 import os
 import re
 import logging
+import threading
 from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QFileDialog, QLabel
 from PyQt6.QtGui import QIcon, QFont, QDragEnterEvent, QDropEvent
-from PyQt6.QtCore import Qt, QSettings, QTimer
+from PyQt6.QtCore import Qt, QSettings
 from search_tab import SearchTab
 from combined_tab import CombinedTab
 from cleaner_tab import CleanerTab
-from utils import load_stylesheet, apply_stylesheet
-from darkdetect import isDark
+from performance_tab import PerformanceTab
+from utils import apply_theme, SystemThemeWatcher
+from lookup_cache import get_lookup_cache, set_cache_enabled
+from bib_index import get_library_index
 import certifi
 cert_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'Resources', 'cacert.pem'))
 if not os.path.exists(cert_path):
@@ -30,15 +34,6 @@ log_file = os.path.expanduser('./bibtexmanager_log.txt')
 logging.basicConfig(filename=log_file, level=logging.DEBUG, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
-def search_function():
-    logging.debug("Starting search function")
-    try:
-        # 执行搜索操作
-        result = perform_search()
-        logging.debug(f"Search completed. Result: {result}")
-    except Exception as e:
-        logging.exception("An error occurred during search")
-
 def excepthook(exc_type, exc_value, exc_traceback):
     logging.error("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
 
@@ -71,38 +66,33 @@ class ReferenceManagerGUI(QMainWindow):
         self.search_tab = SearchTab(self)
         self.combined_tab = CombinedTab(self)
         self.cleaner_tab = CleanerTab(self)
+        self.performance_tab = PerformanceTab(self)
 
         self.tabs.addTab(self.search_tab, "Title Search")
         self.tabs.addTab(self.combined_tab, "Citations Search")
         self.tabs.addTab(self.cleaner_tab, "Remove Duplicate Items")
+        self.tabs.addTab(self.performance_tab, "Performance")
 
         self.create_menu_bar()
         self.setAcceptDrops(True)
-        self.last_system_theme = isDark()
+        # 系统主题变化时收到通知（平台不支持时退回低频轮询）
+        self.theme_watcher = SystemThemeWatcher(self)
+        self.theme_watcher.changed.connect(self.system_theme_changed)
         self.user_theme_override = False
         
         # Set initial theme
         #print("Setting initial theme...")
-        self.set_theme(self.settings.value("dark_mode", self.last_system_theme, type=bool))
-        
-        
-        # Periodically check system theme
-        self.theme_check_timer = QTimer(self)
-        self.theme_check_timer.timeout.connect(self.check_system_theme)
-        self.theme_check_timer.start(5000)  # Check every 5 seconds
+        self.set_theme(self.settings.value("dark_mode", self.theme_watcher.is_dark, type=bool))
 
     def set_theme(self, dark_mode):
         self.settings.setValue("dark_mode", dark_mode)
-        apply_stylesheet(self, dark_mode)
+        # apply_theme 同时更新各 CustomTextEdit 的着色
+        apply_theme(dark_mode)
         self.update_dark_mode_text()
-        self.combined_tab.update_dark_mode(dark_mode)
 
-    def check_system_theme(self):
-        current_system_theme = isDark()
-        if current_system_theme != self.last_system_theme:
-            self.last_system_theme = current_system_theme
-            if not self.user_theme_override:
-                self.set_theme(current_system_theme)
+    def system_theme_changed(self, is_dark):
+        if not self.user_theme_override:
+            self.set_theme(is_dark)
 
     def toggle_dark_mode(self):
         current_mode = self.settings.value("dark_mode", False, type=bool)
@@ -127,6 +117,23 @@ class ReferenceManagerGUI(QMainWindow):
         self.toggle_dark_mode_action = view_menu.addAction("Toggle Light/Dark Mode")
         self.toggle_dark_mode_action.triggered.connect(self.toggle_dark_mode)
 
+        # Lookup cache
+        cache_menu = menu_bar.addMenu("Cache")
+        cache_menu.setFont(menu_font)
+        self.use_cache_action = cache_menu.addAction("Use Lookup Cache")
+        self.use_cache_action.setCheckable(True)
+        self.use_cache_action.setChecked(self.settings.value("use_lookup_cache", True, type=bool))
+        self.use_cache_action.toggled.connect(self.set_lookup_cache_enabled)
+        self.set_lookup_cache_enabled(self.use_cache_action.isChecked())
+        clear_cache_action = cache_menu.addAction("Clear Lookup Cache")
+        clear_cache_action.triggered.connect(self.clear_lookup_cache)
+
+    def set_lookup_cache_enabled(self, enabled):
+        self.settings.setValue("use_lookup_cache", enabled)
+        set_cache_enabled(enabled)
+
+    def clear_lookup_cache(self):
+        get_lookup_cache().clear()
 
     def update_dark_mode_text(self):
         is_dark_mode = self.settings.value("dark_mode", False, type=bool)
@@ -180,12 +187,16 @@ class ReferenceManagerGUI(QMainWindow):
         self.search_tab.set_bibtex_path(path)
         self.combined_tab.set_bibtex_path(path)
         self.cleaner_tab.set_bibtex_path(path)
+        # 在后台加载或建立索引，后续查重无需重新解析整个文件
+        if path.endswith('.bib') and os.path.isfile(path):
+            threading.Thread(target=get_library_index, args=(path,), daemon=True).start()
 
     def load_settings(self):
         self.restoreGeometry(self.settings.value("geometry", self.saveGeometry()))
         self.restoreState(self.settings.value("windowState", self.saveState()))
 
     def closeEvent(self, event):
+        self.combined_tab.stop_watch()
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("windowState", self.saveState())
         super().closeEvent(event)
@@ -198,4 +209,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # py2app 打包后，解析用的子进程会重新运行入口脚本
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -4,6 +4,7 @@ from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt, QTimer 
 import pyperclip
 import search_module
+from lookup_cache import format_stats
 import os
 
 
@@ -40,6 +41,9 @@ class BaseTab(QWidget):
         self.bibtex_file_path = ""
         self.result_text = None
         self.copy_button = None
+        self.status_label = None
+        # 添加条目时只追加新条目；设为 False 则重新生成整个文件
+        self.incremental_merge = True
 
     def set_bibtex_path(self, path):
         self.bibtex_file_path = path
@@ -49,14 +53,31 @@ class BaseTab(QWidget):
         self.copy_button.clicked.connect(self.copy_to_clipboard)
         return self.copy_button
 
+    def result_content(self):
+        """
+        :return: 要复制或添加的结果；ResultView 只返回勾选的条目，与当前过滤条件无关
+        """
+        if hasattr(self.result_text, 'checked_text'):
+            return self.result_text.checked_text()
+        return self.result_text.toPlainText()
+
     def copy_to_clipboard(self):
         if self.result_text and self.copy_button:
-            content = self.result_text.toPlainText()
+            content = self.result_content()
             pyperclip.copy(content)
             self.copy_button.setText("Copied to clipboard")
             self.copy_button.setEnabled(False)
             QTimer.singleShot(1000, self.reset_copy_button)
 
+    def setup_status_label(self):
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        return self.status_label
+
+    def show_cache_stats(self, stats):
+        if self.status_label:
+            self.status_label.setText(format_stats(stats))
+
     def reset_copy_button(self):
         if self.copy_button:
             self.copy_button.setText("Copy Result")
@@ -68,7 +89,7 @@ class BaseTab(QWidget):
         dialog.exec()
 
     def add_to_bibtex_file(self):
-        content = self.result_text.toPlainText()
+        content = self.result_content()
 
         if not content:
             self.show_custom_message("Error", "No BibTeX entries to add.")
@@ -76,30 +97,34 @@ class BaseTab(QWidget):
 
         if self.bibtex_file_path:
             try:
-                existing_content = ""
-                if os.path.exists(self.bibtex_file_path):
-                    with open(self.bibtex_file_path, 'r') as file:
-                        existing_content = file.read()
-                
-                updated_bib, added_entries, skipped_entries = search_module.update_bibtex_file(content, existing_content)
-                
-                # 只有在成功更新后才写入文件
-                if updated_bib:
+                if self.incremental_merge:
+                    # 只追加新条目，不重写已有内容；在界面线程中解析，不启动进程池
+                    added_entries, skipped_entries = search_module.append_bibtex_entries(self.bibtex_file_path, content, jobs=1)
+                else:
+                    existing_content = ""
+                    if os.path.exists(self.bibtex_file_path):
+                        with open(self.bibtex_file_path, 'r') as file:
+                            existing_content = file.read()
+
+                    updated_bib, added_entries, skipped_entries = search_module.update_bibtex_file(content, existing_content, jobs=1)
+
+                    # 只有在成功更新后才写入文件
+                    if not updated_bib:
+                        self.show_custom_message("Error", "Failed to update BibTeX file. No changes were made.")
+                        return
                     with open(self.bibtex_file_path, 'w') as file:
                         file.write(updated_bib)
-                
-                    message = ""
-                    if added_entries:
-                        message += f"Added {len(added_entries)} new entries: {', '.join(added_entries)}\n"
-                    if skipped_entries:
-                        message += f"Skipped {len(skipped_entries)} existing entries: {', '.join(skipped_entries)}\n"
-                
-                    if message:
-                        self.show_custom_message("BibTeX Update Result", message)
-                    else:
-                        self.show_custom_message("No Changes", "No new entries were added.")
+
+                message = ""
+                if added_entries:
+                    message += f"Added {len(added_entries)} new entries: {', '.join(added_entries)}\n"
+                if skipped_entries:
+                    message += f"Skipped {len(skipped_entries)} existing entries: {', '.join(skipped_entries)}\n"
+
+                if message:
+                    self.show_custom_message("BibTeX Update Result", message)
                 else:
-                    self.show_custom_message("Error", "Failed to update BibTeX file. No changes were made.")
+                    self.show_custom_message("No Changes", "No new entries were added.")
                 
             except IOError as e:
                 self.show_custom_message("Error", f"Failed to read or write to BibTeX file: {e}")
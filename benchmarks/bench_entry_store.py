@@ -0,0 +1,138 @@
+"""
+比较 bibtexparser 条目字典与 entry_store 紧凑条目的内存占用，以及 update_bibtex_file、
+clean_bib_content 改用 EntryLibrary 前后的峰值内存（子进程常驻内存增长量），并检查输出相同。
+
+    python benchmarks/bench_entry_store.py --sizes 1000 10000 --jobs 1
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bibtexparser
+from bibtexparser.bibdatabase import BibDatabase
+from bibtexparser.bparser import BibTexParser
+from bibtexparser.bwriter import BibTexWriter
+
+import search_module
+from entry_store import EntryLibrary
+from parallel_parser import parse_bib_content
+from run_benchmarks import measure_isolated
+from synthetic import generate_bib_content
+
+
+def _load_entries(content):
+    parser = BibTexParser()
+    parser.ignore_nonstandard_types = False
+    return bibtexparser.loads(content, parser).entries
+
+
+def legacy_update(new_content, existing_content):
+    """
+    改用 EntryLibrary 之前的 update_bibtex_file：同时保留条目列表、ID 字典和新的 BibDatabase。
+    """
+    existing_entries = _load_entries(existing_content)
+    new_entries = _load_entries(new_content)
+    existing_ids = {entry['ID'].lower(): entry for entry in existing_entries}
+    added_entries = []
+    skipped_entries = []
+    for entry in new_entries:
+        lower_id = entry['ID'].lower()
+        if lower_id not in existing_ids:
+            existing_ids[lower_id] = entry
+            added_entries.append(entry['ID'])
+        else:
+            skipped_entries.append(entry['ID'])
+    updated_db = BibDatabase()
+    updated_db.entries = list(existing_ids.values())
+    for entry in updated_db.entries:
+        if 'title' in entry:
+            entry['title'] = entry['title'].strip('{}')
+    return search_module._make_writer().write(updated_db), added_entries, skipped_entries
+
+
+def legacy_clean(bib_content):
+    """
+    改用 EntryLibrary 之前的 clean_bib_content。
+    """
+    bib_database = bibtexparser.loads(bib_content, BibTexParser())
+    entries_dict = {}
+    removed_entries = []
+    for entry in bib_database.entries:
+        lower_id = entry['ID'].lower()
+        if lower_id in entries_dict:
+            removed_entries.append(entry['ID'])
+        else:
+            entries_dict[lower_id] = entry
+    bib_database.entries = list(entries_dict.values())
+    writer = BibTexWriter()
+    writer.indent = '    '
+    writer.display_order = ('title', 'author', 'year', 'journal', 'volume', 'number', 'pages', 'doi', 'arxiv')
+    return writer.write(bib_database), removed_entries
+
+
+def retained_size(build, blob):
+    """
+    :return: 从 pickle 数据构建并保留的对象占用的内存（MiB）
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build(pickle.loads(blob))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--jobs', type=int, default=1, help="parse processes for clean_bib_content")
+    parser.add_argument('--new-entries', type=int, default=100, help="entries added by update_bibtex_file")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.05)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        content = generate_bib_content(size, duplicate_ratio=args.duplicate_ratio)
+        new_content = generate_bib_content(args.new_entries, seed=size + 2)
+        blob = pickle.dumps(parse_bib_content(content, jobs=args.jobs).entries)
+        row = {
+            'entries': size,
+            'content_mib': len(content.encode('utf-8')) / 2**20,
+            'dicts_mib': retained_size(lambda entries: entries, blob),
+            'store_mib': retained_size(EntryLibrary, blob),
+        }
+        legacy, row['legacy_update_s'], row['legacy_update_mib'] = measure_isolated(
+            legacy_update, new_content, content)
+        current, row['update_s'], row['update_mib'] = measure_isolated(
+            search_module.update_bibtex_file, new_content, content)
+        row['update_identical'] = legacy == current
+        legacy, row['legacy_clean_s'], row['legacy_clean_mib'] = measure_isolated(legacy_clean, content)
+        current, row['clean_s'], row['clean_mib'] = measure_isolated(
+            search_module.clean_bib_content, content, jobs=args.jobs)
+        row['clean_identical'] = legacy == current
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'dicts MiB':>10} {'store MiB':>10} {'update MiB':>16} {'clean MiB':>16} "
+          f"{'identical':>10}")
+    for row in results:
+        print(f"{row['entries']:>8} {row['dicts_mib']:>10.1f} {row['store_mib']:>10.1f} "
+              f"{row['legacy_update_mib']:>7.1f} -> {row['update_mib']:>5.1f} "
+              f"{row['legacy_clean_mib']:>7.1f} -> {row['clean_mib']:>5.1f} "
+              f"{str(row['update_identical'] and row['clean_identical']):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+测量引用输入框中每次按键的着色耗时，文档变长时应保持不变。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_highlight.py --lines 100 1000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+from combined_tab import CustomTextEdit, KEY_RESOLVED
+
+
+def generate_document(lines):
+    return "\n".join(f"As shown in \\citep[see][p.~{i}]{{Key{i}, Other{i}}}, the result holds. % \\cite{{old{i}}}"
+                     for i in range(lines))
+
+
+def measure_keystrokes(editor, keystrokes, position=QTextCursor.MoveOperation.End):
+    editor.moveCursor(position)
+    start = time.perf_counter()
+    for _ in range(keystrokes):
+        QTest.keyClick(editor, Qt.Key.Key_A)
+    return (time.perf_counter() - start) / keystrokes
+
+
+def measure_status_updates(editor, lines, updates):
+    highlighter = editor.highlighter
+    start = time.perf_counter()
+    for i in range(0, lines, max(1, lines // updates)):
+        highlighter.set_key_status(f"Key{i}", KEY_RESOLVED)
+    # 直接执行合并后的更新，不等待定时器
+    highlighter._rehighlight_changed_keys()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--keystrokes', type=int, default=200)
+    parser.add_argument('--updates', type=int, default=100, help="cite key status changes per batch")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    for lines in args.lines:
+        editor = CustomTextEdit()
+        editor.show()
+        editor.setPlainText(generate_document(lines))
+        app.processEvents()
+        results.append({
+            'lines': lines,
+            'keystroke_time': measure_keystrokes(editor, args.keystrokes),
+            # 在开头输入时后面的所有块都会移动位置
+            'keystroke_start_time': measure_keystrokes(editor, args.keystrokes, QTextCursor.MoveOperation.Start),
+            'status_update_time': measure_status_updates(editor, lines, args.updates),
+        })
+        editor.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'lines':>8} {'ms/key end':>11} {'ms/key start':>13} {'status batch ms':>16}")
+    for row in results:
+        print(f"{row['lines']:>8} {row['keystroke_time'] * 1000:>11.3f} {row['keystroke_start_time'] * 1000:>13.3f}"
+              f" {row['status_update_time'] * 1000:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+比较串行与多进程解析 BibTeX 的耗时，并检查两者得到的条目完全相同。
+
+    python benchmarks/bench_parse.py --sizes 10000 100000 --jobs 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel_parser
+import search_module
+from synthetic import generate_bib_content
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--jobs', type=int, nargs='+', default=[os.cpu_count() or 1])
+    parser.add_argument('--chunk-size', type=int, default=parallel_parser.PARSE_CHUNK_SIZE)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.05)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        content = generate_bib_content(size, duplicate_ratio=args.duplicate_ratio)
+        serial, serial_time = timed(parallel_parser.parse_bib_content, content, jobs=1)
+        (_, serial_removed), serial_clean = timed(search_module.clean_bib_content, content, jobs=1)
+        for jobs in args.jobs:
+            parsed, parse_time = timed(parallel_parser.parse_bib_content, content, jobs=jobs,
+                                       chunk_size=args.chunk_size)
+            (_, removed), clean_time = timed(search_module.clean_bib_content, content, jobs=jobs)
+            results.append({
+                'entries': size,
+                'jobs': jobs,
+                'serial_parse': serial_time,
+                'parallel_parse': parse_time,
+                'parse_speedup': serial_time / parse_time,
+                'serial_clean': serial_clean,
+                'parallel_clean': clean_time,
+                'clean_speedup': serial_clean / clean_time,
+                'identical': parsed.entries == serial.entries and removed == serial_removed,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'jobs':>5} {'serial s':>9} {'parallel s':>11} {'speedup':>8} "
+          f"{'clean s':>8} {'speedup':>8} {'identical':>10}")
+    for row in results:
+        print(f"{row['entries']:>8} {row['jobs']:>5} {row['serial_parse']:>9.2f} {row['parallel_parse']:>11.2f} "
+              f"{row['parse_speedup']:>7.2f}x {row['parallel_clean']:>8.2f} {row['clean_speedup']:>7.2f}x "
+              f"{str(row['identical']):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+比较结果显示的耗时：QTextEdit.setPlainText 与 ResultView（加载、逐条追加、过滤）。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_result_view.py --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QTextEdit
+
+from result_view import ResultView
+from synthetic import generate_bib_content
+
+
+def timed(app, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    # 包括第一次绘制
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--append', type=int, default=1000, help="entries appended one by one")
+    parser.add_argument('--filter', default='phys', help="filter text")
+    parser.add_argument('--skip-textedit', action='store_true', help="only run ResultView")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    for size in args.sizes:
+        content = generate_bib_content(size)
+        row = {'entries': size, 'bytes': len(content.encode('utf-8'))}
+
+        if not args.skip_textedit:
+            text_edit = QTextEdit()
+            text_edit.show()
+            row['textedit_load'] = timed(app, text_edit.setPlainText, content)
+            text_edit.close()
+
+        view = ResultView()
+        view.show()
+        row['view_load'] = timed(app, view.setPlainText, content)
+        row['view_filter'] = timed(app, view.filter_edit.setText, args.filter)
+        row['view_shown'] = view.model.rowCount()
+        row['view_unfilter'] = timed(app, view.filter_edit.setText, '')
+
+        view.clear()
+        entries = content.split('\n@')[:args.append]
+        start = time.perf_counter()
+        for entry in entries:
+            view.append(entry if entry.startswith('@') else '@' + entry)
+        app.processEvents()
+        row['view_append_each'] = (time.perf_counter() - start) / max(len(entries), 1)
+        view.close()
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'textedit s':>11} {'view s':>8} {'filter ms':>10} {'append ms':>10}")
+    for row in results:
+        textedit = f"{row['textedit_load']:>11.3f}" if 'textedit_load' in row else f"{'-':>11}"
+        print(f"{row['entries']:>8} {textedit} {row['view_load']:>8.3f} {row['view_filter'] * 1000:>10.1f}"
+              f" {row['view_append_each'] * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
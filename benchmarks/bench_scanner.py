@@ -0,0 +1,77 @@
+"""
+比较 bib_scanner 与 bibtexparser.loads 提取条目键的耗时和峰值内存。
+
+    python benchmarks/bench_scanner.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bibtexparser
+from bibtexparser.bparser import BibTexParser
+
+import bib_scanner
+from synthetic import generate_bib_file
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def scan_keys(path):
+    return {record.key.lower() for record in bib_scanner.scan_bib_file(path) if record.key}
+
+
+def parse_keys(path):
+    with open(path, 'r') as file:
+        content = file.read()
+    parser = BibTexParser()
+    parser.ignore_nonstandard_types = False
+    return {entry['ID'].lower() for entry in bibtexparser.loads(content, parser).entries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--workdir', default=tempfile.gettempdir())
+    parser.add_argument('--skip-parser', action='store_true', help="only run the scanner")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        path = generate_bib_file(os.path.join(args.workdir, f"bench_{size}.bib"), size)
+        row = {'entries': size, 'bytes': os.path.getsize(path)}
+        keys, row['scan_time'], row['scan_peak'] = measure(scan_keys, path)
+        if not args.skip_parser:
+            parsed, row['parse_time'], row['parse_peak'] = measure(parse_keys, path)
+            row['keys_match'] = keys == parsed
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'scan s':>9} {'scan MiB':>9} {'parse s':>9} {'parse MiB':>10} {'speedup':>8}")
+    for row in results:
+        line = f"{row['entries']:>8} {row['scan_time']:>9.3f} {row['scan_peak'] / 2**20:>9.2f}"
+        if 'parse_time' in row:
+            line += (f" {row['parse_time']:>9.3f} {row['parse_peak'] / 2**20:>10.2f}"
+                     f" {row['parse_time'] / row['scan_time']:>7.0f}x")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+测量应用启动时间：各模块的导入耗时，以及从进程启动到主窗口首次绘制的时间。
+每项测量都在新的子进程中运行。
+
+    python benchmarks/bench_startup.py --runs 5
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py --json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['search_module', 'base_tab', 'result_view', 'search_tab', 'combined_tab', 'cleaner_tab', 'performance_tab', 'utils', 'BibtexManager']
+
+# 在子进程中运行：记录解释器启动到窗口首次绘制完成的时间
+_FIRST_WINDOW_SCRIPT = r'''
+import time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+import BibtexManager
+imported = time.perf_counter()
+app = QApplication([])
+window = BibtexManager.ReferenceManagerGUI()
+window.show()
+app.processEvents()
+window.repaint()
+shown = time.perf_counter()
+print(f"RESULT {imported - start} {shown - start}")
+'''
+
+_IMPORT_TIME_PATTERN = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\S+)')
+
+
+def import_time(module):
+    """
+    :return: 导入 module 的累计耗时（秒），来自 python -X importtime
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_PATTERN.search(line)
+        if match and match.group(3) == module:
+            return int(match.group(2)) / 1e6
+    raise RuntimeError(f"Failed to import {module}: {result.stderr.strip()[-500:]}")
+
+
+def time_to_first_window():
+    """
+    :return: (导入 BibtexManager 的耗时, 到窗口首次绘制的耗时)，单位秒
+    """
+    result = subprocess.run([sys.executable, '-c', _FIRST_WINDOW_SCRIPT],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('RESULT '):
+            imported, shown = line.split()[1:]
+            return float(imported), float(shown)
+    raise RuntimeError(f"Failed to start the application: {result.stderr.strip()[-500:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help="number of runs per measurement (median is reported)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {'imports': {}, 'first_window': {}}
+    for module in MODULES:
+        results['imports'][module] = statistics.median(import_time(module) for _ in range(args.runs))
+
+    runs = [time_to_first_window() for _ in range(args.runs)]
+    results['first_window'] = {
+        'import': statistics.median(run[0] for run in runs),
+        'shown': statistics.median(run[1] for run in runs),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("Import time (cumulative, median):")
+    for module, seconds in results['imports'].items():
+        print(f"  {module:<16} {seconds * 1000:8.1f} ms")
+    print(f"Time to first window: {results['first_window']['shown'] * 1000:.1f} ms "
+          f"(imports {results['first_window']['import'] * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
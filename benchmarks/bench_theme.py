@@ -0,0 +1,84 @@
+"""
+测量主窗口切换明暗主题的耗时（包括重新绘制），结果视图中填充不同数量的条目。
+对比旧的做法：每次重新生成样式表并对所有控件 unpolish / polish。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_theme.py --sizes 0 1000 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QPlainTextEdit
+
+import utils
+from synthetic import generate_bib_content
+
+
+def legacy_apply(window, dark_mode):
+    window.setStyleSheet(utils.load_stylesheet.__wrapped__(dark_mode))
+    for widget in QApplication.instance().allWidgets():
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+        widget.update()
+    for widget in window.findChildren(QPlainTextEdit):
+        if hasattr(widget, 'set_dark_mode'):
+            widget.dark_mode = not dark_mode
+            widget.set_dark_mode(dark_mode)
+
+
+def measure_switches(app, apply, switches):
+    times = []
+    dark_mode = True
+    for _ in range(switches):
+        start = time.perf_counter()
+        apply(dark_mode)
+        app.processEvents()
+        times.append(time.perf_counter() - start)
+        dark_mode = not dark_mode
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1000, 10000])
+    parser.add_argument('--switches', type=int, default=6, help="theme switches per measurement")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    import BibtexManager
+
+    window = BibtexManager.ReferenceManagerGUI()
+    window.show()
+    results = []
+    for size in args.sizes:
+        content = generate_bib_content(size) if size else ""
+        window.search_tab.result_text.setPlainText(content)
+        window.combined_tab.result_text.setPlainText(content)
+        # 等待结果视图分批布局完成
+        for _ in range(size // 100 + 10):
+            app.processEvents()
+        results.append({
+            'entries': size,
+            'widgets': len(app.allWidgets()),
+            'legacy_switch': measure_switches(app, lambda dark: legacy_apply(window, dark), args.switches),
+            'switch': measure_switches(app, utils.apply_theme, args.switches),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'widgets':>8} {'legacy ms':>10} {'scoped ms':>10}")
+    for row in results:
+        print(f"{row['entries']:>8} {row['widgets']:>8} {row['legacy_switch'] * 1000:>10.1f}"
+              f" {row['switch'] * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+"""
+本地的 INSPIRE 模拟服务器和 Google Scholar 替身，用于离线基准测试。
+
+服务器按 INSPIRE 的接口（/api/literature?q=...&format=bibtex&page=&size=）返回 BibTeX：
+优先回放录制的响应（JSON Lines），其余查询由一个 .bib 库回答（texkey、arXiv ID、标题，支持 "or" 组合）。
+可配置延迟、错误率和限流（超出时返回 429 和 Retry-After）。
+
+    python benchmarks/mock_server.py --library refs.bib --port 8080 --latency 0.05 --error-rate 0.01
+    BIBTEXMANAGER_INSPIRE_URL=http://127.0.0.1:8080/api/literature python bibtex_cli.py resolve paper.tex
+
+录制真实响应（需要网络），之后可离线回放：
+
+    python benchmarks/mock_server.py --record https://inspirehep.net/api/literature --recordings inspire.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_module
+from bib_scanner import scan_bib_content
+from rate_limit import TokenBucket
+
+API_PATH = '/api/literature'
+
+_OR_PATTERN = re.compile(r'\s+or\s+', re.IGNORECASE)
+_TERM_PATTERN = re.compile(r'^(texkey|arxiv|eprint)[\s:]+(\S+)$', re.IGNORECASE)
+_FIELD_PATTERNS = {
+    'eprint': re.compile(r'^\s*eprint\s*=\s*[{"]([^}"]+)[}"]', re.MULTILINE | re.IGNORECASE),
+    'title': re.compile(r'^\s*title\s*=\s*["{]+(.*?)["}]+\s*,?\s*$', re.MULTILINE | re.IGNORECASE),
+}
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_title(title):
+    return _NON_WORD.sub(' ', title.lower()).strip()
+
+
+class MockLibrary:
+    """
+    按 texkey、arXiv ID 和规范化标题索引的条目集合。
+    """
+
+    def __init__(self, content=''):
+        self.by_key = {}
+        self.by_eprint = {}
+        self.by_title = {}
+        if content:
+            self.add_content(content)
+
+    def add_content(self, content):
+        for record in scan_bib_content(content):
+            if not record.key:
+                continue
+            text = content[record.start:record.end].strip()
+            self.by_key.setdefault(record.key.lower(), text)
+            eprint = _FIELD_PATTERNS['eprint'].search(text)
+            if eprint:
+                self.by_eprint.setdefault(eprint.group(1).lower(), text)
+            title = _FIELD_PATTERNS['title'].search(text)
+            if title:
+                self.by_title.setdefault(normalize_title(title.group(1)), text)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def search(self, query):
+        """
+        :return: 匹配的条目列表（保持查询中各项的顺序，去重）
+        """
+        results = {}
+        for term in _OR_PATTERN.split(query.strip()):
+            match = _TERM_PATTERN.match(term.strip())
+            if match:
+                kind, value = match.group(1).lower(), match.group(2).lower()
+                text = self.by_key.get(value) if kind == 'texkey' else self.by_eprint.get(value)
+            else:
+                # 直接给出 arXiv ID、texkey 或标题
+                value = term.strip().lower()
+                text = (self.by_key.get(value) or self.by_eprint.get(value.replace('arxiv:', ''))
+                        or self.by_title.get(normalize_title(value)))
+            if text:
+                results.setdefault(text, None)
+        return list(results)
+
+
+class MockServerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.replayed = 0
+        self.bytes = 0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        with self.lock:
+            return {'requests': self.requests, 'errors': self.errors, 'throttled': self.throttled,
+                    'replayed': self.replayed, 'bytes': self.bytes}
+
+
+class MockInspireServer:
+    """
+    在后台线程中运行的模拟 INSPIRE 服务器。
+
+    :param library: MockLibrary，回答没有录制的查询
+    :param recordings: 录制文件路径（JSON Lines：{"q", "page", "size", "status", "body"}）
+    :param latency: 每个响应的平均延迟（秒）
+    :param jitter: 延迟的随机波动范围（秒）
+    :param error_rate: 返回 500 的概率
+    :param rate_limit: 每秒允许的请求数，None 表示不限流
+    :param burst: 限流的突发容量
+    :param upstream: 录制模式：未录制的查询转发到此地址并追加到 recordings
+    """
+
+    def __init__(self, library=None, recordings=None, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None,
+                 burst=None, upstream=None, host='127.0.0.1', port=0, seed=0):
+        self.library = library or MockLibrary()
+        self.recordings_path = recordings
+        self.recordings = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit, burst or max(1, int(rate_limit))) if rate_limit else None
+        self.upstream = upstream
+        self.stats = MockServerStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._record_lock = threading.Lock()
+        if recordings and os.path.exists(recordings):
+            self.load_recordings(recordings)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    def load_recordings(self, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    self.recordings[self._recording_key(record.get('q', ''), record.get('page'),
+                                                        record.get('size'))] = record
+
+    @staticmethod
+    def _recording_key(query, page, size):
+        return (query.strip().lower(), str(page or 1), str(size or ''))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def respond(self, params):
+        """
+        :return: (状态码, 响应头, 响应体)
+        """
+        if self.bucket is not None and not self.bucket.acquire(timeout=0):
+            self.stats.add(throttled=1)
+            retry_after = max(1, int(round(1 / self.bucket.rate)))
+            return 429, {'Retry-After': str(retry_after)}, 'Too Many Requests'
+        delay = self.latency + (self._random() * 2 - 1) * self.jitter
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and self._random() < self.error_rate:
+            self.stats.add(errors=1)
+            return 500, {}, 'Internal Server Error'
+
+        query = params.get('q', '')
+        page, size = params.get('page'), params.get('size')
+        record = self.recordings.get(self._recording_key(query, page, size))
+        if record is None and self.upstream:
+            record = self._record_upstream(params)
+        if record is not None:
+            self.stats.add(replayed=1)
+            return record.get('status', 200), {}, record.get('body', '')
+
+        entries = self.library.search(query)
+        if size:
+            start = (int(page or 1) - 1) * int(size)
+            entries = entries[start:start + int(size)]
+        return 200, {}, '\n\n'.join(entries)
+
+    def _record_upstream(self, params):
+        url = self.upstream + '?' + urllib.parse.urlencode(params)
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                record = {'status': response.status, 'body': response.read().decode('utf-8', 'replace')}
+        except urllib.error.HTTPError as e:
+            record = {'status': e.code, 'body': ''}
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Error recording {url}: {e}", file=sys.stderr)
+            return None
+        record.update({'q': params.get('q', ''), 'page': params.get('page'), 'size': params.get('size')})
+        with self._record_lock:
+            self.recordings[self._recording_key(record['q'], record['page'], record['size'])] = record
+            if self.recordings_path:
+                with open(self.recordings_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return record
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urllib.parse.urlsplit(self.path)
+                if parsed.path.rstrip('/') != API_PATH:
+                    self._send(404, {}, 'Not Found')
+                    return
+                params = dict(urllib.parse.parse_qsl(parsed.query))
+                status, headers, body = server.respond(params)
+                self._send(status, headers, body)
+
+            def _send(self, status, headers, body):
+                data = body.encode('utf-8')
+                server.stats.add(requests=1, bytes=len(data))
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class ScholarStub:
+    """
+    代替 scholarly 的 Google Scholar 替身：按标题在 MockLibrary 中查找，可配置延迟和被封锁的概率。
+    search_pubs 返回的结果带有 eprint，ScholarProvider 会接着用 arXiv ID 查询 INSPIRE。
+    """
+
+    def __init__(self, library=None, latency=0.0, block_rate=0.0, seed=0):
+        self.library = library or MockLibrary()
+        self.latency = latency
+        self.block_rate = block_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            blocked = self.block_rate and self._rng.random() < self.block_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if blocked:
+            raise RuntimeError("captcha required (stub)")
+
+    def search_pubs(self, query):
+        self._call()
+        for text in self.library.search(query):
+            title = _FIELD_PATTERNS['title'].search(text)
+            eprint = _FIELD_PATTERNS['eprint'].search(text)
+            yield {'bib': {'title': title.group(1) if title else query,
+                           'eprint': f"arXiv:{eprint.group(1)}" if eprint else ''},
+                   'bibtex': text}
+
+    def bibtex(self, publication):
+        self._call()
+        return publication['bibtex']
+
+
+def install_scholar_stub(stub):
+    """
+    让 search_module 使用替身代替 scholarly。
+
+    :return: 恢复原实现的函数
+    """
+    original = search_module._get_scholarly
+    search_module._get_scholarly = lambda: stub
+
+    def restore():
+        search_module._get_scholarly = original
+    return restore
+
+
+def use_mock_inspire(server):
+    """
+    让 search_module 向模拟服务器发送 INSPIRE 请求。
+
+    :return: 恢复原地址的函数
+    """
+    original = search_module.INSPIRE_API_URL
+    search_module.INSPIRE_API_URL = server.url
+
+    def restore():
+        search_module.INSPIRE_API_URL = original
+    return restore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--library', action='append', default=[], help=".bib file answering queries (repeatable)")
+    parser.add_argument('--synthetic', type=int, default=0, help="also serve N synthetic entries")
+    parser.add_argument('--recordings', help="JSON lines file of recorded responses to replay")
+    parser.add_argument('--record', metavar='UPSTREAM', help="forward unrecorded queries here and record them")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="mean response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="latency jitter in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="probability of a 500 response")
+    parser.add_argument('--rate-limit', type=float, help="requests per second before answering 429")
+    parser.add_argument('--burst', type=int, help="rate limit burst size")
+    args = parser.parse_args()
+
+    library = MockLibrary()
+    for path in args.library:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            library.add_content(file.read())
+    if args.synthetic:
+        from synthetic import generate_bib_content
+        library.add_content(generate_bib_content(args.synthetic))
+
+    server = MockInspireServer(library, recordings=args.recordings, latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, rate_limit=args.rate_limit, burst=args.burst,
+                               upstream=args.record, host=args.host, port=args.port)
+    print(f"Serving {len(library)} entries and {len(server.recordings)} recordings at {server.url}",
+          file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats.as_dict()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
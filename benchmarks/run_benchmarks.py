@@ -0,0 +1,307 @@
+"""
+离线基准测试套件：在本地模拟 INSPIRE 服务器和 Google Scholar 替身上测量查询吞吐量，
+并在 1k / 10k / 100k 条目的合成库上测量合并、清理的耗时和峰值内存。结果输出为 JSON，
+可与之前的结果比较以发现性能回退。
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --keys 500 --latency 0.05 --error-rate 0.02
+    python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.2
+
+基于 bibtexparser 的场景（update_bibtex_file、clean_bib_content、merge）在条目数超过
+--max-parse 时跳过，完整解析 100k 条目需要数分钟。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_module
+import providers
+from lookup_cache import set_cache_enabled
+from rate_limit import configure_limiter
+from http_session import get_http_session
+from bib_scanner import scan_bib_content
+from synthetic import generate_bib_content, generate_bib_file, generate_tex_content
+from mock_server import MockInspireServer, MockLibrary, ScholarStub, install_scholar_stub, use_mock_inspire
+
+# 各指标的方向：True 表示越大越好
+METRIC_DIRECTIONS = {
+    'seconds': False,
+    'peak_mib': False,
+    'keys_per_second': True,
+    'entries_per_second': True,
+    'p50_ms': False,
+    'p95_ms': False,
+}
+
+
+def measure(func, *args, **kwargs):
+    """
+    在当前进程中运行，用 tracemalloc 统计 Python 分配的峰值内存（会让纯 Python 代码变慢，
+    适合以网络等待为主的场景）。
+
+    :return: (返回值, 耗时秒数, 峰值内存 MiB)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def _run_child(queue, func, args, kwargs):
+    import resource
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+    # Linux 上 ru_maxrss 的单位为 KiB，macOS 上为字节
+    queue.put((result, elapsed, peak / (2**20 if sys.platform == 'darwin' else 2**10)))
+
+
+def measure_isolated(func, *args, **kwargs):
+    """
+    在 fork 出的子进程中运行，峰值内存为子进程常驻内存的增长量，不影响计时。
+    不支持 fork 的平台上退回 measure。
+
+    :return: (返回值, 耗时秒数, 峰值内存 MiB)
+    """
+    import multiprocessing
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return measure(func, *args, **kwargs)
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=_run_child, args=(queue, func, args, kwargs))
+    process.start()
+    try:
+        return queue.get()
+    finally:
+        process.join()
+
+
+def library_keys(content):
+    return [record.key for record in scan_bib_content(content) if record.key]
+
+
+def bench_resolve(args, server, content, size):
+    """
+    解析 LaTeX 文本中的引用：批量查询 + 逐个查询未命中的键，部分键在库中不存在。
+    """
+    rng = random.Random(size)
+    keys = rng.sample(library_keys(content), min(args.keys, size))
+    missing = [f"Missing:{2000 + i % 25}x{i}" for i in range(int(len(keys) * args.missing_ratio))]
+    tex = generate_tex_content(keys + missing)
+    rows = []
+    for use_batch in (True, False):
+        before = server.stats.as_dict()
+        (bibtex, not_found), elapsed, peak = measure(
+            search_module.get_bibtex_from_citations, tex, max_workers=args.jobs, use_batch=use_batch,
+            use_cache=False)
+        after = server.stats.as_dict()
+        total = len(keys) + len(missing)
+        rows.append({
+            'scenario': 'resolve' if use_batch else 'resolve_no_batch', 'size': size, 'keys': total,
+            'found': total - len(not_found), 'seconds': elapsed, 'keys_per_second': total / elapsed,
+            'peak_mib': peak, 'requests': after['requests'] - before['requests'],
+            'throttled': after['throttled'] - before['throttled'], 'errors': after['errors'] - before['errors'],
+        })
+    return rows
+
+
+def bench_get_bibtex(args, content, size):
+    """
+    逐个按标题查询（Title Search 标签页的路径），记录延迟分布。
+    """
+    rng = random.Random(size + 1)
+    library = MockLibrary(content)
+    titles = rng.sample(sorted(library.by_title), min(args.queries, len(library.by_title)))
+    latencies = []
+    found = 0
+    for title in titles:
+        start = time.perf_counter()
+        if search_module.get_bibtex(title, is_title=True, use_cache=False):
+            found += 1
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return [{
+        'scenario': 'get_bibtex', 'size': size, 'queries': len(titles), 'found': found,
+        'seconds': sum(latencies), 'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+    }]
+
+
+def bench_update(args, content, size):
+    new_content = generate_bib_content(args.new_entries, seed=size + 2)
+    (_, added, _), elapsed, peak = measure_isolated(search_module.update_bibtex_file, new_content, content)
+    return [{'scenario': 'update_bibtex_file', 'size': size, 'added': len(added), 'seconds': elapsed,
+             'entries_per_second': (size + args.new_entries) / elapsed, 'peak_mib': peak}]
+
+
+def bench_clean(args, workdir, size):
+    rows = []
+    content = generate_bib_content(size, duplicate_ratio=args.duplicate_ratio, seed=size + 3)
+    if size <= args.max_parse:
+        (_, removed), elapsed, peak = measure_isolated(search_module.clean_bib_content, content)
+        rows.append({'scenario': 'clean_bib_content', 'size': size, 'removed': len(removed), 'seconds': elapsed,
+                     'entries_per_second': size / elapsed, 'peak_mib': peak})
+    path = os.path.join(workdir, f"clean_{size}.bib")
+    with open(path, 'w') as file:
+        file.write(content)
+    removed, elapsed, peak = measure_isolated(search_module.check_and_clean_bib, path)
+    rows.append({'scenario': 'check_and_clean_bib', 'size': size, 'removed': len(removed), 'seconds': elapsed,
+                 'entries_per_second': size / elapsed, 'peak_mib': peak})
+    return rows
+
+
+def bench_merge(args, workdir, size):
+    import merge_pipeline
+    inputs = [generate_bib_file(os.path.join(workdir, f"merge_{size}_{part}.bib"), size // 2,
+                                duplicate_ratio=args.duplicate_ratio, seed=size + part)
+              for part in range(2)]
+    stats, elapsed, peak = measure_isolated(merge_pipeline.merge_bib_files, inputs,
+                                            os.path.join(workdir, f"merged_{size}.bib"), jobs=args.merge_jobs)
+    return [{'scenario': 'merge', 'size': size, 'written': stats.entries_written, 'seconds': elapsed,
+             'entries_per_second': stats.entries_read / elapsed, 'peak_mib': peak}]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: 变差超过 threshold（比例）的指标列表
+    """
+    previous = {(row['scenario'], row['size']): row for row in baseline.get('results', [])}
+    regressions = []
+    for row in results:
+        old = previous.get((row['scenario'], row['size']))
+        if not old:
+            continue
+        for metric, higher_is_better in METRIC_DIRECTIONS.items():
+            if metric not in row or not old.get(metric):
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append({'scenario': row['scenario'], 'size': row['size'], 'metric': metric,
+                                    'baseline': old[metric], 'current': row[metric], 'change': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="library sizes")
+    parser.add_argument('--scenarios', nargs='+', default=['resolve', 'get_bibtex', 'update', 'clean', 'merge'],
+                        choices=['resolve', 'get_bibtex', 'update', 'clean', 'merge'])
+    parser.add_argument('--keys', type=int, default=500, help="citation keys per resolve run")
+    parser.add_argument('--missing-ratio', type=float, default=0.02, help="share of cited keys not in the library")
+    parser.add_argument('--queries', type=int, default=50, help="title queries per get_bibtex run")
+    parser.add_argument('--new-entries', type=int, default=100, help="entries added by update_bibtex_file")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    parser.add_argument('--max-parse', type=int, default=10000,
+                        help="skip bibtexparser-bound scenarios above this many entries")
+    parser.add_argument('-j', '--jobs', type=int, default=search_module.DEFAULT_MAX_WORKERS)
+    parser.add_argument('--merge-jobs', type=int, default=None, help="merge parsing processes")
+    parser.add_argument('--latency', type=float, default=0.02, help="mock INSPIRE latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="mock INSPIRE 500 probability")
+    parser.add_argument('--rate-limit', type=float, help="mock INSPIRE requests per second")
+    parser.add_argument('--scholar-latency', type=float, default=0.05)
+    parser.add_argument('--real-limits', action='store_true',
+                        help="keep the client-side rate limits for the real services")
+    parser.add_argument('--recordings', help="recorded INSPIRE responses to replay (see mock_server.py)")
+    parser.add_argument('--workdir', default=tempfile.gettempdir())
+    parser.add_argument('--output', help="write results as JSON to this file (default: stdout)")
+    parser.add_argument('--baseline', help="compare with an earlier results file")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    set_cache_enabled(False)
+    if not args.real_limits:
+        # 默认的客户端限速针对真实服务，会掩盖本地服务器上的吞吐量
+        configure_limiter('inspire', rate=1000.0, burst=1000)
+        configure_limiter('scholar', rate=1000.0, burst=1000)
+    # 模拟服务器的错误不需要重试退避
+    get_http_session().configure(backoff=0.0)
+    # Scholar 不延迟启动，结果更稳定
+    providers.set_providers([providers.InspireProvider(timeout=30),
+                             providers.ScholarProvider(priority=1, timeout=45)])
+
+    results = []
+    for size in args.sizes:
+        content = generate_bib_content(size, seed=size)
+        library = MockLibrary(content)
+        server = MockInspireServer(library, recordings=args.recordings, latency=args.latency, jitter=args.jitter,
+                                   error_rate=args.error_rate, rate_limit=args.rate_limit)
+        restore_url = use_mock_inspire(server)
+        restore_scholar = install_scholar_stub(ScholarStub(library, latency=args.scholar_latency))
+        try:
+            with server:
+                if 'resolve' in args.scenarios:
+                    results.extend(bench_resolve(args, server, content, size))
+                if 'get_bibtex' in args.scenarios:
+                    results.extend(bench_get_bibtex(args, content, size))
+        finally:
+            restore_url()
+            restore_scholar()
+        if 'update' in args.scenarios and size <= args.max_parse:
+            results.extend(bench_update(args, content, size))
+        if 'clean' in args.scenarios:
+            results.extend(bench_clean(args, args.workdir, size))
+        if 'merge' in args.scenarios and size <= args.max_parse:
+            results.extend(bench_merge(args, args.workdir, size))
+        for row in results:
+            if row['size'] == size:
+                print(f"{row['scenario']:<20} {size:>7} {row['seconds']:>9.3f}s", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            report['regressions'] = compare(results, json.load(file), args.threshold)
+        for regression in report['regressions']:
+            print(f"Regression: {regression['scenario']} ({regression['size']}) {regression['metric']} "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['change']:+.0%})",
+                  file=sys.stderr)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+生成用于基准测试的合成 BibTeX 库。
+"""
+import os
+import random
+
+_SURNAMES = ['Maldacena', 'Witten', 'Hawking', 'Penrose', 'Weinberg', 'Susskind', 'Polchinski',
+             'Strominger', 'Vafa', 'Seiberg', 'Qi', 'Zhang', 'Wang', 'Li', 'Chen', 'Liu']
+_WORDS = ['black', 'hole', 'entropy', 'gravitational', 'waves', 'dark', 'energy', 'cosmological',
+          'constant', 'inflation', 'string', 'theory', 'holography', 'quantum', 'field', 'constraints',
+          'neutron', 'star', 'merger', 'observations', 'lensing', 'standard', 'sirens', 'hubble']
+_JOURNALS = ['Phys. Rev. D', 'Phys. Rev. Lett.', 'JHEP', 'Astrophys. J.', 'JCAP', 'Eur. Phys. J. C']
+_SUFFIX_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def make_texkey(rng, index):
+    surname = rng.choice(_SURNAMES)
+    year = rng.randint(1990, 2024)
+    suffix = ''.join(rng.choice(_SUFFIX_LETTERS) for _ in range(2))
+    # 加上序号保证唯一
+    return f"{surname}:{year}{suffix}{index}"
+
+
+def make_entry(rng, index, key=None):
+    key = key or make_texkey(rng, index)
+    year = rng.randint(1990, 2024)
+    title = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(4, 10))).capitalize()
+    authors = ' and '.join(f"{rng.choice(_SURNAMES)}, {chr(65 + rng.randint(0, 25))}."
+                           for _ in range(rng.randint(1, 5)))
+    eprint = f"{year % 100:02d}{rng.randint(1, 12):02d}.{rng.randint(0, 99999):05d}"
+    return (f"@article{{{key},\n"
+            f"    author = \"{authors}\",\n"
+            f"    title = \"{{{title}}}\",\n"
+            f"    eprint = \"{eprint}\",\n"
+            f"    archivePrefix = \"arXiv\",\n"
+            f"    doi = \"10.1103/PhysRevD.{rng.randint(10, 110)}.{index:06d}\",\n"
+            f"    journal = \"{rng.choice(_JOURNALS)}\",\n"
+            f"    volume = \"{rng.randint(1, 120)}\",\n"
+            f"    pages = \"{rng.randint(1, 99999)}\",\n"
+            f"    year = \"{year}\"\n"
+            f"}}\n")
+
+
+def generate_bib_content(n_entries, duplicate_ratio=0.0, seed=0):
+    """
+    :param n_entries: 条目数量
+    :param duplicate_ratio: 重复条目（键只差大小写）的比例
+    :param seed: 随机种子，相同参数生成相同内容
+    :return: BibTeX 文本
+    """
+    rng = random.Random(seed)
+    entries = []
+    keys = []
+    for i in range(n_entries):
+        if keys and rng.random() < duplicate_ratio:
+            key = rng.choice(keys).upper()
+        else:
+            key = make_texkey(rng, i)
+            keys.append(key)
+        entries.append(make_entry(rng, i, key))
+    return '\n'.join(entries)
+
+
+def generate_bib_file(path, n_entries, duplicate_ratio=0.0, seed=0):
+    """
+    生成合成 .bib 文件；若文件已存在则直接复用。
+    """
+    if not os.path.exists(path):
+        with open(path, 'w') as file:
+            file.write(generate_bib_content(n_entries, duplicate_ratio, seed))
+    return path
+
+
+def generate_tex_content(keys, keys_per_cite=3, seed=0):
+    """
+    生成引用给定键的 LaTeX 文本。
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(0, len(keys), keys_per_cite):
+        words = ' '.join(rng.choice(_WORDS) for _ in range(12))
+        lines.append(f"{words.capitalize()} \\cite{{{','.join(keys[i:i + keys_per_cite])}}}.")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+
+from bib_scanner import scan_bib_content
+
+INDEX_VERSION = 2
+
+# 一次扫描同时匹配 doi / eprint / arxiv / title / author / year 字段的开头，值可以跨行
+_FIELD_PATTERN = re.compile(rb'^[ \t]*(doi|eprint|arxiv|title|author|year)[ \t]*=[ \t]*',
+                            re.MULTILINE | re.IGNORECASE)
+_BRACE_PATTERN = re.compile(rb'[{}]')
+_QUOTED_PATTERN = re.compile(rb'[{}"]')
+_BARE_VALUE_PATTERN = re.compile(rb'[^,}\r\n]*')
+_LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+\s*')
+_NON_ALNUM = re.compile(r'[^0-9a-zA-Z]+')
+_DOI_PREFIX = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:)')
+
+
+def index_path_for(bib_path):
+    """
+    索引文件与 .bib 文件放在同一目录下：.<文件名>.index.json
+    """
+    directory, name = os.path.split(os.path.abspath(bib_path))
+    return os.path.join(directory, f".{name}.index.json")
+
+
+def _read_value(data, position):
+    """
+    读取从 position 开始的字段值：{...} 和 "..." 按括号配对，可以跨行；否则读到逗号或行尾。
+
+    :return: 值的原始字节（包括外层括号或引号）
+    """
+    opener = data[position:position + 1]
+    if opener in (b'{', b'"'):
+        pattern = _BRACE_PATTERN if opener == b'{' else _QUOTED_PATTERN
+        depth = 0
+        for match in pattern.finditer(data, position + (opener == b'"')):
+            char = match.group()
+            if char == b'{':
+                depth += 1
+            elif char == b'}':
+                depth -= 1
+                if depth == 0 and opener == b'{':
+                    return data[position:match.end()]
+            elif depth == 0:
+                return data[position:match.end()]
+        return data[position:]
+    return _BARE_VALUE_PATTERN.match(data, position).group()
+
+
+def _strip_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+    # 跨行的值合并为一行
+    return ' '.join(value.replace('{', '').replace('}', '').split())
+
+
+def normalize_title(title):
+    """
+    规范化标题：去掉 LaTeX 命令、括号和标点，转为小写并合并空白。
+    """
+    title = _LATEX_COMMAND.sub(' ', title)
+    return _NON_ALNUM.sub(' ', title).strip().lower()
+
+
+def normalize_doi(doi):
+    doi = doi.strip().lower()
+    return _DOI_PREFIX.sub('', doi)
+
+
+def normalize_eprint(eprint):
+    eprint = re.sub(r'^arxiv:', '', eprint.strip(), flags=re.IGNORECASE)
+    return re.sub(r'v\d+$', '', eprint).lower()
+
+
+def _hash_range(mm, start, end, hasher, chunk_size=1 << 20):
+    for position in range(start, end, chunk_size):
+        hasher.update(mm[position:min(position + chunk_size, end)])
+    return hasher
+
+
+def extract_fields(entry_bytes):
+    """
+    不经完整解析，从单个条目的原始文本中提取 doi、eprint（含 arxiv 字段）、title、author、year。
+
+    :param entry_bytes: 条目原始字节
+    :return: {字段名: 去掉引号和括号的值}，只包含存在的字段
+    """
+    fields = {}
+    for match in _FIELD_PATTERN.finditer(entry_bytes):
+        name = match.group(1).lower().decode('ascii')
+        if name == 'arxiv':
+            name = 'eprint'
+        if name not in fields:
+            value = _read_value(entry_bytes, match.end())
+            fields[name] = _strip_value(value.decode('utf-8', 'replace'))
+    return fields
+
+
+def extract_index_fields(entry_bytes):
+    """
+    从单个条目的原始文本中提取 DOI、arXiv ID 和规范化标题。
+
+    :param entry_bytes: 条目原始字节
+    :return: (doi, eprint, title)，缺失的字段为 None
+    """
+    fields = extract_fields(entry_bytes)
+    doi, eprint, title = fields.get('doi'), fields.get('eprint'), fields.get('title')
+    return (normalize_doi(doi) if doi else None,
+            normalize_eprint(eprint) if eprint else None,
+            normalize_title(title) if title else None)
+
+
+class BibIndex:
+    """
+    .bib 文件的键/偏移索引，保存为旁路文件（sidecar）。
+    通过文件大小、修改时间和内容哈希校验；文件只是在末尾追加时增量更新。
+    """
+
+    def __init__(self, bib_path):
+        self.bib_path = bib_path
+        self.index_path = index_path_for(bib_path)
+        self.size = 0
+        self.mtime = 0.0
+        self.digest = hashlib.sha1().hexdigest()
+        # 每条记录: [key, entry_type, start, end, doi, eprint, title]
+        self.entries = []
+        self._rebuild_lookups()
+
+    def _rebuild_lookups(self):
+        self.keys = {}
+        self.dois = {}
+        self.eprints = {}
+        self.titles = {}
+        for position in range(len(self.entries)):
+            self._add_lookup(position)
+
+    def _add_lookup(self, position):
+        key, _, _, _, doi, eprint, title = self.entries[position]
+        self.keys.setdefault(key.lower(), position)
+        if doi:
+            self.dois.setdefault(doi, position)
+        if eprint:
+            self.eprints.setdefault(eprint, position)
+        if title:
+            self.titles.setdefault(title, position)
+
+    @classmethod
+    def load(cls, bib_path):
+        """
+        读取旁路索引文件（若存在且有效），否则重新建立索引。
+        """
+        index = cls(bib_path)
+        try:
+            with open(index.index_path, 'r') as file:
+                data = json.load(file)
+            if data.get('version') == INDEX_VERSION:
+                index.size = data['size']
+                index.mtime = data['mtime']
+                index.digest = data['digest']
+                index.entries = data['entries']
+                index._rebuild_lookups()
+        except (OSError, ValueError, KeyError):
+            pass
+        index.refresh()
+        return index
+
+    def refresh(self):
+        """
+        根据文件当前状态更新索引：未变化时不读文件，追加时只扫描新增部分，其他情况完全重建。
+
+        :return: 索引是否发生变化
+        """
+        try:
+            stat = os.stat(self.bib_path)
+        except OSError:
+            changed = bool(self.entries)
+            self.size, self.mtime, self.entries = 0, 0.0, []
+            self.digest = hashlib.sha1().hexdigest()
+            self._rebuild_lookups()
+            return changed
+        if stat.st_size == self.size and stat.st_mtime == self.mtime:
+            return False
+        if stat.st_size == 0:
+            self.size, self.mtime, self.entries = 0, stat.st_mtime, []
+            self.digest = hashlib.sha1().hexdigest()
+            self._rebuild_lookups()
+            self.save()
+            return True
+
+        with open(self.bib_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                prefix_size = self.size if 0 < self.size <= size else 0
+                hasher = _hash_range(mm, 0, prefix_size, hashlib.sha1())
+                if prefix_size and hasher.hexdigest() == self.digest:
+                    # 原有内容未变，只索引追加的部分
+                    self._index_range(mm, prefix_size)
+                    _hash_range(mm, prefix_size, size, hasher)
+                else:
+                    self.entries = []
+                    self._rebuild_lookups()
+                    self._index_range(mm, 0)
+                    hasher = _hash_range(mm, 0, size, hashlib.sha1())
+        self.size = size
+        self.mtime = stat.st_mtime
+        self.digest = hasher.hexdigest()
+        self.save()
+        return True
+
+    def _index_range(self, mm, offset):
+        first = True
+        for record in scan_bib_content(mm, offset):
+            if first and self.entries and self.entries[-1][3] == offset:
+                # 原来的最后一个条目延伸到新条目开始处
+                self.entries[-1][3] = record.start
+            first = False
+            if not record.key:
+                continue
+            doi, eprint, title = extract_index_fields(mm[record.start:record.end])
+            self.entries.append([record.key, record.entry_type, record.start, record.end, doi, eprint, title])
+            self._add_lookup(len(self.entries) - 1)
+
+    def save(self):
+        data = {
+            'version': INDEX_VERSION,
+            'size': self.size,
+            'mtime': self.mtime,
+            'digest': self.digest,
+            'entries': self.entries,
+        }
+        try:
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as file:
+                # json.dumps 使用 C 编码器，比 json.dump 快得多
+                file.write(json.dumps(data, separators=(',', ':')))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Error writing BibTeX index {self.index_path}: {e}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return self.contains_key(key)
+
+    def contains_key(self, key):
+        return key.lower() in self.keys
+
+    def _key_at(self, position):
+        return self.entries[position][0] if position is not None else None
+
+    def find_key(self, key):
+        return self._key_at(self.keys.get(key.lower()))
+
+    def find_doi(self, doi):
+        return self._key_at(self.dois.get(normalize_doi(doi)))
+
+    def find_eprint(self, eprint):
+        return self._key_at(self.eprints.get(normalize_eprint(eprint)))
+
+    def find_title(self, title):
+        return self._key_at(self.titles.get(normalize_title(title)))
+
+    def entry_text(self, key):
+        """
+        按偏移从文件中读取条目原文。
+        """
+        position = self.keys.get(key.lower())
+        if position is None:
+            return None
+        _, _, start, end, _, _, _ = self.entries[position]
+        with open(self.bib_path, 'rb') as file:
+            file.seek(start)
+            return file.read(end - start).decode('utf-8', 'replace').strip()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+# .bib 文件路径 -> 写入和刷新索引时持有的锁
+_path_locks = {}
+
+
+def get_library_lock(bib_path):
+    """
+    返回给定 .bib 文件的可重入锁。修改文件并刷新其索引、以及读取索引前的刷新都应持有该锁，
+    避免一个线程追加条目时另一个线程刷新到写了一半的文件。
+    """
+    path = os.path.abspath(bib_path)
+    with _indexes_lock:
+        return _path_locks.setdefault(path, threading.RLock())
+
+
+def get_library_index(bib_path):
+    """
+    返回给定 .bib 文件的索引（进程内缓存），并确保与文件当前状态一致。
+    """
+    path = os.path.abspath(bib_path)
+    with get_library_lock(path):
+        with _indexes_lock:
+            index = _indexes.get(path)
+        if index is None:
+            index = BibIndex.load(path)
+            with _indexes_lock:
+                _indexes[path] = index
+        else:
+            index.refresh()
+        return index
@@ -0,0 +1,59 @@
+import mmap
+import os
+import re
+from collections import namedtuple
+
+# 只提取条目类型、键和字节偏移，不解析字段
+ScanRecord = namedtuple('ScanRecord', ['entry_type', 'key', 'start', 'end'])
+
+# 这些类型没有条目键
+NON_ENTRY_TYPES = ('comment', 'string', 'preamble')
+
+_ENTRY_START = r'^[ \t]*@[ \t]*(\w+)[ \t]*[{(][ \t\r\n]*([^,\s{}()]*)'
+_ENTRY_START_BYTES = re.compile(_ENTRY_START.encode('ascii'), re.MULTILINE)
+_ENTRY_START_STR = re.compile(_ENTRY_START, re.MULTILINE)
+
+
+def _scan(pattern, data, decode, start=0):
+    previous = None
+    for match in pattern.finditer(data, start):
+        if previous is not None:
+            yield previous._replace(end=match.start())
+        entry_type = decode(match.group(1)).lower()
+        key = None
+        if entry_type not in NON_ENTRY_TYPES:
+            key = decode(match.group(2)) or None
+        previous = ScanRecord(entry_type, key, match.start(), None)
+    if previous is not None:
+        yield previous._replace(end=len(data))
+
+
+def scan_bib_content(content, start=0):
+    """
+    扫描内存中的 BibTeX 文本（str 或 bytes）。
+
+    每条记录的 end 为下一条目的起始位置（或文本末尾），因此
+    content[start:end] 包含该条目及其后的空白。
+
+    :param content: BibTeX 文本
+    :param start: 从该偏移处开始扫描（应位于行首）
+    :return: ScanRecord 生成器；offset 对 str 为字符偏移，对 bytes 为字节偏移
+    """
+    if isinstance(content, str):
+        return _scan(_ENTRY_START_STR, content, lambda value: value, start)
+    return _scan(_ENTRY_START_BYTES, content, lambda value: value.decode('utf-8', 'replace'), start)
+
+
+def scan_bib_file(file_path):
+    """
+    使用内存映射流式扫描 .bib 文件，不把整个文件读入 Python 字符串。
+
+    :param file_path: .bib 文件路径
+    :return: ScanRecord 生成器，start / end 为字节偏移
+    """
+    if not file_path or not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        return
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from scan_bib_content(mm)
+
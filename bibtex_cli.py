@@ -0,0 +1,332 @@
+"""
+BibtexManager 的命令行入口，不依赖 PyQt6，可在构建服务器和 CI 中使用。
+
+    python bibtex_cli.py resolve paper.tex --library refs.bib > missing.bib
+    python bibtex_cli.py resolve build/paper.aux --format jsonl --jobs 16
+    python bibtex_cli.py resolve thesis/ --progress
+    cat paper.tex | python bibtex_cli.py resolve - --no-cache
+    python bibtex_cli.py merge a.bib b.bib c.bib -o shared.bib --report conflicts.jsonl
+    python bibtex_cli.py merge new1.bib new2.bib --append refs.bib
+    python bibtex_cli.py clean refs.bib --similar
+    python bibtex_cli.py watch thesis/ refs.bib
+    python bibtex_cli.py --trace trace.json resolve paper.tex > missing.bib
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import citation_extractor
+import search_module
+from lookup_cache import set_cache_enabled
+
+# 退出码：有引用未找到（--strict）
+EXIT_MISSING = 2
+
+
+def read_input(path):
+    """
+    :param path: 文件路径，"-" 表示标准输入
+    :return: 文本内容
+    """
+    if path == '-':
+        return sys.stdin.read()
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return file.read()
+
+
+def iter_input_citations(path):
+    """
+    流式提取项目目录、.tex、.aux 或 .bcf 文件中的引用；标准输入同时识别 LaTeX 和 .aux 格式。
+    """
+    if path == '-':
+        text = sys.stdin.read()
+        yield from citation_extractor.iter_text_citations(text, '<stdin>')
+        yield from citation_extractor.iter_aux_text_citations(text, '<stdin>')
+    else:
+        yield from citation_extractor.iter_citations(path)
+
+
+class ProgressReporter:
+    """
+    在标准错误输出上显示解析进度，可被多个线程调用。
+    """
+
+    def __init__(self, total, enabled=True, stream=sys.stderr):
+        self.total = total
+        self.enabled = enabled
+        self.stream = stream
+        self.done = 0
+        self.start_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, count=1):
+        with self._lock:
+            self.done += count
+            if self.enabled:
+                elapsed = time.monotonic() - self.start_time
+                rate = self.done / elapsed if elapsed > 0 else 0.0
+                self.stream.write(f"\r{self.done}/{self.total} keys resolved ({rate:.1f}/s)")
+                self.stream.flush()
+
+    def finish(self):
+        if self.enabled and self.total:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def cmd_resolve(args):
+    set_cache_enabled(not args.no_cache)
+    citations = {}
+    for path in args.inputs:
+        for key, locations in citation_extractor.group_citations(iter_input_citations(path)).items():
+            citations.setdefault(key, []).extend(locations)
+    unique_keys = list(citations)
+
+    progress = ProgressReporter(len(unique_keys), enabled=args.progress)
+    local_hits = []
+    results = search_module.resolve_citation_keys(
+        unique_keys, max_workers=args.jobs, use_batch=not args.no_batch, use_cache=not args.no_cache,
+        on_result=lambda key, bibtex: progress.update(), library_path=args.library, local_hits=local_hits)
+    progress.finish()
+
+    local = set(local_hits)
+    not_found = []
+    for key in unique_keys:
+        bibtex = results.get(key)
+        if not bibtex:
+            not_found.append(key)
+        if args.format == 'jsonl':
+            source = None
+            if bibtex:
+                source = 'library' if key in local else 'remote'
+            locations = [citation_extractor.format_location(citation) for citation in citations[key]]
+            print(json.dumps({'key': key, 'found': bool(bibtex), 'source': source, 'bibtex': bibtex,
+                              'locations': locations}, ensure_ascii=False))
+        elif bibtex and (key not in local or args.include_local):
+            print(bibtex + "\n")
+
+    for key in not_found:
+        print(f"Not found: {key} (cited at {citation_extractor.format_location(citations[key][0])})",
+              file=sys.stderr)
+    print(f"{len(unique_keys) - len(not_found)}/{len(unique_keys)} keys resolved "
+          f"({len(local)} from library)", file=sys.stderr)
+    return EXIT_MISSING if args.strict and not_found else 0
+
+
+def cmd_merge(args):
+    if args.output:
+        import merge_pipeline
+
+        def on_progress(read, written, elapsed):
+            if args.progress:
+                sys.stderr.write(f"\r{read} entries read, {written} written ({read / max(elapsed, 1e-9):.0f}/s)")
+                sys.stderr.flush()
+
+        stats = merge_pipeline.merge_bib_files(args.inputs, args.output, report_path=args.report, jobs=args.jobs,
+                                               progress_callback=on_progress)
+        if args.progress:
+            sys.stderr.write("\n")
+        print(merge_pipeline.format_merge_stats(stats), file=sys.stderr)
+        return 0
+
+    total_added = 0
+    total_skipped = 0
+    for path in args.inputs:
+        added, skipped = search_module.append_bibtex_entries(args.append, read_input(path))
+        total_added += len(added)
+        total_skipped += len(skipped)
+        if args.verbose:
+            for key in added:
+                print(f"added {key}", file=sys.stderr)
+            for key in skipped:
+                print(f"skipped {key}", file=sys.stderr)
+    print(f"Added {total_added} entries to {args.append}, skipped {total_skipped} existing entries",
+          file=sys.stderr)
+    return 0
+
+
+def confirm(prompt):
+    """
+    在终端中询问是否继续；标准输入不是终端时视为否。
+    """
+    if not sys.stdin.isatty():
+        return False
+    sys.stderr.write(f"{prompt} [y/N] ")
+    sys.stderr.flush()
+    return sys.stdin.readline().strip().lower() in ('y', 'yes')
+
+
+def cmd_clean(args):
+    def on_progress(done, total, entries):
+        if args.progress:
+            sys.stderr.write(f"\r{done * 100 // max(total, 1)}% ({entries} entries)")
+            sys.stderr.flush()
+
+    aliases = None
+    if args.similar:
+        import duplicate_finder
+        state = os.stat(args.file)
+        clusters = duplicate_finder.find_duplicates_in_file(args.file, use_minhash=args.minhash)
+        # 每组单独确认：删除的键会让引用它的 \cite 失效
+        selected = []
+        for cluster in clusters:
+            keys = [record.key for record in cluster.records]
+            print(f"{keys[0]} (kept) <- {', '.join(keys[1:])} ({', '.join(cluster.reasons)})", file=sys.stderr)
+            if args.dry_run or args.yes or confirm("Merge this group?"):
+                selected.append(cluster)
+        if clusters and not selected and not args.yes and not sys.stdin.isatty():
+            print("Not merging: pass --yes or run in a terminal to confirm each group", file=sys.stderr)
+        if args.dry_run:
+            aliases = [(record.key, cluster.records[0].key)
+                       for cluster in selected for record in cluster.records[1:]]
+        else:
+            # 逐组确认期间文件可能已被修改，此时各条目的偏移已失效
+            stat = os.stat(args.file)
+            if (stat.st_size, stat.st_mtime) != (state.st_size, state.st_mtime):
+                raise IOError(f"{args.file} changed while confirming duplicates; run again")
+            result = search_module.merge_duplicate_entries(args.file, selected, progress_callback=on_progress)
+            aliases = result.aliases
+            for key, names in result.filled.items():
+                print(f"Copied {', '.join(names)} into {key}", file=sys.stderr)
+            for key, reason in result.skipped:
+                print(f"Skipped group {key}: {reason}", file=sys.stderr)
+        removed = [key for key, _ in aliases]
+    elif args.dry_run:
+        from bib_scanner import scan_bib_file
+        seen = set()
+        removed = []
+        for record in scan_bib_file(args.file):
+            if not record.key:
+                continue
+            if record.key.lower() in seen:
+                removed.append(record.key)
+            seen.add(record.key.lower())
+    else:
+        removed = search_module.check_and_clean_bib(args.file, progress_callback=on_progress)
+
+    if args.progress:
+        sys.stderr.write("\n")
+    if aliases is not None:
+        # 输出 "删除的键 -> 保留的键"，供更新 \cite
+        for key, kept_key in aliases:
+            print(f"{key} -> {kept_key}")
+    else:
+        for key in removed:
+            print(key)
+    action = "Would remove" if args.dry_run else "Removed"
+    print(f"{action} {len(removed)} duplicate entries", file=sys.stderr)
+    return 0
+
+
+def cmd_watch(args):
+    import watcher
+    set_cache_enabled(not args.no_cache)
+    project_watcher = watcher.ProjectWatcher(args.project, args.library, max_workers=args.jobs)
+
+    def on_sync(result):
+        if result.new_keys:
+            print(f"{len(result.new_keys)} new keys: added {len(result.added)}, "
+                  f"already present {len(result.skipped)}, not found {len(result.not_found)} "
+                  f"({result.elapsed:.2f}s)", file=sys.stderr)
+            for key in result.added:
+                print(key)
+            sys.stdout.flush()
+            for key in result.not_found:
+                print(f"Not found: {key}", file=sys.stderr)
+
+    stop_event = threading.Event()
+    print(f"Watching {project_watcher.root} -> {args.library} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        project_watcher.run(stop_event, on_sync=on_sync, use_inotify=not args.poll)
+    except KeyboardInterrupt:
+        stop_event.set()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='bibtex_cli', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', metavar='FILE',
+                        help="write per-call timings as a Chrome trace (.json) or JSON lines (.jsonl)")
+    parser.add_argument('--timings', action='store_true', help="print p50/p95 timings per operation on stderr")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    resolve = subparsers.add_parser('resolve', help="look up BibTeX for the citations in a LaTeX project")
+    resolve.add_argument('inputs', nargs='*', default=['-'],
+                         help="project directories, .tex, .aux or .bcf files, '-' for stdin (default)")
+    resolve.add_argument('--library', help="local .bib file; keys found there are not looked up online")
+    resolve.add_argument('--include-local', action='store_true',
+                         help="also print entries found in --library (bibtex format)")
+    resolve.add_argument('--format', choices=['bibtex', 'jsonl'], default='bibtex', help="output format")
+    resolve.add_argument('-j', '--jobs', type=int, default=search_module.DEFAULT_MAX_WORKERS,
+                         help="number of parallel lookups")
+    resolve.add_argument('--no-cache', action='store_true', help="do not read or write the lookup cache")
+    resolve.add_argument('--no-batch', action='store_true', help="do not batch INSPIRE queries")
+    resolve.add_argument('--progress', action='store_true', help="show progress on stderr")
+    resolve.add_argument('--strict', action='store_true',
+                         help=f"exit with status {EXIT_MISSING} if any key was not found")
+    resolve.set_defaults(func=cmd_resolve)
+
+    merge = subparsers.add_parser('merge', help="merge .bib files into one library")
+    merge.add_argument('inputs', nargs='+', help=".bib files to merge ('-' for stdin with --append)")
+    target = merge.add_mutually_exclusive_group(required=True)
+    target.add_argument('-o', '--output', help="write all inputs, normalized and deduplicated, to this file")
+    target.add_argument('--append', metavar='LIBRARY', help="only append entries whose keys LIBRARY lacks")
+    merge.add_argument('--report', help="with --output, write key conflicts and duplicates as JSON lines")
+    merge.add_argument('-j', '--jobs', type=int, default=None, help="with --output, number of parsing processes")
+    merge.add_argument('--progress', action='store_true', help="show progress on stderr")
+    merge.add_argument('-v', '--verbose', action='store_true', help="with --append, list added and skipped keys")
+    merge.set_defaults(func=cmd_merge)
+
+    watch = subparsers.add_parser('watch', help="keep a .bib file in sync with the citations of a LaTeX project")
+    watch.add_argument('project', help="project directory or main .tex file")
+    watch.add_argument('library', help=".bib file that new entries are appended to")
+    watch.add_argument('-j', '--jobs', type=int, default=search_module.DEFAULT_MAX_WORKERS,
+                       help="number of parallel lookups")
+    watch.add_argument('--no-cache', action='store_true', help="do not read or write the lookup cache")
+    watch.add_argument('--poll', action='store_true', help="poll for changes instead of using inotify")
+    watch.set_defaults(func=cmd_watch)
+
+    clean = subparsers.add_parser('clean', help="remove duplicate entries from a .bib file")
+    clean.add_argument('file', help=".bib file to clean in place")
+    clean.add_argument('--similar', action='store_true',
+                       help="merge entries with the same DOI, arXiv ID or title/author/year, asking for each "
+                            "group and copying missing fields into the kept entry; prints removed -> kept keys")
+    clean.add_argument('--minhash', action='store_true', help="with --similar, match near-identical titles")
+    clean.add_argument('--dry-run', action='store_true', help="only list the entries that would be removed")
+    clean.add_argument('--yes', action='store_true', help="with --similar, merge every group without asking")
+    clean.add_argument('--progress', action='store_true', help="show progress on stderr")
+    clean.set_defaults(func=cmd_clean)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (IOError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        write_trace(args)
+
+
+def write_trace(args):
+    from perf_trace import get_tracer, format_summary
+    tracer = get_tracer()
+    if args.timings:
+        print(format_summary(tracer.summary()), file=sys.stderr)
+    if args.trace:
+        try:
+            tracer.export(args.trace)
+        except (IOError, OSError) as e:
+            print(f"Error writing trace: {e}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+import io
+import os
+import re
+from collections import namedtuple
+
+# 一次引用：key 为引用键，path / line / column 为出现位置（行列从 1 开始），command 为引用命令
+Citation = namedtuple('Citation', ['key', 'path', 'line', 'column', 'command'])
+
+# 可选参数最多两个，如 \citep[see][p. 3]{key}
+_OPTIONAL_ARGS = r'(?:\s*\[[^\]]*\]){0,2}'
+
+# 识别的命令：natbib / biblatex 的各种 \...cite...（含 \Cite、\Parencite 等大写形式）和 \nocite，以及 \input / \include / \import 等
+_TEX_COMMAND_PATTERN = re.compile(
+    r'\\(?P<cite>[a-zA-Z]*(?i:cite)[a-zA-Z]*)\*?' + _OPTIONAL_ARGS + r'\s*\{(?P<keys>[^}]*)\}'
+    r'|\\(?P<input>input|include|subfile)\s*\{(?P<file>[^}]*)\}'
+    r'|\\(?P<import>import|subimport|inputfrom|includefrom|subinputfrom|subincludefrom)'
+    r'\*?\s*\{(?P<import_dir>[^}]*)\}\s*\{(?P<import_file>[^}]*)\}')
+
+# biblatex 的多重引用（\cites[pre][post]{a}[pre][post]{b}）后续的参数
+_MULTICITE_ARG_PATTERN = re.compile(_OPTIONAL_ARGS + r'\s*\{([^}]*)\}')
+
+# 行尾尚未结束的命令（参数跨行），需要和下一行合并后再匹配
+_INCOMPLETE_COMMAND_PATTERN = re.compile(
+    r'\\(?:[a-zA-Z]*(?i:cite)[a-zA-Z]*|input|include|subfile|import|subimport|inputfrom|includefrom'
+    r'|subinputfrom|subincludefrom)\*?(?:\s*\[[^\]]*\])*\s*(?:\[[^\]]*|\{[^}]*|\{[^}]*\}\s*\{[^}]*)?\Z')
+
+# 名字中带 cite 但参数不是引用键的命令
+_NON_CITE_COMMANDS = {'citestyle', 'citesetup', 'citereset', 'citetrackerfalse', 'citetrackertrue'}
+
+_COMMENT_PATTERN = re.compile(r'(?<!\\)%.*')
+
+# 快速跳过不含任何相关命令的行
+_COMMAND_HINT_PATTERN = re.compile(r'(?i:cite)|input|include|import|subfile')
+
+# .aux 中的引用记录：BibTeX 的 \citation{a,b}，biblatex 的 \abx@aux@cite{a} 或 \abx@aux@cite{0}{a}；
+# \@input{chapter.aux} 为 \include 生成的子文件
+_AUX_CITATION_PATTERN = re.compile(r'\\(?:citation|abx@aux@cite(?:\{\d+\})?)\{([^}]+)\}')
+_AUX_INPUT_PATTERN = re.compile(r'\\@input\{([^}]+)\}')
+
+# biblatex 的 .bcf 控制文件：<bcf:citekey order="1">key</bcf:citekey>
+_BCF_CITEKEY_PATTERN = re.compile(r'<bcf:citekey[^>]*>([^<]+)</bcf:citekey>')
+
+# 参数跨行时最多合并的行数
+MAX_CONTINUATION_LINES = 20
+
+
+def _split_keys(keys):
+    for key in keys.split(','):
+        key = key.strip()
+        # \nocite{*} 表示引用全部条目，不是引用键
+        if key and key != '*':
+            yield key
+
+
+def _resolve_tex_path(directory, name):
+    path = os.path.normpath(os.path.join(directory, name.strip()))
+    if not os.path.splitext(path)[1] and not os.path.exists(path):
+        path += '.tex'
+    return path
+
+
+def _iter_lines(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        yield from file
+
+
+def iter_text_citations(text, path='<text>'):
+    """
+    逐行提取一段 LaTeX 文本中的引用，不处理 \\input / \\include。
+
+    :return: Citation 迭代器（按出现顺序，保留重复项）
+    """
+    return _iter_tex_lines(io.StringIO(text), path, None, None, None)
+
+
+def iter_tex_citations(path, follow_includes=True):
+    """
+    流式提取 .tex 文件中的引用，并按出现位置展开 \\input、\\include、\\subfile 和 \\import 引入的文件。
+    每次只在内存中保留一行（参数跨行时为几行）。
+
+    :param path: 主文件路径
+    :param follow_includes: 是否展开引入的文件
+    :return: Citation 迭代器（按文档顺序，保留重复项）
+    """
+    root_dir = os.path.dirname(path)
+    visited = set() if follow_includes else None
+    return _iter_tex_file(path, root_dir, visited)
+
+
+def _iter_tex_file(path, root_dir, visited):
+    if visited is not None:
+        real_path = os.path.realpath(path)
+        if real_path in visited:
+            return
+        visited.add(real_path)
+    yield from _iter_tex_lines(_iter_lines(path), path, os.path.dirname(path), root_dir, visited)
+
+
+def _iter_tex_lines(lines, path, current_dir, root_dir, visited):
+    buffer = ''
+    buffer_line = 1
+    buffer_column = 1
+    carried_lines = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if '%' in line:
+            line = _COMMENT_PATTERN.sub('', line)
+        if buffer:
+            buffer += '\n' + line
+        elif '\\' not in line or not _COMMAND_HINT_PATTERN.search(line):
+            continue
+        else:
+            buffer, buffer_line, buffer_column = line, line_number, 1
+
+        position = 0
+        for match in _TEX_COMMAND_PATTERN.finditer(buffer):
+            position = match.end()
+            line_offset = buffer.count('\n', 0, match.start())
+            if line_offset:
+                column = match.start() - buffer.rfind('\n', 0, match.start())
+            else:
+                column = buffer_column + match.start()
+            location = (path, buffer_line + line_offset, column)
+
+            command = match.group('cite')
+            if command:
+                if command.lower() in _NON_CITE_COMMANDS:
+                    continue
+                for key in _split_keys(match.group('keys')):
+                    yield Citation(key, *location, command)
+                if command.lower().endswith('cites'):
+                    # 多重引用：继续读取后面的 [..]{..} 参数
+                    while True:
+                        extra = _MULTICITE_ARG_PATTERN.match(buffer, position)
+                        if not extra:
+                            break
+                        position = extra.end()
+                        for key in _split_keys(extra.group(1)):
+                            yield Citation(key, *location, command)
+            elif visited is not None:
+                if match.group('input'):
+                    included = _resolve_tex_path(root_dir, match.group('file'))
+                    if not os.path.exists(included):
+                        included = _resolve_tex_path(current_dir, match.group('file'))
+                    new_root = root_dir
+                else:
+                    command = match.group('import')
+                    # \import 的目录相对于当前根目录，\subimport 等相对于当前文件
+                    base_dir = current_dir if command.startswith('sub') else root_dir
+                    new_root = os.path.join(base_dir, match.group('import_dir').strip())
+                    included = _resolve_tex_path(new_root, match.group('import_file'))
+                if os.path.exists(included):
+                    yield from _iter_tex_file(included, new_root, visited)
+                else:
+                    print(f"Included file not found: {included} ({path}:{location[1]})")
+
+        incomplete = None
+        if buffer.find('\\', position) != -1:
+            incomplete = _INCOMPLETE_COMMAND_PATTERN.search(buffer, position)
+        if incomplete and carried_lines < MAX_CONTINUATION_LINES:
+            # 保留未结束的命令，与下一行合并
+            start = incomplete.start()
+            line_offset = buffer.count('\n', 0, start)
+            if line_offset:
+                buffer_column = start - buffer.rfind('\n', 0, start)
+            else:
+                buffer_column += start
+            buffer_line += line_offset
+            buffer = buffer[start:]
+            carried_lines = buffer.count('\n') + 1
+        else:
+            buffer = ''
+            carried_lines = 0
+
+
+def iter_aux_citations(path):
+    """
+    流式提取编译生成的 .aux 文件中的引用，并跟随 \\@input 读取 \\include 生成的子 .aux 文件。
+    """
+    return _iter_aux_file(path, set())
+
+
+def _iter_aux_file(path, visited):
+    real_path = os.path.realpath(path)
+    if real_path in visited:
+        return
+    visited.add(real_path)
+    directory = os.path.dirname(path)
+    for line_number, line in enumerate(_iter_lines(path), 1):
+        for match in _AUX_CITATION_PATTERN.finditer(line):
+            for key in _split_keys(match.group(1)):
+                yield Citation(key, path, line_number, match.start() + 1, 'citation')
+        for match in _AUX_INPUT_PATTERN.finditer(line):
+            included = os.path.normpath(os.path.join(directory, match.group(1)))
+            if os.path.exists(included):
+                yield from _iter_aux_file(included, visited)
+
+
+def iter_aux_text_citations(text, path='<aux>'):
+    """
+    提取一段 .aux 文本中的引用，不跟随 \\@input。
+    """
+    for line_number, line in enumerate(text.splitlines(), 1):
+        for match in _AUX_CITATION_PATTERN.finditer(line):
+            for key in _split_keys(match.group(1)):
+                yield Citation(key, path, line_number, match.start() + 1, 'citation')
+
+
+def iter_bcf_citations(path):
+    """
+    流式提取 biblatex .bcf 文件中的引用键。
+    """
+    for line_number, line in enumerate(_iter_lines(path), 1):
+        for match in _BCF_CITEKEY_PATTERN.finditer(line):
+            for key in _split_keys(match.group(1)):
+                yield Citation(key, path, line_number, match.start() + 1, 'citekey')
+
+
+def find_main_files(directory):
+    """
+    在项目目录中查找主文件（包含 \\documentclass 的 .tex 文件）；没有时返回全部 .tex 文件。
+    """
+    tex_files = []
+    main_files = []
+    for current_dir, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for filename in sorted(filenames):
+            if not filename.endswith('.tex'):
+                continue
+            path = os.path.normpath(os.path.join(current_dir, filename))
+            tex_files.append(path)
+            for line in _iter_lines(path):
+                if '\\documentclass' in _COMMENT_PATTERN.sub('', line):
+                    main_files.append(path)
+                    break
+    return main_files or tex_files
+
+
+def iter_citations(path):
+    """
+    按文件类型提取引用：项目目录、.tex、.aux 或 .bcf 文件。
+    """
+    if os.path.isdir(path):
+        return _iter_project_citations(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.aux':
+        return iter_aux_citations(path)
+    if extension == '.bcf':
+        return iter_bcf_citations(path)
+    return iter_tex_citations(path)
+
+
+def _iter_project_citations(directory):
+    visited = set()
+    for main_file in find_main_files(directory):
+        yield from _iter_tex_file(main_file, os.path.dirname(main_file), visited)
+
+
+def group_citations(citations):
+    """
+    按引用键合并重复的引用。
+
+    :param citations: Citation 迭代器
+    :return: {key: [Citation, ...]}，按键第一次出现的顺序排列
+    """
+    grouped = {}
+    for citation in citations:
+        grouped.setdefault(citation.key, []).append(citation)
+    return grouped
+
+
+def format_location(citation):
+    return f"{citation.path}:{citation.line}:{citation.column}"
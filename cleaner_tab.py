@@ -1,19 +1,55 @@
-from PyQt6.QtWidgets import QPushButton, QTextEdit, QVBoxLayout, QLabel
-from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import (QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QListWidget,
+                             QListWidgetItem, QMessageBox)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+import os
+import time
 import search_module
+import duplicate_finder
 from base_tab import BaseTab
 
 class CleanerThread(QThread):
     result_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int, int, float)  # 已处理字节, 总字节, 已处理条目, 条目/秒
+    error = pyqtSignal(str)
 
     def __init__(self, file_path):
         super().__init__()
         self.file_path = file_path
+        self.entries = 0
+        self.elapsed = 0.0
 
     def run(self):
-        duplicates = search_module.check_and_clean_bib(self.file_path)
+        self.start_time = time.monotonic()
+        try:
+            duplicates = search_module.check_and_clean_bib(self.file_path, progress_callback=self.on_progress)
+        except (IOError, OSError) as e:
+            self.error.emit(str(e))
+            return
+        self.elapsed = time.monotonic() - self.start_time
         self.result_ready.emit(duplicates)
 
+    def on_progress(self, done, total, entries):
+        self.entries = entries
+        elapsed = time.monotonic() - self.start_time
+        self.progress.emit(done, total, entries, entries / elapsed if elapsed > 0 else 0.0)
+
+class DuplicateFinderThread(QThread):
+    result_ready = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, file_path, use_minhash=False):
+        super().__init__()
+        self.file_path = file_path
+        self.use_minhash = use_minhash
+
+    def run(self):
+        try:
+            clusters = duplicate_finder.find_duplicates_in_file(self.file_path, use_minhash=self.use_minhash)
+        except (IOError, OSError) as e:
+            self.error.emit(str(e))
+            return
+        self.result_ready.emit(clusters)
+
 class CleanerTab(BaseTab):
     def __init__(self, parent):
         super().__init__(parent)
@@ -28,24 +64,141 @@ class CleanerTab(BaseTab):
         clean_button.clicked.connect(self.clean_bibtex)
         self.layout.addWidget(clean_button)
 
+        # 按 DOI / arXiv / 标题+作者+年份 查找键不同的重复条目
+        similar_layout = QHBoxLayout()
+        find_similar_button = QPushButton("Find Similar Entries")
+        find_similar_button.clicked.connect(self.find_similar_entries)
+        similar_layout.addWidget(find_similar_button)
+
+        self.minhash_checkbox = QCheckBox("Match near-identical titles")
+        similar_layout.addWidget(self.minhash_checkbox)
+
+        self.merge_button = QPushButton("Merge Checked Groups")
+        self.merge_button.clicked.connect(self.merge_duplicates)
+        self.merge_button.setEnabled(False)
+        similar_layout.addWidget(self.merge_button)
+        self.layout.addLayout(similar_layout)
+        self.duplicate_clusters = []
+        self.duplicate_file_state = None
+
+        # 每组重复条目单独勾选确认，默认都不合并
+        self.cluster_list = QListWidget()
+        self.cluster_list.itemChanged.connect(self.update_merge_button)
+        self.cluster_list.hide()
+        self.layout.addWidget(self.cluster_list)
+
         self.result_text = QTextEdit()
         self.layout.addWidget(self.result_text)
 
+        self.layout.addWidget(self.setup_status_label())
+
     def clean_bibtex(self):
         file_path = self.parent.bibtex_file_path.text()
         if not file_path:
             self.show_custom_message("Error", "Please select a BibTeX file first.")
             return
         
+        self.status_label.setText("Cleaning...")
         self.cleaner_thread = CleanerThread(file_path)
+        self.cleaner_thread.progress.connect(self.update_progress)
         self.cleaner_thread.result_ready.connect(self.update_result)
+        self.cleaner_thread.error.connect(lambda message: self.show_custom_message("Error", f"Failed to clean BibTeX file: {message}"))
         self.cleaner_thread.start()
 
+    def update_progress(self, done, total, entries, rate):
+        percent = done * 100 // total if total else 100
+        self.status_label.setText(f"Processed {entries} entries ({percent}%) - {rate:.0f} entries/s")
+
     def update_result(self, duplicates):
         if duplicates:
             result = f"Cleaned BibTeX file. Removed duplicate entries for:\n{', '.join(duplicates)}"
         else:
             result = "No duplicate entries found in the BibTeX file."
+        entries, elapsed = self.cleaner_thread.entries, self.cleaner_thread.elapsed
+        rate = entries / elapsed if elapsed > 0 else 0.0
+        self.status_label.setText(f"Processed {entries} entries in {elapsed:.2f}s ({rate:.0f} entries/s)")
         
         self.result_text.setPlainText(result)
         self.show_custom_message("Cleaning Complete", result)
+
+    def find_similar_entries(self):
+        file_path = self.parent.bibtex_file_path.text()
+        if not file_path:
+            self.show_custom_message("Error", "Please select a BibTeX file first.")
+            return
+
+        self.status_label.setText("Searching for duplicate entries...")
+        self.merge_button.setEnabled(False)
+        stat = os.stat(file_path)
+        self.duplicate_file_state = (file_path, stat.st_size, stat.st_mtime)
+        self.finder_thread = DuplicateFinderThread(file_path, self.minhash_checkbox.isChecked())
+        self.finder_thread.result_ready.connect(self.show_duplicate_clusters)
+        self.finder_thread.error.connect(lambda message: self.show_custom_message("Error", f"Failed to read BibTeX file: {message}"))
+        self.finder_thread.start()
+
+    def show_duplicate_clusters(self, clusters):
+        self.duplicate_clusters = clusters
+        self.cluster_list.clear()
+        if not clusters:
+            self.cluster_list.hide()
+            self.result_text.setPlainText("No duplicate entries found in the BibTeX file.")
+            self.status_label.setText("")
+            return
+
+        self.cluster_list.blockSignals(True)
+        for cluster in clusters:
+            keys = [record.key for record in cluster.records]
+            item = QListWidgetItem(f"{keys[0]} (kept) <- {', '.join(keys[1:])}   [{', '.join(cluster.reasons)}]")
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.cluster_list.addItem(item)
+        self.cluster_list.blockSignals(False)
+        self.cluster_list.show()
+        self.result_text.setPlainText("Check each group that should be merged. Fields missing from the kept entry "
+                                      "are copied from the removed ones; removed keys are reported so that "
+                                      "\\cite commands can be updated.")
+        self.status_label.setText(f"Found {len(clusters)} groups of duplicates.")
+        self.update_merge_button()
+
+    def checked_clusters(self):
+        return [cluster for row, cluster in enumerate(self.duplicate_clusters)
+                if self.cluster_list.item(row).checkState() == Qt.CheckState.Checked]
+
+    def update_merge_button(self, *args):
+        self.merge_button.setEnabled(bool(self.duplicate_clusters) and bool(self.checked_clusters()))
+
+    def merge_duplicates(self):
+        file_path, size, mtime = self.duplicate_file_state
+        stat = os.stat(file_path)
+        if (stat.st_size, stat.st_mtime) != (size, mtime):
+            self.show_custom_message("Error", "The BibTeX file changed since the search. Please search again.")
+            self.merge_button.setEnabled(False)
+            return
+
+        clusters = self.checked_clusters()
+        removable = sum(len(cluster.records) - 1 for cluster in clusters)
+        answer = QMessageBox.question(
+            self, "Merge Duplicates",
+            f"Merge {len(clusters)} groups and remove {removable} entries? Citations using the removed keys "
+            f"must be changed to the kept keys.")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+
+        try:
+            result = search_module.merge_duplicate_entries(file_path, clusters)
+        except (IOError, OSError) as e:
+            self.show_custom_message("Error", f"Failed to update BibTeX file: {e}")
+            return
+        self.duplicate_clusters = []
+        self.cluster_list.clear()
+        self.cluster_list.hide()
+        self.merge_button.setEnabled(False)
+        lines = [f"Merged duplicates. Removed {len(result.aliases)} entries; update citations as follows:"]
+        lines += [f"{key} -> {kept_key}" for key, kept_key in result.aliases]
+        for key, names in result.filled.items():
+            lines.append(f"Copied {', '.join(names)} into {key}")
+        for key, reason in result.skipped:
+            lines.append(f"Skipped group {key}: {reason}")
+        result_text = "\n".join(lines)
+        self.result_text.setPlainText(result_text)
+        self.show_custom_message("Merge Complete", result_text)
@@ -1,51 +1,226 @@
-from PyQt6.QtWidgets import QTextEdit, QPushButton, QVBoxLayout, QHBoxLayout, QSplitter
+from PyQt6.QtWidgets import QPlainTextEdit, QPushButton, QVBoxLayout, QHBoxLayout, QSplitter, QWidget, QLabel, QFileDialog
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+import re
+import threading
+import time
 import search_module
+import watcher
+from lookup_cache import get_lookup_cache, stats_delta
 from base_tab import BaseTab
-from PyQt6.QtGui import QTextCharFormat, QColor, QSyntaxHighlighter, QTextDocument
+from result_view import ResultView
+from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QSyntaxHighlighter, QTextBlockUserData
+
+# 引用键的查询状态
+KEY_PENDING = 'pending'
+KEY_RESOLVED = 'resolved'
+KEY_MISSING = 'missing'
+
+# 单行内的引用命令：\\cite、\\citep[..][..]{a,b}、\\autocite 等
+_CITE_PATTERN = re.compile(r'(\\[a-zA-Z]*(?i:cite)[a-zA-Z]*\*?)((?:\s*\[[^\]]*\]){0,2})\s*\{([^}]*)\}')
+_COMMAND_PATTERN = re.compile(r'\\[a-zA-Z@]+')
+_COMMENT_PATTERN = re.compile(r'(?<!\\)%.*')
+_KEY_PATTERN = re.compile(r'[^,\s]+')
+
+# 查询状态变化后，合并一段时间内的更新再重新着色
+STATUS_UPDATE_DELAY = 100
+
+
+class CitationBlockData(QTextBlockUserData):
+    """
+    记录一个文本块中出现的引用键，状态变化时只重新着色包含这些键的块。
+    """
+
+    def __init__(self, keys):
+        super().__init__()
+        self.keys = keys
+
 
 class LaTeXHighlighter(QSyntaxHighlighter):
+    """
+    LaTeX 语法着色：命令、注释，以及按查询状态（已找到 / 查询中 / 未找到）标记的引用键。
+    QSyntaxHighlighter 只会重新处理发生变化的文本块，每次按键的开销与文档长度无关。
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.dark_mode = False
+        self.key_status = {}
+        self._changed_keys = set()
+        self._status_timer = QTimer()
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(STATUS_UPDATE_DELAY)
+        self._status_timer.timeout.connect(self._rehighlight_changed_keys)
+        self._build_formats()
+
+    def _build_formats(self):
+        def make_format(color, bold=False, italic=False):
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            if bold:
+                text_format.setFontWeight(QFont.Weight.Bold)
+            text_format.setFontItalic(italic)
+            return text_format
+
+        if self.dark_mode:
+            self.formats = {
+                'text': make_format('#ffffff'),
+                'command': make_format('#82aaff'),
+                'cite': make_format('#c792ea', bold=True),
+                'comment': make_format('#7f8c8d', italic=True),
+                'key': make_format('#ffffff'),
+                KEY_PENDING: make_format('#ffcb6b'),
+                KEY_RESOLVED: make_format('#c3e88d'),
+                KEY_MISSING: make_format('#ff5370', bold=True),
+            }
+        else:
+            self.formats = {
+                'text': make_format('#000000'),
+                'command': make_format('#1f4e9e'),
+                'cite': make_format('#7b1fa2', bold=True),
+                'comment': make_format('#808080', italic=True),
+                'key': make_format('#000000'),
+                KEY_PENDING: make_format('#b36b00'),
+                KEY_RESOLVED: make_format('#2e7d32'),
+                KEY_MISSING: make_format('#c62828', bold=True),
+            }
+        for status in (KEY_PENDING, KEY_MISSING):
+            self.formats[status].setFontUnderline(True)
 
     def set_dark_mode(self, is_dark):
         self.dark_mode = is_dark
+        self._build_formats()
+        self.rehighlight()
+
+    def set_key_statuses(self, statuses):
+        """
+        替换全部引用键的状态（例如开始新的搜索时），重新着色整个文档。
+        """
+        self.key_status = dict(statuses)
+        self._changed_keys.clear()
         self.rehighlight()
 
+    def set_key_status(self, key, status):
+        """
+        更新单个引用键的状态。多次更新会被合并，只重新着色包含这些键的块。
+        """
+        if self.key_status.get(key) == status:
+            return
+        self.key_status[key] = status
+        self._changed_keys.add(key)
+        if not self._status_timer.isActive():
+            self._status_timer.start()
+
+    def _rehighlight_changed_keys(self):
+        changed, self._changed_keys = self._changed_keys, set()
+        document = self.document()
+        if document is None or not changed:
+            return
+        block = document.begin()
+        while block.isValid():
+            data = block.userData()
+            if data is not None and not changed.isdisjoint(data.keys):
+                self.rehighlightBlock(block)
+            block = block.next()
+
     def highlightBlock(self, text):
-        format = QTextCharFormat()
-        color = Qt.GlobalColor.white if self.dark_mode else Qt.GlobalColor.black
-        format.setForeground(color)
-        self.setFormat(0, len(text), format)
+        formats = self.formats
+        self.setFormat(0, len(text), formats['text'])
+
+        comment = _COMMENT_PATTERN.search(text)
+        code_end = comment.start() if comment else len(text)
+        for match in _COMMAND_PATTERN.finditer(text, 0, code_end):
+            self.setFormat(match.start(), match.end() - match.start(), formats['command'])
+
+        keys = set()
+        for match in _CITE_PATTERN.finditer(text, 0, code_end):
+            self.setFormat(match.start(1), match.end(1) - match.start(1), formats['cite'])
+            for key_match in _KEY_PATTERN.finditer(match.group(3)):
+                key = key_match.group(0)
+                keys.add(key)
+                key_format = formats.get(self.key_status.get(key), formats['key'])
+                self.setFormat(match.start(3) + key_match.start(), len(key), key_format)
+
+        if comment:
+            self.setFormat(comment.start(), len(text) - comment.start(), formats['comment'])
+
+        # 只在块中的键变化时更新用户数据
+        data = self.currentBlockUserData()
+        if keys:
+            if data is None or data.keys != keys:
+                self.setCurrentBlockUserData(CitationBlockData(keys))
+        elif data is not None:
+            self.setCurrentBlockUserData(None)
 
 
 class CombinedSearchThread(QThread):
     result_ready = pyqtSignal(str, list)
+    cache_stats = pyqtSignal(dict)
+    entry_ready = pyqtSignal(str, str)   # key, bibtex（未找到时为空字符串）
+    progress = pyqtSignal(int, int)      # 已完成数, 总数
+    sources_ready = pyqtSignal(int, int, int)  # 本地命中, 网络命中, 未找到
 
-    def __init__(self, citations):
+    def __init__(self, citations, max_workers=search_module.DEFAULT_MAX_WORKERS, library_path=None):
         super().__init__()
         self.citations = citations
+        self.max_workers = max_workers
+        self.library_path = library_path
+        self.cancel_event = threading.Event()
+        self.done = 0
+        self.total = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def on_result(self, key, bibtex):
+        self.done += 1
+        self.entry_ready.emit(key, bibtex or "")
+        self.progress.emit(self.done, self.total)
 
     def run(self):
-        search_result, not_found = search_module.get_bibtex_from_citations(self.citations)
-        self.result_ready.emit(search_result, not_found)
+        before = get_lookup_cache().stats()
+        self.total = len(set(search_module.extract_citation_keys(self.citations)))
+        self.progress.emit(0, self.total)
+        result = search_module.resolve_citations(
+            self.citations, max_workers=self.max_workers,
+            on_result=self.on_result, cancel_event=self.cancel_event,
+            library_path=self.library_path)
+        self.result_ready.emit(result.bibtex, result.not_found)
+        self.sources_ready.emit(len(result.local_hits), len(result.remote_hits), len(result.not_found))
+        self.cache_stats.emit(stats_delta(before, get_lookup_cache().stats()))
+
+class WatchThread(QThread):
+    synced = pyqtSignal(object)  # watcher.SyncResult
+    stopped = pyqtSignal(str)    # 使用的监视方式（inotify / polling）
+
+    def __init__(self, project_path, bib_path):
+        super().__init__()
+        self.watcher = watcher.ProjectWatcher(project_path, bib_path)
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
 
-class CustomTextEdit(QTextEdit):
+    def run(self):
+        backend = self.watcher.run(self.stop_event, on_sync=self.synced.emit)
+        self.stopped.emit(backend)
+
+class CustomTextEdit(QPlainTextEdit):
+    # QPlainTextEdit 按块布局，编辑文档开头时不需要重新布局整个文档
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setAcceptRichText(False)  # 只接受纯文本
         self.highlighter = LaTeXHighlighter(self.document())
         self.dark_mode = False
 
     def set_dark_mode(self, is_dark):
+        if is_dark == self.dark_mode and self.styleSheet():
+            return
         self.dark_mode = is_dark
         self.highlighter.set_dark_mode(is_dark)
         self.update_text_color()
 
     def update_text_color(self):
         color = Qt.GlobalColor.white if self.dark_mode else Qt.GlobalColor.black
-        self.setStyleSheet(f"QTextEdit {{ color: {color.name}; }}")
+        self.setStyleSheet(f"QPlainTextEdit {{ color: {color.name}; }}")
 
     def insertFromMimeData(self, source):
         if source.hasText():
@@ -53,9 +228,12 @@ class CustomTextEdit(QTextEdit):
         else:
             super().insertFromMimeData(source)
 
-    def keyPressEvent(self, event):
-        super().keyPressEvent(event)
-        self.highlighter.rehighlight()
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
 
 
 class CombinedTab(BaseTab):
@@ -68,6 +246,13 @@ class CombinedTab(BaseTab):
     def update_dark_mode(self, is_dark):
         self.citations_entry.set_dark_mode(is_dark)
 
+    def set_bibtex_path(self, path):
+        super().set_bibtex_path(path)
+        # 监视过程中选择了另一个 .bib 文件时，之后的引用写入新文件
+        if getattr(self, 'watch_thread', None) and self.watch_thread.isRunning() and path.endswith('.bib'):
+            self.watch_thread.watcher.set_bib_path(path)
+            self.progress_label.setText(f"Watching {self.watch_thread.watcher.root} -> {path}...")
+
     def setup_ui(self):
         self.citations_entry = CustomTextEdit()
         self.citations_entry.setPlaceholderText("Enter LaTeX citations")
@@ -76,14 +261,33 @@ class CombinedTab(BaseTab):
         self.search_button = QPushButton("Search")
         self.search_button.clicked.connect(self.search_citations)
 
-        self.result_text = QTextEdit()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_search)
+        self.cancel_button.setEnabled(False)
+
+        search_controls = QWidget()
+        search_layout = QHBoxLayout(search_controls)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        search_layout.addWidget(self.search_button)
+        search_layout.addWidget(self.cancel_button)
+
+        self.watch_button = QPushButton("Watch Project...")
+        self.watch_button.setToolTip("Append new citations of a LaTeX project to the selected BibTeX file as you write")
+        self.watch_button.clicked.connect(self.toggle_watch)
+        search_layout.addWidget(self.watch_button)
+
+        self.result_text = ResultView()
 
         splitter = QSplitter(Qt.Orientation.Vertical)
         splitter.addWidget(self.citations_entry)
-        splitter.addWidget(self.search_button)
+        splitter.addWidget(search_controls)
         splitter.addWidget(self.result_text)
         self.layout.addWidget(splitter)
 
+        self.progress_label = QLabel("")
+        self.layout.addWidget(self.progress_label)
+        self.layout.addWidget(self.setup_status_label())
+
         button_layout = QHBoxLayout()
         self.copy_button = self.setup_copy_button()
         button_layout.addWidget(self.copy_button)
@@ -96,16 +300,107 @@ class CombinedTab(BaseTab):
         
 
     def search_citations(self):
-        self.result_text.setPlainText("Searching...")
         citations = self.citations_entry.toPlainText()
+        # 结果逐条追加，搜索过程中即可复制或添加到 BibTeX 文件
+        self.result_text.clear()
+        self.not_found_entries = []
+        self.progress_label.setText("Searching...")
+        if self.status_label:
+            self.status_label.setText("")
+        self.search_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.search_started = time.monotonic()
+        highlighter = self.citations_entry.highlighter
+        highlighter.set_key_statuses(dict.fromkeys(search_module.extract_citation_keys(citations), KEY_PENDING))
 
-        self.search_thread = CombinedSearchThread(citations)
+        self.search_thread = CombinedSearchThread(citations, library_path=self.bibtex_file_path or None)
+        self.search_thread.entry_ready.connect(self.append_entry)
+        self.search_thread.progress.connect(self.update_progress)
         self.search_thread.result_ready.connect(self.update_result)
+        self.search_thread.cache_stats.connect(self.show_cache_stats)
+        self.search_thread.sources_ready.connect(self.show_sources)
         self.search_thread.start()
 
+    def cancel_search(self):
+        if getattr(self, 'search_thread', None) and self.search_thread.isRunning():
+            self.search_thread.cancel()
+            self.cancel_button.setEnabled(False)
+            self.progress_label.setText(self.progress_label.text() + " - cancelling...")
+
+    def append_entry(self, key, bibtex):
+        self.citations_entry.highlighter.set_key_status(key, KEY_RESOLVED if bibtex else KEY_MISSING)
+        if not bibtex:
+            self.not_found_entries.append(key)
+            return
+        self.result_text.append(bibtex)
+
+    def update_progress(self, done, total):
+        elapsed = time.monotonic() - self.search_started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        text = f"Resolved {done}/{total} keys"
+        if done:
+            text += f" - {rate:.1f} keys/s"
+            if done < total and rate > 0:
+                text += f" - ETA {format_duration((total - done) / rate)}"
+        self.progress_label.setText(text)
+
     def update_result(self, search_result, not_found):
+        cancelled = self.search_thread.cancel_event.is_set()
+        # 用按引用顺序排列的最终结果替换逐条追加的内容
         self.result_text.setPlainText(search_result)
         self.not_found_entries = not_found
+        if cancelled:
+            # 取消后未查询的键不再标记为查询中
+            highlighter = self.citations_entry.highlighter
+            highlighter.set_key_statuses({key: status for key, status in highlighter.key_status.items()
+                                          if status != KEY_PENDING})
+        self.search_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        elapsed = time.monotonic() - self.search_started
+        done, total = self.search_thread.done, self.search_thread.total
+        status = "Cancelled" if cancelled else "Finished"
+        self.progress_label.setText(f"{status}: resolved {done}/{total} keys in {format_duration(elapsed)}")
+
+    def show_sources(self, local_hits, remote_hits, misses):
+        self.progress_label.setText(self.progress_label.text() +
+                                    f" (local: {local_hits}, remote: {remote_hits}, not found: {misses})")
+
+    def toggle_watch(self):
+        if getattr(self, 'watch_thread', None) and self.watch_thread.isRunning():
+            self.watch_thread.stop()
+            self.watch_button.setEnabled(False)
+            return
+        if not self.bibtex_file_path:
+            self.show_custom_message("Error", "Please select a BibTeX file first.")
+            return
+        project_path = QFileDialog.getExistingDirectory(self, "Select LaTeX Project Directory")
+        if not project_path:
+            return
+        self.watch_thread = WatchThread(project_path, self.bibtex_file_path)
+        self.watch_thread.synced.connect(self.show_watch_result)
+        self.watch_thread.stopped.connect(self.watch_stopped)
+        self.watch_thread.start()
+        self.watch_button.setText("Stop Watching")
+        self.progress_label.setText(f"Watching {project_path}...")
+
+    def show_watch_result(self, result):
+        if not result.new_keys:
+            return
+        text = (f"Watch: {len(result.new_keys)} new keys, added {len(result.added)}, "
+                f"not found {len(result.not_found)} ({result.elapsed:.1f}s)")
+        if result.added:
+            text += f" - {', '.join(result.added[:5])}" + ("..." if len(result.added) > 5 else "")
+        self.progress_label.setText(text)
+
+    def stop_watch(self):
+        if getattr(self, 'watch_thread', None) and self.watch_thread.isRunning():
+            self.watch_thread.stop()
+            self.watch_thread.wait()
+
+    def watch_stopped(self, backend):
+        self.watch_button.setText("Watch Project...")
+        self.watch_button.setEnabled(True)
+        self.progress_label.setText(f"Stopped watching ({backend}).")
 
     def add_to_bibtex_file(self):
         super().add_to_bibtex_file()
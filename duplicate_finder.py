@@ -0,0 +1,173 @@
+import re
+import zlib
+from collections import namedtuple
+
+from bib_index import extract_fields, normalize_doi, normalize_eprint, normalize_title
+from bib_scanner import scan_bib_file
+
+# 用于查重的条目摘要；start / end 为在文件中的字节偏移
+DuplicateRecord = namedtuple('DuplicateRecord', ['key', 'start', 'end', 'doi', 'eprint', 'title', 'author', 'year'])
+
+# 每组重复条目：records 按在文件中出现的顺序排列，reasons 为判定依据
+DuplicateCluster = namedtuple('DuplicateCluster', ['records', 'reasons'])
+
+# MinHash / LSH 参数：24 个哈希分成 6 个 band，每个 band 4 行
+MINHASH_PERMUTATIONS = 24
+MINHASH_BANDS = 6
+# 近似标题需要达到的词集合 Jaccard 相似度
+TITLE_SIMILARITY_THRESHOLD = 0.8
+# 单个 LSH 桶中最多比较的条目数，避免大量相似的通用标题退化为两两比较
+MINHASH_MAX_BUCKET = 32
+
+_SURNAME_PATTERN = re.compile(r'[^a-z]')
+# 系列文章的编号（Paper I / Paper II、Part 2），只在这些词上不同的标题不是同一篇
+_SEQUENCE_WORD = re.compile(r'^(\d+|[ivxlc]+|part)$')
+
+
+def first_author_surname(author):
+    """
+    :return: 第一作者的姓（小写字母），支持 "Last, First" 和 "First Last" 两种写法
+    """
+    if not author:
+        return ''
+    first = re.split(r'\s+and\s+', author.strip(), maxsplit=1)[0]
+    if ',' in first:
+        surname = first.split(',', 1)[0]
+    else:
+        parts = first.split()
+        surname = parts[-1] if parts else ''
+    return _SURNAME_PATTERN.sub('', surname.lower())
+
+
+def read_duplicate_records(file_path):
+    """
+    流式读取 .bib 文件中每个条目的查重字段。
+    """
+    with open(file_path, 'rb') as file:
+        for record in scan_bib_file(file_path):
+            if not record.key:
+                continue
+            file.seek(record.start)
+            fields = extract_fields(file.read(record.end - record.start))
+            yield DuplicateRecord(
+                record.key, record.start, record.end,
+                normalize_doi(fields['doi']) if fields.get('doi') else None,
+                normalize_eprint(fields['eprint']) if fields.get('eprint') else None,
+                normalize_title(fields['title']) if fields.get('title') else None,
+                first_author_surname(fields.get('author')) or None,
+                fields.get('year', '').strip() or None)
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # 较早出现的条目作为根，合并时保留它
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+        return root_a
+
+
+def _minhash_signature(words):
+    encoded = [word.encode('utf-8') for word in words]
+    return tuple(min(zlib.crc32(word, seed) for word in encoded) for seed in range(MINHASH_PERMUTATIONS))
+
+
+def _differs_in_sequence(words, other_words):
+    return any(_SEQUENCE_WORD.match(word) for word in words ^ other_words)
+
+
+def find_duplicate_clusters(records, use_minhash=False):
+    """
+    通过分块索引（blocking）查找重复条目，时间复杂度接近线性。
+
+    以下任一条件相同即视为重复：ID（不区分大小写）、DOI、arXiv eprint、
+    规范化标题 + 第一作者 + 年份。use_minhash 为 True 时，再用 MinHash/LSH
+    找出标题几乎相同（词集合 Jaccard 相似度 >= TITLE_SIMILARITY_THRESHOLD）、
+    第一作者和年份一致的条目；标题差异包含编号（I / II、Part 2）时不视为重复。
+
+    :param records: DuplicateRecord 序列
+    :param use_minhash: 是否启用近似标题匹配
+    :return: DuplicateCluster 列表，按每组第一个条目在文件中的位置排序
+    """
+    records = list(records)
+    union_find = _UnionFind(len(records))
+    reasons = {}
+    blocks = {}
+
+    def link(position, block_key, reason):
+        other = blocks.setdefault(block_key, position)
+        if other != position:
+            root = union_find.union(other, position)
+            reasons.setdefault(root, set()).add(reason)
+
+    for position, record in enumerate(records):
+        link(position, ('id', record.key.lower()), 'id')
+        if record.doi:
+            link(position, ('doi', record.doi), 'doi')
+        if record.eprint:
+            link(position, ('eprint', record.eprint), 'eprint')
+        if record.title and record.author and record.year:
+            link(position, ('title', record.title, record.author, record.year), 'title+author+year')
+
+    if use_minhash:
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        word_sets = {}
+        buckets = {}
+        for position, record in enumerate(records):
+            if not record.title:
+                continue
+            words = frozenset(record.title.split())
+            if len(words) < 3:
+                continue
+            word_sets[position] = words
+            signature = _minhash_signature(words)
+            for band in range(MINHASH_BANDS):
+                bucket = buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), [])
+                if len(bucket) >= MINHASH_MAX_BUCKET:
+                    continue
+                # 同一个桶中只需与已有条目比较，并用精确 Jaccard 相似度确认
+                for other in bucket:
+                    if union_find.find(other) == union_find.find(position):
+                        continue
+                    if records[other].year != record.year or not record.author \
+                            or records[other].author != record.author:
+                        continue
+                    other_words = word_sets[other]
+                    similarity = len(words & other_words) / len(words | other_words)
+                    if similarity >= TITLE_SIMILARITY_THRESHOLD and not _differs_in_sequence(words, other_words):
+                        root = union_find.union(other, position)
+                        reasons.setdefault(root, set()).add('similar title')
+                bucket.append(position)
+
+    groups = {}
+    for position in range(len(records)):
+        groups.setdefault(union_find.find(position), []).append(position)
+
+    clusters = []
+    for root, members in sorted(groups.items()):
+        if len(members) < 2:
+            continue
+        cluster_reasons = set()
+        for member in members:
+            cluster_reasons |= reasons.get(member, set())
+        clusters.append(DuplicateCluster([records[member] for member in members], sorted(cluster_reasons)))
+    return clusters
+
+
+def find_duplicates_in_file(file_path, use_minhash=False):
+    """
+    :return: .bib 文件中的重复条目组（DuplicateCluster 列表）
+    """
+    return find_duplicate_clusters(read_duplicate_records(file_path), use_minhash=use_minhash)
@@ -0,0 +1,232 @@
+"""
+紧凑的内存条目存储。
+
+bibtexparser 为每个条目生成一个字典，字段名和字段值各是一个独立的 str 对象；
+大型库在合并、清理时同时保留多份列表和字典，内存占用是文件大小的数倍。
+
+Entry 使用 __slots__，字段名经过 intern 并在字段集合相同的条目之间共享同一个元组，
+字段值合并为一个 UTF-8 字节串，访问时才解码。EntryLibrary 只保存一份条目，
+另外维护小写键、DOI 和 arXiv ID 到位置的索引。
+"""
+import sys
+
+from bib_index import normalize_doi, normalize_eprint
+
+# 写出时每批转换为字典的条目数
+WRITE_BATCH_SIZE = 1000
+
+# 字段值之间的分隔符（BibTeX 文本中不应出现 NUL 字符）
+_SEPARATOR = '\x00'
+
+# 字段名元组 -> 共享的同一元组
+_FIELD_SETS = {}
+
+_MISSING = object()
+
+
+def intern_fields(names):
+    """
+    :param names: 字段名可迭代对象
+    :return: 字段名均已 intern 的元组，相同的字段集合返回同一个对象
+    """
+    names = tuple(sys.intern(name) for name in names)
+    return _FIELD_SETS.setdefault(names, names)
+
+
+class Entry:
+    """
+    一个 BibTeX 条目。可以像 bibtexparser 的条目字典一样用 entry['title']、entry.get('doi')、
+    entry['ID'] 和 entry['ENTRYTYPE'] 读取，但不能修改。
+    """
+
+    __slots__ = ('entry_type', 'key', '_names', '_values')
+
+    def __init__(self, entry_type, key, names, values):
+        self.entry_type = sys.intern(entry_type)
+        self.key = key
+        self._names = intern_fields(names)
+        self._values = _SEPARATOR.join(value.replace(_SEPARATOR, '') for value in values).encode('utf-8')
+
+    @classmethod
+    def from_dict(cls, entry):
+        """
+        :param entry: bibtexparser 的条目字典
+        """
+        names = [name for name in entry if name not in ('ID', 'ENTRYTYPE')]
+        return cls(entry['ENTRYTYPE'], entry['ID'], names, [str(entry[name]) for name in names])
+
+    @property
+    def fields(self):
+        return self._names
+
+    def values(self):
+        if not self._names:
+            return []
+        return self._values.decode('utf-8').split(_SEPARATOR)
+
+    def items(self):
+        return list(zip(self._names, self.values()))
+
+    def get(self, name, default=None):
+        if name == 'ID':
+            return self.key
+        if name == 'ENTRYTYPE':
+            return self.entry_type
+        try:
+            position = self._names.index(name)
+        except ValueError:
+            return default
+        return self.values()[position]
+
+    def __getitem__(self, name):
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return name in ('ID', 'ENTRYTYPE') or name in self._names
+
+    def to_dict(self):
+        """
+        :return: bibtexparser 的条目字典
+        """
+        entry = dict(self.items())
+        entry['ENTRYTYPE'] = self.entry_type
+        entry['ID'] = self.key
+        return entry
+
+    def __repr__(self):
+        return f"Entry({self.entry_type!r}, {self.key!r}, {len(self._names)} fields)"
+
+
+class EntryLibrary:
+    """
+    只保存一份条目的库，带小写键、DOI 和 arXiv ID 索引。
+    键不区分大小写且唯一；DOI 和 arXiv ID 索引指向第一次出现的条目。
+    """
+
+    def __init__(self, entries=()):
+        self._entries = []
+        self.keys = {}
+        self.dois = {}
+        self.eprints = {}
+        for entry in entries:
+            self.add(entry)
+
+    @staticmethod
+    def _lookup_values(entry):
+        """
+        :return: (规范化的 DOI, 规范化的 arXiv ID)，缺少时为 None
+        """
+        doi = entry.get('doi')
+        eprint = entry.get('eprint') or entry.get('arxiv')
+        return normalize_doi(doi) if doi else None, normalize_eprint(eprint) if eprint else None
+
+    def _add_lookup(self, position):
+        doi, eprint = self._lookup_values(self._entries[position])
+        if doi:
+            self.dois.setdefault(doi, position)
+        if eprint:
+            self.eprints.setdefault(eprint, position)
+
+    def _replace_lookup(self, position, old_entry):
+        """
+        位置 position 的条目被替换后更新 DOI 和 arXiv ID 索引：旧条目的值不再指向该位置，
+        若仍有其他条目使用则改为指向其中第一个；新条目的值指向第一次出现的位置。
+        """
+        old_values = self._lookup_values(old_entry)
+        new_values = self._lookup_values(self._entries[position])
+        for index, lookup in enumerate((self.dois, self.eprints)):
+            old, new = old_values[index], new_values[index]
+            if old and old != new and lookup.get(old) == position:
+                del lookup[old]
+                for other, entry in enumerate(self._entries):
+                    if self._lookup_values(entry)[index] == old:
+                        lookup[old] = other
+                        break
+            if new and lookup.get(new, position) >= position:
+                lookup[new] = position
+
+    def _rebuild_lookups(self):
+        self.keys = {}
+        self.dois = {}
+        self.eprints = {}
+        for position, entry in enumerate(self._entries):
+            self.keys.setdefault(entry.key.lower(), position)
+            self._add_lookup(position)
+
+    def add(self, entry, replace=False):
+        """
+        :param entry: Entry 或 bibtexparser 的条目字典
+        :param replace: 键已存在时是否用新条目替换（位置不变）
+        :return: 键此前是否不存在
+        """
+        if isinstance(entry, dict):
+            entry = Entry.from_dict(entry)
+        lower_key = entry.key.lower()
+        position = self.keys.get(lower_key)
+        if position is not None:
+            if replace:
+                old_entry = self._entries[position]
+                self._entries[position] = entry
+                self._replace_lookup(position, old_entry)
+            return False
+        self.keys[lower_key] = len(self._entries)
+        self._entries.append(entry)
+        self._add_lookup(len(self._entries) - 1)
+        return True
+
+    def get(self, key):
+        position = self.keys.get(key.lower())
+        return self._entries[position] if position is not None else None
+
+    def find_doi(self, doi):
+        position = self.dois.get(normalize_doi(doi))
+        return self._entries[position] if position is not None else None
+
+    def find_eprint(self, eprint):
+        position = self.eprints.get(normalize_eprint(eprint))
+        return self._entries[position] if position is not None else None
+
+    def __contains__(self, key):
+        return key.lower() in self.keys
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def sort(self, fields=('ID',)):
+        """
+        按与 BibTexWriter.order_entries_by 相同的规则（字段值转小写）排序。
+        """
+        self._entries.sort(key=lambda entry: tuple(str(entry.get(field, '')).lower() for field in fields))
+        self._rebuild_lookups()
+
+    def to_bibtex(self, writer, header=None, batch_size=WRITE_BATCH_SIZE):
+        """
+        用 BibTexWriter 写出，结果与 writer.write 写出包含相同条目的 BibDatabase 相同
+        （不支持 align_values）。每次只把一批条目转换为字典，避免同时保留所有字典。
+
+        :param writer: BibTexWriter，会按其 order_entries_by 对库排序
+        :param header: 提供 @comment、@preamble 和 @string 的 BibDatabase，不应包含条目
+        :return: BibTeX 文本
+        """
+        from bibtexparser.bibdatabase import BibDatabase
+        if writer.order_entries_by:
+            self.sort(writer.order_entries_by)
+        text = writer.write(header) if header is not None else ''
+        order_entries_by = writer.order_entries_by
+        writer.order_entries_by = None
+        try:
+            parts = []
+            for start in range(0, len(self._entries), batch_size):
+                database = BibDatabase()
+                database.entries = [entry.to_dict() for entry in self._entries[start:start + batch_size]]
+                # 只含条目的 BibDatabase 写出的就是条目部分
+                parts.append(writer.write(database))
+        finally:
+            writer.order_entries_by = order_entries_by
+        return text + writer.entry_separator.join(parts)
@@ -0,0 +1,150 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+
+
+class HostStats:
+    """
+    单个主机的请求延迟统计。
+    """
+
+    __slots__ = ('requests', 'errors', 'total_time', 'min_time', 'max_time')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = 0.0
+
+    def record(self, elapsed, error=False):
+        self.requests += 1
+        if error:
+            self.errors += 1
+        self.total_time += elapsed
+        self.min_time = elapsed if self.min_time is None else min(self.min_time, elapsed)
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_latency': self.total_time / self.requests if self.requests else 0.0,
+            'min_latency': self.min_time or 0.0,
+            'max_latency': self.max_time,
+        }
+
+
+class HttpSession:
+    """
+    线程安全的共享 HTTP 会话：保持连接（keep-alive）、连接池、超时与带退避的重试。
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._session = None
+        self.configure(pool_size=pool_size, connect_timeout=connect_timeout, read_timeout=read_timeout,
+                       retries=retries, backoff=backoff)
+
+    def configure(self, pool_size=None, connect_timeout=None, read_timeout=None, retries=None, backoff=None):
+        """
+        修改连接池大小、超时和重试参数。会重建底层会话。
+        """
+        with self._lock:
+            if pool_size is not None:
+                self.pool_size = pool_size
+            if connect_timeout is not None:
+                self.connect_timeout = connect_timeout
+            if read_timeout is not None:
+                self.read_timeout = read_timeout
+            if retries is not None:
+                self.retries = retries
+            if backoff is not None:
+                self.backoff = backoff
+            old_session = self._session
+            self._session = self._build_session()
+        if old_session is not None:
+            old_session.close()
+
+    def _build_session(self):
+        # requests 在首次创建会话时才导入
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # 429 不自动重试，直接交给调用方的限速器处理。urllib3 默认会对带 Retry-After 的
+        # 429 / 503 等待后重试，因此需要关闭 respect_retry_after_header
+        retry = Retry(total=self.retries, connect=self.retries, read=self.retries,
+                      backoff_factor=self.backoff, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET', 'HEAD']), raise_on_status=False,
+                      respect_retry_after_header=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """
+        发送 GET 请求并记录该主机的延迟。参数与 requests.get 相同，
+        timeout 默认为 (connect_timeout, read_timeout)。
+        """
+        import requests
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        session = self._session
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self._record(host, time.perf_counter() - start, error=True)
+            raise
+        self._record(host, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def _record(self, host, elapsed, error=False):
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = HostStats()
+            stats.record(elapsed, error)
+
+    def host_stats(self):
+        """
+        :return: {host: {'requests', 'errors', 'avg_latency', 'min_latency', 'max_latency'}}
+        """
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        with self._lock:
+            self._session.close()
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    返回全局共享的 HTTP 会话（首次调用时创建）。
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = HttpSession()
+        return _default_session
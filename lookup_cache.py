@@ -0,0 +1,197 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# 默认缓存位置：~/.bibtexmanager/lookup_cache.sqlite3
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.bibtexmanager', 'lookup_cache.sqlite3')
+
+DEFAULT_TTL = 30 * 24 * 3600          # 找到的结果保留 30 天
+DEFAULT_NEGATIVE_TTL = 24 * 3600      # "未找到" 的结果只保留 1 天
+DEFAULT_MAX_ENTRIES = 20000
+
+# 查询类型
+KIND_TITLE = 'title'
+KIND_TEXKEY = 'texkey'
+KIND_ARXIV = 'arxiv'
+
+
+def normalize_query(kind, query):
+    """
+    规范化查询字符串，使同一查询的不同写法命中同一条缓存。
+
+    :param kind: 查询类型（title / texkey / arxiv）
+    :param query: 原始查询
+    :return: 规范化后的查询
+    """
+    query = query.strip()
+    if kind == KIND_ARXIV:
+        query = re.sub(r'^arxiv:', '', query, flags=re.IGNORECASE)
+        return re.sub(r'v\d+$', '', query).lower()
+    if kind == KIND_TITLE:
+        query = re.sub(r'[{}]', '', query)
+        return re.sub(r'\s+', ' ', query).lower().rstrip('.')
+    return query.lower()
+
+
+class LookupCache:
+    """
+    基于 SQLite 的查询结果持久缓存，支持 TTL、LRU 淘汰和"未找到"的负缓存。
+    可以在多个线程间共享。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, enabled=True):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._conn = self._connect(path)
+
+    def _connect(self, path):
+        try:
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+        except (OSError, sqlite3.Error) as e:
+            # 无法写入磁盘时退回内存缓存
+            print(f"Error opening lookup cache {path}: {e}")
+            conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                kind TEXT NOT NULL,
+                query TEXT NOT NULL,
+                value TEXT,
+                expires REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (kind, query)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS lookups_last_access ON lookups (last_access)")
+        conn.commit()
+        return conn
+
+    def get(self, kind, query):
+        """
+        :return: (是否命中, bibtex)；负缓存命中时返回 (True, None)
+        """
+        if not self.enabled:
+            return False, None
+        key = normalize_query(kind, query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM lookups WHERE kind = ? AND query = ?", (kind, key)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM lookups WHERE kind = ? AND query = ?", (kind, key))
+                    self._conn.commit()
+                self._misses += 1
+                return False, None
+            self._conn.execute(
+                "UPDATE lookups SET last_access = ? WHERE kind = ? AND query = ?", (now, kind, key))
+            self._conn.commit()
+            if row[0] is None:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return True, row[0]
+
+    def set(self, kind, query, value, ttl=None):
+        """
+        写入一条缓存。value 为 None 时作为"未找到"的负缓存，使用 negative_ttl。
+        """
+        if not self.enabled:
+            return
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        key = normalize_query(kind, query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (kind, query, value, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, value, now + ttl, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM lookups WHERE rowid IN "
+                "(SELECT rowid FROM lookups ORDER BY last_access LIMIT ?)", (excess,))
+
+    def invalidate(self, kind=None, query=None):
+        """
+        删除缓存条目。不带参数时清空全部缓存。
+        """
+        with self._lock:
+            if kind is None:
+                self._conn.execute("DELETE FROM lookups")
+            elif query is None:
+                self._conn.execute("DELETE FROM lookups WHERE kind = ?", (kind,))
+            else:
+                self._conn.execute("DELETE FROM lookups WHERE kind = ? AND query = ?",
+                                   (kind, normalize_query(kind, query)))
+            self._conn.commit()
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'negative_hits': self._negative_hits,
+                'misses': self._misses,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_enabled = True
+_default_cache_lock = threading.Lock()
+
+
+def get_lookup_cache():
+    """
+    返回全局共享的缓存实例（首次调用时创建）。
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LookupCache(enabled=_default_cache_enabled)
+        return _default_cache
+
+
+def set_cache_enabled(enabled):
+    """
+    启用或停用全局缓存；缓存尚未创建时不会打开数据库。
+    """
+    global _default_cache_enabled
+    with _default_cache_lock:
+        _default_cache_enabled = enabled
+        if _default_cache is not None:
+            _default_cache.enabled = enabled
+
+
+def stats_delta(before, after):
+    """
+    计算两次 stats() 快照之间的差值，用于报告单次搜索的命中情况。
+    """
+    return {name: after[name] - before.get(name, 0) for name in after}
+
+
+def format_stats(stats):
+    hits = stats['hits'] + stats['negative_hits']
+    return f"Cache: {hits} hits ({stats['negative_hits']} not found), {stats['misses']} misses"
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+from bib_index import normalize_doi, normalize_eprint
+from bib_scanner import scan_bib_file
+from parallel_parser import map_in_order
+from perf_trace import trace_span
+
+# 每个解析任务包含的条目数
+MERGE_CHUNK_SIZE = 500
+
+# 合并统计：entries_per_second 为整个流程的吞吐量
+MergeStats = namedtuple('MergeStats', ['inputs', 'entries_read', 'entries_written', 'duplicates', 'conflicts',
+                                       'parse_errors', 'elapsed', 'entries_per_second'])
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def iter_chunks(paths, chunk_size=MERGE_CHUNK_SIZE):
+    """
+    流式读取各文件的原始条目并分块。每块附带该文件中在此之前定义的 @string，
+    使各块可以独立解析。
+
+    :return: (path, strings, content, entry_count, preambles) 生成器
+    """
+    for path in paths:
+        strings = []
+        chunk = []
+        preambles = []
+        with open(path, 'rb') as file:
+            for record in scan_bib_file(path):
+                file.seek(record.start)
+                text = file.read(record.end - record.start).decode('utf-8', 'replace')
+                if record.entry_type == 'string':
+                    strings.append(text)
+                elif record.entry_type == 'preamble':
+                    preambles.append(text.strip())
+                elif record.key:
+                    chunk.append(text)
+                    if len(chunk) >= chunk_size:
+                        yield path, ''.join(strings), ''.join(chunk), len(chunk), preambles
+                        chunk = []
+                        preambles = []
+        if chunk or preambles:
+            yield path, ''.join(strings), ''.join(chunk), len(chunk), preambles
+
+
+def _strip_outer_braces(value):
+    """
+    去掉包住整个值的一对括号，如 {{Dark Energy}} -> {Dark Energy}；
+    {A} and {B} 这样首尾括号不配对的值保持不变。
+    """
+    if len(value) < 2 or value[0] != '{' or value[-1] != '}':
+        return value
+    depth = 0
+    for position, char in enumerate(value):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0 and position < len(value) - 1:
+                return value
+    return value[1:-1] if depth == 0 else value
+
+
+def normalize_entry(entry):
+    """
+    规范化单个条目：类型小写、合并空白、去掉空字段和标题外层的一对括号。
+    DOI 与 arXiv ID 原样保留，只在去重时规范化。
+    """
+    normalized = {}
+    for name, value in entry.items():
+        if name in ('ID', 'ENTRYTYPE'):
+            continue
+        value = _WHITESPACE.sub(' ', value).strip()
+        if not value:
+            continue
+        if name == 'title':
+            value = _strip_outer_braces(value)
+        normalized[name] = value
+    normalized['ENTRYTYPE'] = entry['ENTRYTYPE'].lower()
+    normalized['ID'] = entry['ID'].strip()
+    return normalized
+
+
+def parse_chunk(task):
+    """
+    解析一个块（在工作进程中运行）。
+
+    :return: (path, 规范化后的条目列表, 解析失败的条目数, preambles)
+    """
+    from search_module import get_entries_from_content
+    path, strings, content, entry_count, preambles = task
+    # 已在工作进程中，不再嵌套进程池
+    entries = get_entries_from_content(strings + content, jobs=1) if content else []
+    return path, [normalize_entry(entry) for entry in entries], max(0, entry_count - len(entries)), preambles
+
+
+def _dedupe_keys(entry):
+    """
+    :return: (规范化的 DOI, 规范化的 arXiv ID)，缺少时为 None
+    """
+    doi = entry.get('doi')
+    eprint = entry.get('eprint') or entry.get('arxiv')
+    return normalize_doi(doi) if doi else None, normalize_eprint(eprint) if eprint else None
+
+
+def _digest_value(name, value):
+    # DOI 和 arXiv ID 只是写法不同（前缀、大小写、版本号）时仍视为相同内容
+    if name == 'doi':
+        return normalize_doi(value)
+    if name in ('eprint', 'arxiv'):
+        return normalize_eprint(value)
+    return value
+
+
+def _entry_digest(entry):
+    fields = sorted((name, _digest_value(name, value)) for name, value in entry.items() if name != 'ID')
+    return hashlib.sha1(json.dumps(fields).encode('utf-8')).digest()
+
+
+def merge_bib_files(inputs, output, report_path=None, jobs=None, chunk_size=MERGE_CHUNK_SIZE,
+                    progress_callback=None):
+    """
+    流式合并多个 .bib 文件：分块读取 -> 解析（可多进程）-> 规范化 -> 去重 -> 写入。
+    内存中只保留去重用的键、DOI、arXiv ID 和少量待处理的块，与输入总大小无关。
+
+    每个条目保留第一次出现的版本（按输入文件顺序）：
+
+    - 键相同（不区分大小写）且内容相同：视为重复，直接跳过
+    - 键相同但内容不同：冲突，保留先出现的版本并写入冲突报告
+    - 键不同但 DOI 或 arXiv ID 相同：同一文献的不同键，跳过并写入报告
+
+    输出先写入同目录下的临时文件，完成后原子地替换，输出文件也可以是输入之一。
+
+    :param inputs: 输入 .bib 文件列表
+    :param output: 合并后的 .bib 文件
+    :param report_path: 冲突报告（JSON Lines），None 表示不写报告
+    :param jobs: 解析进程数，默认为 CPU 核数；1 表示在当前进程中解析
+    :param chunk_size: 每个解析任务的条目数
+    :param progress_callback: progress_callback(已读取条目数, 已写入条目数, 已用秒数)
+    :return: MergeStats
+    """
+    with trace_span('merge_bib_files') as span:
+        span['bytes'] = sum(os.path.getsize(path) for path in inputs)
+        stats = _merge_bib_files(inputs, output, report_path, jobs, chunk_size, progress_callback)
+        span['entries'] = stats.entries_read
+        span['written'] = stats.entries_written
+        return stats
+
+
+def _merge_bib_files(inputs, output, report_path, jobs, chunk_size, progress_callback):
+    from search_module import _make_writer
+    from bibtexparser.bibdatabase import BibDatabase
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    start = time.monotonic()
+    writer = _make_writer()
+    # 保持输入顺序，不按 ID 排序
+    writer.order_entries_by = None
+
+    seen_ids = {}      # 小写键 -> (内容摘要, 文件, 键)
+    seen_dois = {}     # DOI -> (文件, 键)
+    seen_eprints = {}  # arXiv ID -> (文件, 键)
+    preambles = {}
+    entries_read = entries_written = duplicates = conflicts = parse_errors = 0
+
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.bib.tmp', dir=directory)
+    report = open(report_path, 'w', encoding='utf-8') if report_path else None
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as target:
+            chunks = map_in_order(parse_chunk, iter_chunks(inputs, chunk_size), jobs)
+            for path, entries, errors, chunk_preambles in chunks:
+                parse_errors += errors
+                for preamble in chunk_preambles:
+                    preambles.setdefault(preamble, None)
+                kept = []
+                for entry in entries:
+                    entries_read += 1
+                    key = entry['ID']
+                    digest = _entry_digest(entry)
+                    problem = None
+                    doi, eprint = _dedupe_keys(entry)
+                    existing = seen_ids.get(key.lower())
+                    if existing is not None:
+                        if existing[0] == digest:
+                            duplicates += 1
+                            continue
+                        problem = ('key-conflict', existing[1], existing[2])
+                    elif doi and doi in seen_dois:
+                        problem = ('same-doi',) + seen_dois[doi]
+                    elif eprint and eprint in seen_eprints:
+                        problem = ('same-eprint',) + seen_eprints[eprint]
+
+                    if problem:
+                        if problem[0] == 'key-conflict':
+                            conflicts += 1
+                        else:
+                            duplicates += 1
+                        if report:
+                            kind, kept_file, kept_key = problem
+                            report.write(json.dumps({'type': kind, 'key': key, 'file': path,
+                                                     'kept_key': kept_key, 'kept_file': kept_file},
+                                                    ensure_ascii=False) + '\n')
+                        continue
+
+                    seen_ids[key.lower()] = (digest, path, key)
+                    if doi:
+                        seen_dois.setdefault(doi, (path, key))
+                    if eprint:
+                        seen_eprints.setdefault(eprint, (path, key))
+                    kept.append(entry)
+
+                if kept:
+                    database = BibDatabase()
+                    database.entries = kept
+                    if entries_written:
+                        target.write('\n')
+                    target.write(writer.write(database).strip() + '\n')
+                    entries_written += len(kept)
+                if progress_callback:
+                    progress_callback(entries_read, entries_written, time.monotonic() - start)
+
+            for preamble in preambles:
+                target.write('\n' + preamble + '\n')
+            target.flush()
+            os.fsync(target.fileno())
+        if os.path.exists(output):
+            shutil.copymode(output, tmp_path)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    finally:
+        if report:
+            report.close()
+
+    elapsed = time.monotonic() - start
+    return MergeStats(len(inputs), entries_read, entries_written, duplicates, conflicts, parse_errors,
+                      elapsed, entries_read / elapsed if elapsed > 0 else 0.0)
+
+
+def format_merge_stats(stats):
+    return (f"Merged {stats.inputs} files: read {stats.entries_read} entries, wrote {stats.entries_written}, "
+            f"{stats.duplicates} duplicates, {stats.conflicts} conflicts, {stats.parse_errors} unparsable "
+            f"in {stats.elapsed:.2f}s ({stats.entries_per_second:.0f} entries/s)")
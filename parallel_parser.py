@@ -0,0 +1,153 @@
+"""
+多进程 BibTeX 解析：按条目边界把文本切成若干块，在进程池中并行调用 bibtexparser，
+再按原始顺序合并结果。每块前附带此前定义的 @string，使各块可以独立解析。
+
+jobs 为 1 时在当前进程中逐块解析；条目较少时整体解析。结果与 bibtexparser.loads 一致。
+"""
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from bib_scanner import scan_bib_content
+from perf_trace import trace_span
+
+# 每个解析任务包含的条目数
+PARSE_CHUNK_SIZE = 1000
+
+# 小于该大小的文本不扫描、不分块，整体解析
+CHUNKED_PARSE_MIN_BYTES = 256 * 1024
+
+# 一个块的解析结果
+ParsedChunk = namedtuple('ParsedChunk', ['entries', 'strings', 'preambles', 'comments'])
+
+
+def split_bib_content(content, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    按条目边界切分 BibTeX 文本。@string、@preamble、@comment 留在原来的块中，
+    并把之前各块定义的 @string 附在块前。
+
+    :param content: BibTeX 文本
+    :param chunk_size: 每块的条目数
+    :return: (前置 @string 文本, 块文本) 列表
+    """
+    chunks = []
+    strings = []
+    chunk_strings = []
+    chunk_start = 0
+    entry_count = 0
+    prefix = ''
+    for record in scan_bib_content(content):
+        if record.entry_type == 'string':
+            chunk_strings.append(content[record.start:record.end])
+        elif record.key:
+            if entry_count >= chunk_size:
+                chunks.append((prefix, content[chunk_start:record.start]))
+                strings.extend(chunk_strings)
+                chunk_strings = []
+                prefix = ''.join(strings)
+                chunk_start = record.start
+                entry_count = 0
+            entry_count += 1
+    if chunk_start < len(content) or not chunks:
+        chunks.append((prefix, content[chunk_start:]))
+    return chunks
+
+
+def parse_chunk(task):
+    """
+    解析一个块（在工作进程中运行）。
+
+    :param task: (前置 @string 文本, 块文本, ignore_nonstandard_types)
+    :return: ParsedChunk
+    """
+    import bibtexparser
+    from bibtexparser.bparser import BibTexParser
+    prefix, content, ignore_nonstandard_types = task
+    parser = BibTexParser()
+    parser.expect_multiple_parse = True
+    parser.ignore_nonstandard_types = ignore_nonstandard_types
+    database = bibtexparser.loads(prefix + content, parser)
+    # 前置的 @string 只用于展开宏，@preamble 和 @comment 只来自块本身
+    return ParsedChunk(database.entries, dict(database.strings), database.preambles, database.comments)
+
+
+def map_in_order(func, tasks, jobs):
+    """
+    在进程池中执行 func 并按输入顺序返回结果。最多同时有 2 * jobs 个任务在处理中，
+    保证内存有界；jobs <= 1 时在当前进程中依次执行。
+
+    :param func: 可被 pickle 的模块级函数
+    :param tasks: 任务可迭代对象
+    :param jobs: 进程数
+    :return: 结果生成器
+    """
+    if jobs <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        window = deque()
+        for task in tasks:
+            window.append(executor.submit(func, task))
+            if len(window) >= jobs * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def iter_parsed_chunks(content, jobs=None, chunk_size=PARSE_CHUNK_SIZE, ignore_nonstandard_types=False):
+    """
+    分块解析 BibTeX 文本，按原始顺序逐块返回结果。调用方可以边解析边处理，
+    不必同时保留所有条目字典。
+
+    :param content: BibTeX 文本
+    :param jobs: 解析进程数，默认为 CPU 核数；1 表示在当前进程中逐块解析
+    :param chunk_size: 每个解析任务的条目数
+    :param ignore_nonstandard_types: 与 BibTexParser 的同名选项相同
+    :return: ParsedChunk 生成器
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if len(content) < CHUNKED_PARSE_MIN_BYTES:
+        chunks = [('', content)]
+    else:
+        chunks = split_bib_content(content, chunk_size)
+    jobs = min(jobs, len(chunks))
+
+    with trace_span('parse_bib_content') as span:
+        span['bytes'] = len(content)
+        span['chunks'] = len(chunks)
+        span['jobs'] = jobs
+        entry_count = 0
+        tasks = ((prefix, text, ignore_nonstandard_types) for prefix, text in chunks)
+        for parsed in map_in_order(parse_chunk, tasks, jobs):
+            entry_count += len(parsed.entries)
+            yield parsed
+        span['entries'] = entry_count
+
+
+def parse_bib_content(content, jobs=None, chunk_size=PARSE_CHUNK_SIZE, ignore_nonstandard_types=False):
+    """
+    解析 BibTeX 文本，条目较多时使用多进程。
+
+    :param content: BibTeX 文本
+    :param jobs: 解析进程数，默认为 CPU 核数；1 表示在当前进程中解析
+    :param chunk_size: 每个解析任务的条目数
+    :param ignore_nonstandard_types: 与 BibTexParser 的同名选项相同
+    :return: BibDatabase，条目、@string、@preamble 和 @comment 保持原始顺序
+    """
+    from bibtexparser.bibdatabase import BibDatabase
+    database = BibDatabase()
+    for parsed in iter_parsed_chunks(content, jobs, chunk_size, ignore_nonstandard_types):
+        add_chunk_header(database, parsed)
+        database.entries.extend(parsed.entries)
+    return database
+
+
+def add_chunk_header(database, parsed):
+    """
+    把一个块中的 @string、@preamble 和 @comment 加入 BibDatabase。
+    """
+    database.strings.update(parsed.strings)
+    database.preambles.extend(parsed.preambles)
+    database.comments.extend(parsed.comments)
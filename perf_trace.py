@@ -0,0 +1,217 @@
+"""
+轻量的性能追踪：记录查询、合并、清理等操作每次调用的耗时和属性（后端、是否命中缓存、
+传输字节数、条目数），可导出为 JSON Lines 或 Chrome trace（chrome://tracing、Perfetto）。
+
+    with trace_span('search_inspire', backend='inspire') as span:
+        ...
+        span['bytes'] = len(response.content)
+
+设置环境变量 BIBTEXMANAGER_TRACE=trace.json（或 .jsonl）时，退出前自动导出。
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# 内存中最多保留的记录数，超出后丢弃最早的记录
+MAX_SPANS = 20000
+
+TRACE_ENV_VAR = 'BIBTEXMANAGER_TRACE'
+
+# 一次调用：start 为 Unix 时间（秒），duration 为秒，attrs 为属性字典
+Span = namedtuple('Span', ['name', 'start', 'duration', 'thread', 'attrs'])
+
+# 一组调用的统计，耗时单位为秒
+SpanStats = namedtuple('SpanStats', ['name', 'backend', 'count', 'errors', 'p50', 'p95', 'max', 'total',
+                                     'cache_hits', 'bytes', 'entries'])
+
+
+def percentile(sorted_values, fraction):
+    """
+    最近秩法计算百分位数。
+
+    :param sorted_values: 已排序的数值列表
+    :param fraction: 0 到 1 之间
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-fraction * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class _ActiveSpan:
+    """
+    with 语句使用的计时器，进入时返回可修改的属性字典。
+    """
+
+    __slots__ = ('tracer', 'name', 'attrs', 'start', 'wall_start')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.tracer._stack().append(self.attrs)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs.setdefault('error', exc_type.__name__)
+        self.tracer.record(Span(self.name, self.wall_start, duration, threading.get_ident(), self.attrs))
+        return False
+
+
+class _DisabledSpan:
+    __slots__ = ('attrs',)
+
+    def __init__(self):
+        self.attrs = {}
+
+    def __enter__(self):
+        return self.attrs
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Tracer:
+    """
+    线程安全的调用记录器，记录保存在固定大小的环形缓冲区中。
+    """
+
+    def __init__(self, max_spans=MAX_SPANS):
+        self.enabled = True
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        """
+        :return: 上下文管理器，进入时返回属性字典，退出时记录耗时
+        """
+        if not self.enabled:
+            return _DisabledSpan()
+        return _ActiveSpan(self, name, attrs)
+
+    def annotate(self, **attrs):
+        """
+        给当前线程中最内层的 span 添加属性，供不直接持有 span 的下层函数使用。
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack[-1].update(attrs)
+
+    def record(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self):
+        """
+        按（操作, 后端）分组统计。
+
+        :return: SpanStats 列表，按操作名和后端排序
+        """
+        groups = {}
+        for span in self.spans():
+            groups.setdefault((span.name, span.attrs.get('backend') or ''), []).append(span)
+        stats = []
+        for (name, backend), spans in sorted(groups.items()):
+            durations = sorted(span.duration for span in spans)
+            stats.append(SpanStats(
+                name, backend, len(spans),
+                sum(1 for span in spans if 'error' in span.attrs),
+                percentile(durations, 0.5), percentile(durations, 0.95), durations[-1], sum(durations),
+                sum(1 for span in spans if span.attrs.get('cache_hit')),
+                sum(span.attrs.get('bytes') or 0 for span in spans),
+                sum(span.attrs.get('entries') or 0 for span in spans)))
+        return stats
+
+    def export_jsonl(self, path):
+        """
+        每行一个调用：{"name", "start", "duration_ms", "thread", 属性...}
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            for span in self.spans():
+                record = {'name': span.name, 'start': span.start, 'duration_ms': span.duration * 1000,
+                          'thread': span.thread}
+                record.update(span.attrs)
+                file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def export_chrome_trace(self, path):
+        """
+        导出为 Chrome trace event 格式（完整事件 "X"），可在 chrome://tracing 或 Perfetto 中打开。
+        """
+        pid = os.getpid()
+        events = [{'name': span.name, 'cat': span.attrs.get('backend') or 'app', 'ph': 'X',
+                   'ts': span.start * 1e6, 'dur': span.duration * 1e6, 'pid': pid, 'tid': span.thread,
+                   'args': span.attrs}
+                  for span in self.spans()]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False, default=str)
+
+    def export(self, path):
+        """
+        按扩展名选择格式：.jsonl 为 JSON Lines，其他为 Chrome trace。
+        """
+        if path.endswith('.jsonl'):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome_trace(path)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def trace_span(name, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+def annotate(**attrs):
+    _tracer.annotate(**attrs)
+
+
+def format_summary(stats):
+    lines = [f"{'operation':<24} {'backend':<10} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+             f"{'cache':>6} {'bytes':>10} {'entries':>8}"]
+    for row in stats:
+        lines.append(f"{row.name:<24} {row.backend:<10} {row.count:>6} {row.p50 * 1000:>9.1f} "
+                     f"{row.p95 * 1000:>9.1f} {row.max * 1000:>9.1f} {row.cache_hits:>6} {row.bytes:>10} "
+                     f"{row.entries:>8}")
+    return "\n".join(lines)
+
+
+def _export_at_exit():
+    path = os.environ.get(TRACE_ENV_VAR)
+    if path and _tracer.spans():
+        try:
+            _tracer.export(path)
+        except OSError as e:
+            print(f"Error writing trace to {path}: {e}")
+
+
+atexit.register(_export_at_exit)
@@ -0,0 +1,105 @@
+from PyQt6.QtWidgets import (QPushButton, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog,
+                             QCheckBox, QAbstractItemView)
+from PyQt6.QtCore import Qt, QTimer
+from base_tab import BaseTab
+from perf_trace import get_tracer
+
+# 面板可见时自动刷新的间隔（毫秒）
+REFRESH_INTERVAL = 2000
+
+COLUMNS = ["Operation", "Backend", "Calls", "Errors", "p50 (ms)", "p95 (ms)", "Max (ms)", "Cache Hits", "Bytes",
+           "Entries"]
+
+
+class PerformanceTab(BaseTab):
+    """
+    按操作和后端显示调用耗时的 p50 / p95，并导出追踪记录。
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.tracer = get_tracer()
+        self.setup_ui()
+        # 只在面板可见时刷新，不在后台定期唤醒
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.layout.addWidget(self.table)
+
+        self.layout.addWidget(self.setup_status_label())
+
+        button_layout = QHBoxLayout()
+        self.enabled_checkbox = QCheckBox("Record")
+        self.enabled_checkbox.setChecked(self.tracer.enabled)
+        self.enabled_checkbox.toggled.connect(self.set_recording)
+        button_layout.addWidget(self.enabled_checkbox)
+
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        button_layout.addWidget(export_button)
+
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(clear_button)
+        self.layout.addLayout(button_layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def set_recording(self, enabled):
+        self.tracer.enabled = enabled
+
+    def refresh(self):
+        stats = self.tracer.summary()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(stats))
+        for row, item in enumerate(stats):
+            values = [item.name, item.backend, item.count, item.errors, round(item.p50 * 1000, 1),
+                      round(item.p95 * 1000, 1), round(item.max * 1000, 1), item.cache_hits, item.bytes,
+                      item.entries]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem()
+                # 数值列按数值排序
+                cell.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.table.setItem(row, column, cell)
+        self.table.setSortingEnabled(True)
+        total = sum(item.count for item in stats)
+        self.status_label.setText(f"{total} calls recorded" if total else "No calls recorded yet.")
+
+    def export_trace(self):
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Trace", "bibtexmanager_trace.json",
+            "Chrome Trace (*.json);;JSON Lines (*.jsonl)")
+        if not file_path:
+            return
+        if selected_filter.startswith("JSON Lines") and not file_path.endswith('.jsonl'):
+            file_path += '.jsonl'
+        try:
+            self.tracer.export(file_path)
+        except (IOError, OSError) as e:
+            self.show_custom_message("Error", f"Failed to write trace file: {e}")
+            return
+        self.status_label.setText(f"Exported {len(self.tracer.spans())} calls to {file_path}")
+
+    def clear(self):
+        self.tracer.clear()
+        self.refresh()
@@ -0,0 +1,281 @@
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import search_module
+from bib_index import get_library_index
+
+# 并发查询各来源的线程池大小；resolve_citation_keys 的每个工作线程会同时占用多个
+PROVIDER_POOL_SIZE = 32
+
+DEFAULT_INSPIRE_TIMEOUT = 30
+DEFAULT_SCHOLAR_TIMEOUT = 45
+# Google Scholar 容易触发验证码，默认只在 INSPIRE 结束且没有结果后才查询，最坏耗时为两者超时之和。
+# 设为秒数时，INSPIRE 超过该时间仍无结果就提前发起对冲请求；不应明显小于 INSPIRE 的超时
+DEFAULT_SCHOLAR_START_DELAY = None
+
+# 查询文本是 DOI（可带 doi: 或 doi.org 前缀）时按 DOI 在本地库中查找
+_DOI_QUERY = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:)?10\.\d{4,9}/\S+$', re.IGNORECASE)
+
+# 外部取消事件的检查间隔（秒）
+_CANCEL_POLL_INTERVAL = 0.2
+
+# 竞速查询结果：provider 为得到结果的来源；errors 表示有来源出错或超时，此时"未找到"不可信
+RaceResult = namedtuple('RaceResult', ['bibtex', 'provider', 'errors'])
+
+
+class MetadataProvider:
+    """
+    BibTeX 元数据来源的基类，子类实现 search()。
+
+    :param priority: 数值越小优先级越高；多个来源同时返回结果时取优先级高的
+    :param timeout: 从开始查询起最多等待的秒数，None 表示不限
+    :param start_delay: 延迟启动的秒数；期间已有结果则不再发起请求。
+        更高优先级的来源都已结束且没有结果时立即启动。
+        None 表示只在更高优先级的来源都失败后才启动
+    """
+
+    name = 'provider'
+    # 结果是否写入查询缓存
+    cacheable = True
+
+    def __init__(self, priority=0, timeout=None, start_delay=0.0):
+        self.priority = priority
+        self.timeout = timeout
+        self.start_delay = start_delay
+
+    def accepts(self, query, is_title):
+        """
+        :return: 该来源是否处理这类查询
+        """
+        return True
+
+    def search(self, query, is_title, cancel_event):
+        """
+        :param cancel_event: threading.Event，被设置后应尽快放弃并返回 None
+        :return: BibTeX 文本，未找到时返回 None
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}(priority={self.priority}, timeout={self.timeout}, start_delay={self.start_delay})"
+
+
+class InspireProvider(MetadataProvider):
+    """
+    直接在 INSPIRE 中搜索（标题、texkey 或 arXiv ID）。
+    """
+
+    name = 'inspire'
+
+    def search(self, query, is_title, cancel_event):
+        stripped_query = query
+        if is_title and not search_module.is_bib_code(query):
+            stripped_query = query.replace(":", "")
+
+        bibtex = search_module.search_inspire(stripped_query)
+        if bibtex or stripped_query == query or cancel_event.is_set():
+            return bibtex
+        return search_module.search_inspire(query)
+
+
+class ScholarProvider(MetadataProvider):
+    """
+    通过 Google Scholar 查找文献，再尽量用 arXiv ID 或标题从 INSPIRE 取得 BibTeX，
+    都失败时返回 Google Scholar 生成的 BibTeX。
+    """
+
+    name = 'scholar'
+
+    def search(self, query, is_title, cancel_event):
+        gs_result = search_module.search_google_scholar(query)
+        if not gs_result or cancel_event.is_set():
+            return None
+
+        arxiv_id = search_module.extract_arxiv_id(gs_result)
+        if arxiv_id:
+            bibtex = search_module.search_inspire(f"arXiv:{arxiv_id}")
+            if bibtex or cancel_event.is_set():
+                return bibtex
+
+        # 如果没有找到 arXiv ID 或 INSPIRE 搜索失败，尝试使用标题再次搜索 INSPIRE
+        title = gs_result.get('bib', {}).get('title', '')
+        if title:
+            bibtex = search_module.search_inspire(title)
+            if bibtex or cancel_event.is_set():
+                return bibtex
+
+        return search_module.process_google_scholar_bibtex(gs_result)
+
+
+class LocalLibraryProvider(MetadataProvider):
+    """
+    在本地 .bib 文件中按键、DOI、arXiv ID 或规范化标题查找条目。
+    """
+
+    name = 'library'
+    cacheable = False
+
+    def __init__(self, library_path, priority=-1, timeout=None, start_delay=0.0):
+        super().__init__(priority=priority, timeout=timeout, start_delay=start_delay)
+        self.library_path = library_path
+
+    def accepts(self, query, is_title):
+        return bool(self.library_path) and os.path.exists(self.library_path)
+
+    def search(self, query, is_title, cancel_event):
+        index = get_library_index(self.library_path)
+        key = index.find_key(query)
+        if key is None and _DOI_QUERY.match(query.strip()):
+            key = index.find_doi(query)
+        if key is None and search_module.lookup_kind(query, is_title) == search_module.KIND_ARXIV:
+            key = index.find_eprint(query)
+        if key is None and is_title:
+            key = index.find_title(query)
+        return index.entry_text(key) if key else None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PROVIDER_POOL_SIZE, thread_name_prefix='provider')
+        return _executor
+
+
+def _run_provider(provider, query, is_title, start_signal, race_over, cancel_event):
+    if provider.start_delay != 0:
+        start_signal.wait(provider.start_delay)
+    # 竞速已结束时不再发起新的请求
+    if race_over.is_set() or cancel_event.is_set():
+        return None, False
+    search_module._reset_lookup_errors()
+    try:
+        bibtex = provider.search(query, is_title, cancel_event)
+    except Exception as e:
+        print(f"Error searching {provider.name}: {e}")
+        return None, True
+    return bibtex, search_module._lookup_error_count() > 0
+
+
+def race_providers(providers, query, is_title=True, cancel_event=None, cancel_losers=True):
+    """
+    并发查询多个来源，返回第一个可用的结果。start_delay 为数值的来源按各自的 start_delay + timeout 截止，
+    总耗时不超过其中最大者，而不是各来源之和；start_delay 为 None 的来源在更高优先级的来源都结束后才启动，
+    超时从启动时算起。
+
+    :param providers: MetadataProvider 列表
+    :param query: 标题、引用键或 arXiv ID
+    :param is_title: query 是否为标题
+    :param cancel_event: threading.Event，被设置后放弃查询
+    :param cancel_losers: 得到结果后是否通知其余来源停止
+    :return: RaceResult
+    """
+    providers = sorted((provider for provider in providers if provider.accepts(query, is_title)),
+                       key=lambda provider: provider.priority)
+    if not providers:
+        return RaceResult(None, None, False)
+
+    race_over = threading.Event()
+    race_cancel = threading.Event()
+    start = time.monotonic()
+    executor = _get_executor()
+    start_signals = {}
+    futures = {}
+    deadlines = {}
+    for provider in providers:
+        start_signal = threading.Event()
+        future = executor.submit(_run_provider, provider, query, is_title, start_signal, race_over, race_cancel)
+        futures[future] = provider
+        start_signals[future] = start_signal
+        if provider.timeout is not None and provider.start_delay is not None:
+            deadlines[future] = start + provider.start_delay + provider.timeout
+
+    pending = set(futures)
+    errors = False
+    cancelled = False
+    try:
+        while pending:
+            now = time.monotonic()
+            expired = {future for future in pending if future in deadlines and deadlines[future] <= now}
+            if expired:
+                errors = True
+                for future in expired:
+                    print(f"{futures[future].name} timed out for query: {query}")
+                    future.cancel()
+                pending -= expired
+                if not pending:
+                    break
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+
+            # 更高优先级的来源都已结束（完成或超时）且没有结果时，立即启动剩下的最高优先级来源，
+            # 并在计算等待时间之前设置其截止时间
+            top_priority = min(futures[future].priority for future in pending)
+            for future in pending:
+                provider = futures[future]
+                if provider.priority == top_priority and not start_signals[future].is_set():
+                    start_signals[future].set()
+                    if provider.timeout is not None and future not in deadlines:
+                        deadlines[future] = now + provider.timeout
+
+            timeout = min((deadlines[future] - now for future in pending if future in deadlines), default=None)
+            if cancel_event is not None:
+                timeout = _CANCEL_POLL_INTERVAL if timeout is None else min(timeout, _CANCEL_POLL_INTERVAL)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in sorted(done, key=lambda future: futures[future].priority):
+                bibtex, provider_errors = future.result()
+                errors = errors or provider_errors
+                if bibtex:
+                    return RaceResult(bibtex, futures[future], errors)
+        return RaceResult(None, None, errors or cancelled)
+    finally:
+        race_over.set()
+        if cancel_losers or cancelled:
+            race_cancel.set()
+        # 唤醒仍在等待启动的来源，使其直接退出
+        for start_signal in start_signals.values():
+            start_signal.set()
+
+
+_providers = None
+_providers_lock = threading.Lock()
+
+
+def default_providers(scholar_start_delay=DEFAULT_SCHOLAR_START_DELAY):
+    """
+    :param scholar_start_delay: Google Scholar 对冲请求的延迟秒数，None 表示不对冲
+    """
+    return [
+        InspireProvider(priority=0, timeout=DEFAULT_INSPIRE_TIMEOUT),
+        ScholarProvider(priority=1, timeout=DEFAULT_SCHOLAR_TIMEOUT, start_delay=scholar_start_delay),
+    ]
+
+
+def get_providers():
+    """
+    返回 get_bibtex 使用的联网来源列表（首次调用时创建默认配置）。
+    """
+    global _providers
+    with _providers_lock:
+        if _providers is None:
+            _providers = default_providers()
+        return list(_providers)
+
+
+def set_providers(providers):
+    """
+    替换 get_bibtex 使用的联网来源；传入 None 恢复默认配置。
+    """
+    global _providers
+    with _providers_lock:
+        _providers = list(providers) if providers is not None else None
@@ -0,0 +1,239 @@
+import threading
+import time
+
+# 各后端的默认限速参数
+# INSPIRE 允许每个 IP 每 5 秒 15 个请求；Google Scholar 没有公开限额，请求过快会出现验证码
+BACKEND_DEFAULTS = {
+    'inspire': {'rate': 3.0, 'burst': 15, 'min_rate': 0.5, 'failure_threshold': 5, 'cooldown': 30},
+    'scholar': {'rate': 0.5, 'burst': 2, 'min_rate': 0.05, 'failure_threshold': 3, 'cooldown': 300},
+}
+
+# 获取令牌时默认最多等待的秒数
+DEFAULT_MAX_WAIT = 30
+
+# 断路器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶。速率可按 AIMD 方式调整：被限流时减半，请求成功时逐步恢复。
+    """
+
+    def __init__(self, rate, burst, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None, cancel_event=None):
+        """
+        取得一个令牌，必要时等待。
+
+        :param timeout: 最多等待的秒数，None 表示一直等待
+        :param cancel_event: threading.Event，被设置后放弃等待
+        :return: 是否取得令牌
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_time = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait_time > deadline:
+                    return False
+            if cancel_event is not None:
+                if cancel_event.wait(wait_time):
+                    return False
+            else:
+                time.sleep(wait_time)
+
+    def decrease(self, factor=0.5):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * factor)
+            # 丢弃积攒的令牌，避免限流后立刻又发出一串请求
+            self._tokens = min(self._tokens, 1.0)
+
+    def increase(self, step=None):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + (step if step is not None else self.max_rate / 10))
+
+
+class CircuitBreaker:
+    """
+    连续失败达到阈值后断开（OPEN），冷却期内直接拒绝请求；
+    冷却结束后进入 HALF_OPEN，只放行一个试探请求，成功则恢复，失败则重新断开。
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        :return: 当前是否可以发起请求
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() < self._open_until:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(self.cooldown)
+
+    def release_probe(self):
+        """
+        放行的试探请求最终没有发出时调用，允许下一个请求重新试探。
+        """
+        with self._lock:
+            self._probing = False
+
+    def trip(self, seconds=None):
+        """
+        立即断开 seconds 秒（默认为 cooldown），例如收到验证码或 Retry-After 时。
+        """
+        with self._lock:
+            self._open(self.cooldown if seconds is None else seconds)
+
+    def _open(self, seconds):
+        self.state = OPEN
+        self._probing = False
+        self._open_until = max(self._open_until, time.monotonic() + seconds)
+
+    def remaining(self):
+        """
+        :return: 距离冷却结束的秒数，未断开时为 0
+        """
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+
+class BackendLimiter:
+    """
+    单个后端的令牌桶限速与断路器，在所有工作线程间共享。
+    """
+
+    def __init__(self, name, rate, burst, min_rate=None, failure_threshold=5, cooldown=60):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst, min_rate)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self._lock = threading.Lock()
+        self._throttled = 0
+        self._rejected = 0
+
+    def acquire(self, timeout=DEFAULT_MAX_WAIT, cancel_event=None):
+        """
+        请求前调用。断路器断开时立即返回 False，否则等待令牌。
+
+        :return: 是否可以发起请求
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self._rejected += 1
+            return False
+        if self.bucket.acquire(timeout=timeout, cancel_event=cancel_event):
+            return True
+        # 没有发出请求，不能让 HALF_OPEN 状态一直等待试探结果
+        self.breaker.release_probe()
+        return False
+
+    def record_success(self):
+        self.breaker.record_success()
+        self.bucket.increase()
+
+    def record_failure(self):
+        self.breaker.record_failure()
+
+    def record_throttled(self, retry_after=None):
+        """
+        收到 429 或验证码时调用：降低速率并暂停该后端。
+
+        :param retry_after: 服务器要求的等待秒数；None 时使用断路器的 cooldown
+        """
+        with self._lock:
+            self._throttled += 1
+        self.bucket.decrease()
+        self.breaker.trip(retry_after)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.bucket.rate,
+                'state': self.breaker.state,
+                'cooldown_remaining': self.breaker.remaining(),
+                'throttled': self._throttled,
+                'rejected': self._rejected,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """
+    返回指定后端的共享限速器（首次调用时按 BACKEND_DEFAULTS 创建）。
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = BackendLimiter(name, **BACKEND_DEFAULTS.get(name, {'rate': 5.0, 'burst': 5}))
+        return limiter
+
+
+def configure_limiter(name, **options):
+    """
+    用新的参数替换指定后端的限速器，参数同 BackendLimiter。
+    """
+    with _limiters_lock:
+        params = dict(BACKEND_DEFAULTS.get(name, {'rate': 5.0, 'burst': 5}))
+        params.update(options)
+        _limiters[name] = BackendLimiter(name, **params)
+        return _limiters[name]
+
+
+def parse_retry_after(value):
+    """
+    :return: Retry-After 头中的秒数；无法解析（如 HTTP 日期格式）时返回 None
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
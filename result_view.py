@@ -0,0 +1,297 @@
+from collections import namedtuple
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QListView,
+                             QStyledItemDelegate, QPlainTextEdit, QAbstractItemView)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+
+from bib_scanner import scan_bib_content
+
+# 结果中的一项：BibTeX 记录（entry_type 不为 None，@string 等没有 key）或普通提示文字
+ResultEntry = namedtuple('ResultEntry', ['key', 'entry_type', 'text'])
+
+# 自定义数据角色：条目的行数，用于在不排版文本的情况下计算行高
+LINE_COUNT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# 一次布局的行数，结果很多时分批布局，不阻塞界面
+LAYOUT_BATCH_SIZE = 200
+
+
+def split_entries(text):
+    """
+    把 BibTeX 文本拆分为条目，只定位条目边界，不解析字段。
+    第一个条目之前的非空文字作为一条提示。
+
+    :return: ResultEntry 列表
+    """
+    entries = []
+    first = None
+    for record in scan_bib_content(text):
+        if first is None:
+            first = record.start
+        entry_text = text[record.start:record.end].strip()
+        if entry_text:
+            entries.append(ResultEntry(record.key, record.entry_type, entry_text))
+    leading = text[:first].strip() if first is not None else text.strip()
+    if leading:
+        entries.insert(0, ResultEntry(None, None, leading))
+    return entries
+
+
+class ResultModel(QAbstractListModel):
+    """
+    BibTeX 结果的列表模型。只保存每个条目的原始文本，视图只为可见的行请求数据；
+    过滤时在 Python 中一次算出匹配的行，不逐行回调。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._unchecked = set()   # 取消勾选的条目下标
+        self._search_texts = None  # 小写文本，第一次过滤时才生成
+        self._filter = ''
+        self._rows = None          # 过滤后可见的条目下标，None 表示全部可见
+
+    # Qt 模型接口
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._entries) if self._rows is None else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry_index = self._entry_index(index.row())
+        entry = self._entries[entry_index]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return entry.text
+        if role == LINE_COUNT_ROLE:
+            return entry.text.count('\n') + 1
+        if role == Qt.ItemDataRole.CheckStateRole and entry.entry_type:
+            return Qt.CheckState.Unchecked if entry_index in self._unchecked else Qt.CheckState.Checked
+        if role == Qt.ItemDataRole.ToolTipRole and entry.key:
+            return entry.key
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+        if index.isValid() and self._entries[self._entry_index(index.row())].entry_type:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        entry_index = self._entry_index(index.row())
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if Qt.CheckState(value) == Qt.CheckState.Checked:
+                self._unchecked.discard(entry_index)
+            else:
+                self._unchecked.add(entry_index)
+        elif role == Qt.ItemDataRole.EditRole:
+            text = value.strip()
+            if not text:
+                return False
+            # 编辑后重新识别键和类型；编辑成多个条目时仍作为一项保存
+            parsed = split_entries(text)
+            entry = parsed[0] if len(parsed) == 1 else ResultEntry(None, None, text)
+            self._entries[entry_index] = entry._replace(text=text)
+            if self._search_texts is not None:
+                self._search_texts[entry_index] = text.lower()
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    # 内容
+
+    def set_text(self, text):
+        self.beginResetModel()
+        self._entries = split_entries(text)
+        self._unchecked = set()
+        self._search_texts = None
+        self._rows = self._matching_rows(0) if self._filter else None
+        self.endResetModel()
+
+    def append_text(self, text):
+        """
+        追加条目，只通知视图插入的行，已有行不需要重新布局。
+        """
+        new_entries = split_entries(text)
+        if not new_entries:
+            return
+        start = len(self._entries)
+        if self._search_texts is not None:
+            self._search_texts.extend(entry.text.lower() for entry in new_entries)
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), start, start + len(new_entries) - 1)
+            self._entries.extend(new_entries)
+            self.endInsertRows()
+            return
+        self._entries.extend(new_entries)
+        matches = self._matching_rows(start)
+        if matches:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(matches) - 1)
+            self._rows.extend(matches)
+            self.endInsertRows()
+
+    def entry_count(self):
+        return len(self._entries)
+
+    def unchecked_count(self):
+        return len(self._unchecked)
+
+    def checked_count(self):
+        return sum(1 for entry in self._entries if entry.entry_type) - len(self._unchecked)
+
+    def to_text(self, checked_only=False):
+        """
+        :param checked_only: 只返回勾选的 BibTeX 记录（不含提示文字）；过滤只影响显示，被过滤掉的勾选条目也包括在内
+        """
+        if not checked_only:
+            return "\n\n".join(entry.text for entry in self._entries)
+        return "\n\n".join(entry.text for index, entry in enumerate(self._entries)
+                           if entry.entry_type and index not in self._unchecked)
+
+    # 过滤和勾选
+
+    def set_filter(self, text):
+        """
+        只显示包含 text 的条目（不区分大小写），空字符串显示全部。
+        """
+        self._filter = text.strip().lower()
+        self.beginResetModel()
+        self._rows = self._matching_rows(0) if self._filter else None
+        self.endResetModel()
+
+    def set_all_checked(self, checked):
+        """
+        勾选或取消勾选当前可见的全部条目。
+        """
+        if checked:
+            self._unchecked.difference_update(self._visible_indices())
+        else:
+            self._unchecked.update(index for index in self._visible_indices() if self._entries[index].entry_type)
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1), [Qt.ItemDataRole.CheckStateRole])
+
+    def _entry_index(self, row):
+        return row if self._rows is None else self._rows[row]
+
+    def _visible_indices(self):
+        return range(len(self._entries)) if self._rows is None else self._rows
+
+    def _matching_rows(self, start):
+        if self._search_texts is None:
+            self._search_texts = [entry.text.lower() for entry in self._entries]
+        needle = self._filter
+        texts = self._search_texts
+        return [index for index in range(start, len(texts)) if needle in texts[index]]
+
+
+class ResultDelegate(QStyledItemDelegate):
+    """
+    按行数计算行高，不为每个条目排版文本；双击时用多行编辑框修改条目。
+    """
+
+    def sizeHint(self, option, index):
+        line_count = index.data(LINE_COUNT_ROLE) or 1
+        height = option.fontMetrics.lineSpacing() * line_count + 8
+        return QSize(option.rect.width(), height)
+
+    def createEditor(self, parent, option, index):
+        editor = QPlainTextEdit(parent)
+        editor.setTabChangesFocus(True)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.toPlainText(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+class ResultView(QWidget):
+    """
+    显示 BibTeX 结果的虚拟列表：每个条目一行，可勾选、可过滤、双击编辑。
+    提供与 QTextEdit 相同的 setPlainText / toPlainText / append / clear 接口，可直接替换结果文本框。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter results")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.set_filter)
+        filter_layout.addWidget(self.filter_edit)
+
+        check_all_button = QPushButton("Check All")
+        check_all_button.clicked.connect(lambda: self.model.set_all_checked(True))
+        filter_layout.addWidget(check_all_button)
+        uncheck_all_button = QPushButton("Uncheck All")
+        uncheck_all_button.clicked.connect(lambda: self.model.set_all_checked(False))
+        filter_layout.addWidget(uncheck_all_button)
+        layout.addLayout(filter_layout)
+
+        self.model = ResultModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setItemDelegate(ResultDelegate(self.list_view))
+        self.list_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.list_view.setBatchSize(LAYOUT_BATCH_SIZE)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.list_view.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
+        self.list_view.setAlternatingRowColors(True)
+        layout.addWidget(self.list_view)
+
+        self.count_label = QLabel("")
+        layout.addWidget(self.count_label)
+
+        self.model.modelReset.connect(self.update_count)
+        self.model.rowsInserted.connect(self.update_count)
+        self.model.dataChanged.connect(self.update_count)
+
+    # 与 QTextEdit 兼容的接口
+
+    def setPlainText(self, text):
+        self.model.set_text(text)
+
+    def toPlainText(self):
+        return self.model.to_text()
+
+    def append(self, text):
+        self.model.append_text(text)
+
+    def clear(self):
+        self.model.set_text("")
+
+    def checked_text(self):
+        """
+        :return: 所有勾选的条目（不论是否被过滤掉），用于复制和添加到 BibTeX 文件
+        """
+        return self.model.to_text(checked_only=True)
+
+    def set_filter(self, text):
+        self.model.set_filter(text)
+
+    def update_count(self, *args):
+        total = self.model.entry_count()
+        if not total:
+            self.count_label.setText("")
+            return
+        text = f"{total} entries"
+        if self.filter_edit.text().strip():
+            # 复制和添加时包括被过滤掉的勾选条目
+            text += f", {self.model.rowCount()} shown, {self.model.checked_count()} checked in total"
+        unchecked = self.model.unchecked_count()
+        if unchecked:
+            text += f", {unchecked} unchecked"
+        self.count_label.setText(text)
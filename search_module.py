@@ -1,17 +1,40 @@
-import requests
 import re
-import bibtexparser
-from bibtexparser.bparser import BibTexParser
-from bibtexparser.bwriter import BibTexWriter
-from scholarly import scholarly
 import os
+import sys
 import json
-from fake_useragent import UserAgent
-import requests
+import mmap
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from collections import namedtuple
+from http_session import get_http_session
+from bib_index import get_library_index, get_library_lock
+from bib_scanner import scan_bib_content, scan_bib_file
+from citation_extractor import iter_text_citations
+from lookup_cache import get_lookup_cache, KIND_TITLE, KIND_TEXKEY, KIND_ARXIV
+from rate_limit import get_limiter, parse_retry_after
+from perf_trace import trace_span, annotate
+
+# scholarly、fake_useragent、requests 和 bibtexparser 导入较慢，
+# 均在首次使用时才导入，使界面可以立即显示
+
+# 记录当前线程的查询过程中是否发生网络错误，出错时不写入负缓存
+_lookup_state = threading.local()
+
+def _record_lookup_error():
+    _lookup_state.errors = getattr(_lookup_state, 'errors', 0) + 1
+
+def _reset_lookup_errors():
+    _lookup_state.errors = 0
+
+def _lookup_error_count():
+    return getattr(_lookup_state, 'errors', 0)
 
 def check_network():
+    import requests
     try:
-        response = requests.get("https://www.baidu.com", timeout=5)
+        response = get_http_session().get("https://www.baidu.com", timeout=5)
         return response.status_code == 200
     except requests.RequestException:
         return False
@@ -27,38 +50,204 @@ def get_resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-# 设置自定义的 fake_useragent 数据
-custom_path = get_resource_path('fake_useragent.json')
-with open(custom_path, 'r') as f:
-    custom_data = json.load(f)
-
-ua = UserAgent(fallback="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-ua.data = custom_data
-ua.data_randomize = custom_data['randomize']
+_user_agent = None
+_user_agent_lock = threading.Lock()
 
+def get_user_agent():
+    """
+    首次调用时加载自定义的 fake_useragent 数据并创建 UserAgent。
+    """
+    global _user_agent
+    with _user_agent_lock:
+        if _user_agent is None:
+            from fake_useragent import UserAgent
+
+            # 设置自定义的 fake_useragent 数据
+            custom_path = get_resource_path('fake_useragent.json')
+            with open(custom_path, 'r') as f:
+                custom_data = json.load(f)
+
+            ua = UserAgent(fallback="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+            ua.data = custom_data
+            ua.data_randomize = custom_data['randomize']
+            _user_agent = ua
+        return _user_agent
+
+def _get_scholarly():
+    from scholarly import scholarly
+    return scholarly
+
+
+# 可通过环境变量指向本地的模拟服务器（见 benchmarks/mock_server.py）
+INSPIRE_API_URL = os.environ.get('BIBTEXMANAGER_INSPIRE_URL', "https://inspirehep.net/api/literature")
+
+# 批量查询时每个请求包含的键数量（同时作为分页大小）
+INSPIRE_BATCH_SIZE = 50
+# 每个批量查询最多翻页数，避免服务器异常时无限翻页
+INSPIRE_BATCH_MAX_PAGES = 3
+
+def search_inspire(query, page=None, size=None):
+    with trace_span('search_inspire', backend='inspire') as span:
+        bibtex = _search_inspire(query, page, size, span)
+        span['entries'] = len(_BIBTEX_ENTRY_START.findall(bibtex)) if bibtex else 0
+        return bibtex
 
-def search_inspire(query):
-    base_url = "https://inspirehep.net/api/literature"
+def _search_inspire(query, page, size, span):
+    base_url = INSPIRE_API_URL
     params = {
         "q": query,
         "format": "bibtex"
     }
+    if page is not None:
+        params["page"] = page
+    if size is not None:
+        params["size"] = size
+    import requests
+    limiter = get_limiter('inspire')
+    if not limiter.acquire():
+        print(f"INSPIRE is temporarily unavailable, skipping query: {query}")
+        _record_lookup_error()
+        span['error'] = 'unavailable'
+        return None
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = get_http_session().get(base_url, params=params)
+        span['status'] = response.status_code
+        span['bytes'] = len(response.content)
+        if response.status_code == 429:
+            limiter.record_throttled(parse_retry_after(response.headers.get('Retry-After')))
+        elif response.status_code >= 500:
+            limiter.record_failure()
+        else:
+            limiter.record_success()
         response.raise_for_status()  # 这将引发一个异常，如果状态码不是200
         if response.text.strip():
             return response.text.strip()
     except requests.exceptions.RequestException as e:
+        if getattr(e, 'response', None) is None:
+            # 连接失败或超时
+            limiter.record_failure()
         print(f"Error searching INSPIRE: {e}")
+        _record_lookup_error()
+        span['error'] = type(e).__name__
     return None
 
-def search_google_scholar(query):
+_ARXIV_KEY_PATTERN = re.compile(r'^(?:arXiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(v\d+)?$', re.IGNORECASE)
+_BATCHABLE_KEY_PATTERN = re.compile(r'^[^\s"()]+$')
+_BIBTEX_ENTRY_START = re.compile(r'^@(\w+)\s*[{(]\s*([^,\s]+)\s*,', re.MULTILINE)
+_EPRINT_FIELD_PATTERN = re.compile(r'^\s*eprint\s*=\s*[{"]([^}"]+)[}"]', re.MULTILINE | re.IGNORECASE)
+
+def split_bibtex_entries(bibtex):
+    """
+    将包含多个条目的 BibTeX 文本拆分为单个条目。
+
+    :param bibtex: BibTeX 文本
+    :return: [(entry_id, entry_text), ...]
+    """
+    starts = list(_BIBTEX_ENTRY_START.finditer(bibtex))
+    entries = []
+    for i, match in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(bibtex)
+        entries.append((match.group(2), bibtex[match.start():end].strip()))
+    return entries
+
+def _normalize_arxiv_id(arxiv_id):
+    match = _ARXIV_KEY_PATTERN.match(arxiv_id.strip())
+    return match.group(1).lower() if match else None
+
+def search_inspire_batch(keys, batch_size=INSPIRE_BATCH_SIZE, max_pages=INSPIRE_BATCH_MAX_PAGES,
+                         cancel_event=None):
+    """
+    使用 OR 组合查询一次性在 INSPIRE 中查找多个 texkey / arXiv ID。
+
+    :param keys: 引用键列表
+    :param batch_size: 每个请求包含的键数量
+    :param max_pages: 每个批量查询最多请求的页数
+    :param cancel_event: threading.Event，被设置后停止发起新的请求
+    :return: {key: bibtex}，只包含批量查询命中的键
+    """
+    texkeys = {}
+    arxiv_ids = {}
+    terms = []
+    for key in dict.fromkeys(keys):
+        if not key or not _BATCHABLE_KEY_PATTERN.match(key):
+            continue
+        arxiv_id = _normalize_arxiv_id(key)
+        if arxiv_id:
+            arxiv_ids.setdefault(arxiv_id, []).append(key)
+            terms.append(f"arxiv {arxiv_id}")
+        else:
+            texkeys.setdefault(key.lower(), []).append(key)
+            terms.append(f"texkey {key}")
+
+    found = {}
+    for i in range(0, len(terms), batch_size):
+        query = " or ".join(terms[i:i + batch_size])
+        page = 1
+        while cancel_event is None or not cancel_event.is_set():
+            bibtex = search_inspire(query, page=page, size=batch_size)
+            if not bibtex:
+                break
+            entries = split_bibtex_entries(bibtex)
+            for entry_id, entry_text in entries:
+                matched = list(texkeys.get(entry_id.lower(), []))
+                eprint = _EPRINT_FIELD_PATTERN.search(entry_text)
+                if eprint:
+                    arxiv_id = _normalize_arxiv_id(eprint.group(1))
+                    if arxiv_id:
+                        matched.extend(arxiv_ids.get(arxiv_id, []))
+                for key in matched:
+                    found.setdefault(key, entry_text)
+            if len(entries) < batch_size or page >= max_pages:
+                break
+            page += 1
+    return found
+
+# scholarly 在被判定为滥用时抛出的异常。MaxTriesExceededException 在离线时也会抛出，
+# 只有消息表明遇到验证码或 429 时才算被封锁
+_SCHOLAR_BLOCKED_ERRORS = ('DOSException',)
+_SCHOLAR_BLOCKED_MESSAGES = ('captcha', '429', 'too many requests', 'unusual traffic')
+
+def _is_scholar_blocked(error):
+    message = str(error).lower()
+    return (type(error).__name__ in _SCHOLAR_BLOCKED_ERRORS
+            or any(text in message for text in _SCHOLAR_BLOCKED_MESSAGES))
+
+def _call_scholar(function):
+    """
+    在 Google Scholar 限速器的控制下调用 scholarly。
+    遇到验证码或 429 时降低速率并暂停 Scholar，其余错误计入断路器。
+
+    :return: (是否成功调用, 返回值)
+    """
+    limiter = get_limiter('scholar')
+    if not limiter.acquire():
+        print("Google Scholar is temporarily unavailable, skipping query")
+        _record_lookup_error()
+        annotate(error='unavailable')
+        return False, None
     try:
-        search_query = scholarly.search_pubs(query)
-        publication = next(search_query)
+        result = function()
+    except StopIteration:
+        limiter.record_success()
+        return True, None
+    except Exception as e:
+        if _is_scholar_blocked(e):
+            limiter.record_throttled()
+            print(f"Google Scholar is blocking requests, pausing it: {e}")
+        else:
+            limiter.record_failure()
+            print(f"Error searching Google Scholar: {e}")
+        _record_lookup_error()
+        annotate(error=type(e).__name__)
+        return False, None
+    limiter.record_success()
+    return True, result
+
+def search_google_scholar(query):
+    with trace_span('search_google_scholar', backend='scholar') as span:
+        _, publication = _call_scholar(lambda: next(_get_scholarly().search_pubs(query)))
+        span['entries'] = 1 if publication else 0
         return publication
-    except:
-        return None
 
 def is_bib_code(query):
     # BibTeX 标识符通常是这样的格式：Author:YYYYxxx
@@ -66,44 +255,67 @@ def is_bib_code(query):
     pattern = r'^[A-Za-z]+:\d{4}[a-z]{2,3}$'
     return bool(re.match(pattern, query))
 
-def get_bibtex(query, is_title=True):
+def lookup_kind(query, is_title=True):
+    """
+    判断查询类型，用作缓存键的一部分。
+    """
+    if _normalize_arxiv_id(query):
+        return KIND_ARXIV
+    return KIND_TITLE if is_title else KIND_TEXKEY
+
+def get_bibtex(query, is_title=True, use_cache=True, library_path=None):
+    """
+    查询单个标题、引用键或 arXiv ID 的 BibTeX。
+
+    :param library_path: 本地 .bib 文件；其中已有的条目直接返回，不再联网查询
+    """
     if not query.strip():
         return None
 
-    original_query = query
-
-    if is_title and not is_bib_code(query):
-        query = query.replace(":", "")
-    
-    bibtex = search_inspire(query)
-    if bibtex:
+    with trace_span('get_bibtex', cache_hit=False) as span:
+        bibtex = _get_bibtex(query, is_title, use_cache, library_path, span)
+        span['entries'] = 1 if bibtex else 0
+        span['bytes'] = len(bibtex.encode('utf-8')) if bibtex else 0
         return bibtex
 
-    if query != original_query:
-        bibtex = search_inspire(original_query)
-        if bibtex:
-            return bibtex
-
-    gs_result = search_google_scholar(original_query)
-    if gs_result:
-        arxiv_id = extract_arxiv_id(gs_result)
-        if arxiv_id:
-            inspire_query = f"arXiv:{arxiv_id}"
-            bibtex = search_inspire(inspire_query)
+def _get_bibtex(query, is_title, use_cache, library_path, span):
+    if library_path:
+        from providers import LocalLibraryProvider
+        local = LocalLibraryProvider(library_path)
+        if local.accepts(query, is_title):
+            bibtex = local.search(query, is_title, None)
             if bibtex:
+                span['backend'] = local.name
                 return bibtex
 
-        # 如果没有找到 arXiv ID 或 INSPIRE 搜索失败，尝试使用标题再次搜索 INSPIRE
-        title = gs_result.get('bib', {}).get('title', '')
-        if title:
-            bibtex = search_inspire(title)
-            if bibtex:
-                return bibtex
+    cache = get_lookup_cache() if use_cache else None
+    kind = lookup_kind(query, is_title)
+    if cache:
+        hit, bibtex = cache.get(kind, query)
+        if hit:
+            span['backend'] = 'cache'
+            span['cache_hit'] = True
+            return bibtex
 
-        # 如果还是失败，则返回处理过的 Google Scholar BibTeX
-        return process_google_scholar_bibtex(gs_result)
+    return _search_and_cache(query, is_title, cache)
 
-    return None
+def _search_and_cache(query, is_title, cache, cancel_event=None):
+    result = _search_bibtex(query, is_title, cancel_event)
+    annotate(backend=result.provider.name if result.provider else None)
+    # 网络出错或被取消导致的"未找到"不能缓存；本地库的结果也不写入缓存
+    if cache and (result.bibtex or not result.errors) and (result.provider is None or result.provider.cacheable):
+        cache.set(lookup_kind(query, is_title), query, result.bibtex)
+    return result.bibtex
+
+def _search_bibtex(query, is_title=True, cancel_event=None):
+    """
+    各来源（INSPIRE、Google Scholar）并发查询，取最先得到的结果；来源配置见 providers.py。
+
+    :param cancel_event: threading.Event，被设置后放弃仍在进行的查询
+    :return: providers.RaceResult
+    """
+    from providers import get_providers, race_providers
+    return race_providers(get_providers(), query, is_title, cancel_event=cancel_event)
 
 def extract_arxiv_id(gs_result):
     """
@@ -161,57 +373,177 @@ def extract_arxiv_id_from_string(text):
     return None
 
 def process_google_scholar_bibtex(gs_result):
-    bibtex = scholarly.bibtex(gs_result)
-    
+    with trace_span('scholar_bibtex', backend='scholar') as span:
+        _, bibtex = _call_scholar(lambda: _get_scholarly().bibtex(gs_result))
+        span['bytes'] = len(bibtex.encode('utf-8')) if bibtex else 0
+    if not bibtex:
+        return None
+
     # 移除 abstract 字段
     bibtex = re.sub(r'\s*abstract = {[^}]*},\n', '', bibtex)
     
     return bibtex
 
-def get_bibtex_from_citations(latex_text):
-    citation_pattern = r'\\cite[pt]?{([^}]+)}'
-    citations = re.findall(citation_pattern, latex_text)
+# 并发解析引用时的默认线程数
+DEFAULT_MAX_WORKERS = 8
+
+def extract_citation_keys(latex_text):
+    """
+    按出现顺序提取 LaTeX 文本中的所有引用键（保留重复项），
+    支持 natbib / biblatex 的各种引用命令和 \\nocite，忽略注释。
+
+    :param latex_text: LaTeX 文本
+    :return: 引用键列表
+    """
+    return [citation.key for citation in iter_text_citations(latex_text)]
+
+def resolve_citation_keys(keys, max_workers=DEFAULT_MAX_WORKERS, use_batch=True, use_cache=True,
+                          on_result=None, cancel_event=None, library_path=None, local_hits=None):
+    """
+    并发地为一组引用键查询 BibTeX。
+
+    :param keys: 引用键列表（可包含重复项）
+    :param max_workers: 最大并发线程数，1 表示串行
+    :param use_batch: 是否先通过 INSPIRE 批量查询，未命中的键再逐个查询
+    :param use_cache: 是否使用本地查询缓存
+    :param on_result: 每个键完成查询时调用 on_result(key, bibtex)，未找到时 bibtex 为 None
+    :param cancel_event: threading.Event，被设置后停止发起新的查询
+    :param library_path: 本地 .bib 文件；其中已有的键直接从文件读取，不再联网查询
+    :param local_hits: 若提供列表，将在本地库中找到的键追加到其中
+    :return: {key: bibtex 或 None} 字典；取消时只包含已完成的键
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    with trace_span('resolve_citation_keys', entries=len(unique_keys)) as span:
+        results = _resolve_citation_keys(unique_keys, max_workers, use_batch, use_cache, on_result, cancel_event,
+                                         library_path, local_hits, span)
+        span['found'] = sum(1 for bibtex in results.values() if bibtex)
+        return results
+
+def _resolve_citation_keys(unique_keys, max_workers, use_batch, use_cache, on_result, cancel_event,
+                           library_path, local_hits, span):
+    results = {}
+
+    def finish(key, bibtex):
+        results[key] = bibtex
+        if on_result:
+            on_result(key, bibtex)
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    pending = unique_keys
+    if library_path and os.path.exists(library_path):
+        index = get_library_index(library_path)
+        pending = []
+        for key in unique_keys:
+            bibtex = index.entry_text(key) if key else None
+            if bibtex:
+                finish(key, bibtex)
+                if local_hits is not None:
+                    local_hits.append(key)
+            else:
+                pending.append(key)
+
+    cache = get_lookup_cache() if use_cache else None
+    if cache:
+        cached_keys, pending = pending, []
+        for key in cached_keys:
+            hit, bibtex = cache.get(lookup_kind(key, is_title=False), key)
+            if hit:
+                finish(key, bibtex)
+            else:
+                pending.append(key)
+        span['cache_hits'] = len(cached_keys) - len(pending)
+
+    if use_batch and len(pending) > 1 and not cancelled():
+        found = search_inspire_batch(pending, cancel_event=cancel_event)
+        for key in pending:
+            if key in found:
+                finish(key, found[key])
+                if cache:
+                    cache.set(lookup_kind(key, is_title=False), key, found[key])
+        pending = [key for key in pending if key not in found]
+
+    def lookup(key):
+        # 已在上面检查过缓存，这里只写入
+        if not key or cancelled():
+            return None
+        with trace_span('lookup_key', cache_hit=False) as key_span:
+            bibtex = _search_and_cache(key, False, cache, cancel_event)
+            key_span['entries'] = 1 if bibtex else 0
+            key_span['bytes'] = len(bibtex.encode('utf-8')) if bibtex else 0
+            return bibtex
+
+    if max_workers is None or max_workers <= 1 or len(pending) <= 1:
+        for key in pending:
+            if cancelled():
+                break
+            finish(key, lookup(key))
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)))
+    futures = {executor.submit(lookup, key): key for key in pending}
+    try:
+        for future in as_completed(futures):
+            if cancelled():
+                break
+            finish(futures[future], future.result())
+    finally:
+        # 取消时不等待正在进行的请求，其结果将被丢弃
+        executor.shutdown(wait=not cancelled(), cancel_futures=True)
+    return results
+
+# 引用解析结果：local_hits / remote_hits 为分别从本地库和网络找到的键
+CitationResult = namedtuple('CitationResult', ['bibtex', 'not_found', 'local_hits', 'remote_hits'])
+
+def resolve_citations(latex_text, max_workers=DEFAULT_MAX_WORKERS, use_batch=True, use_cache=True,
+                      on_result=None, cancel_event=None, library_path=None):
+    """
+    解析 LaTeX 文本中的所有引用。本地库中已有的键不再联网查询。
+
+    :return: CitationResult
+    """
+    citations = extract_citation_keys(latex_text)
+    local_hits = []
+    results = resolve_citation_keys(citations, max_workers=max_workers, use_batch=use_batch,
+                                    use_cache=use_cache, on_result=on_result, cancel_event=cancel_event,
+                                    library_path=library_path, local_hits=local_hits)
+
     all_bibtex = ""
     processed_keys = set()
     not_found_entries = []
-    
-    for citation in citations:
-        keys = citation.split(',')
-        for key in keys:
-            key = key.strip()
-            if key not in processed_keys:
-                bibtex = get_bibtex(key, is_title=False)
-                if bibtex:
-                    all_bibtex += f"{bibtex}\n\n"
-                    processed_keys.add(key)
-                else:
-                    not_found_entries.append(key)
-    
-    return all_bibtex.strip(), not_found_entries
-
-def get_entries_from_content(content):
-    parser = BibTexParser()
-    parser.expect_multiple_parse = True
-    parser.ignore_nonstandard_types = False
-    bib_database = bibtexparser.loads(content, parser)
-    return bib_database.entries
-
-def update_bibtex_file(new_content, existing_content):
-    existing_entries = get_entries_from_content(existing_content) if existing_content.strip() else []
-    new_entries = get_entries_from_content(new_content)
-    
-    existing_ids = {entry['ID'].lower(): entry for entry in existing_entries}
-    added_entries = []
-    skipped_entries = []
-    
-    for entry in new_entries:
-        lower_id = entry['ID'].lower()
-        if lower_id not in existing_ids:
-            existing_ids[lower_id] = entry
-            added_entries.append(entry['ID'])
-        else:
-            skipped_entries.append(entry['ID'])
-    
+
+    # 按原始顺序合并结果，使输出与串行查询完全一致
+    for key in citations:
+        if key not in processed_keys and key in results:
+            bibtex = results[key]
+            if bibtex:
+                all_bibtex += f"{bibtex}\n\n"
+                processed_keys.add(key)
+            else:
+                not_found_entries.append(key)
+
+    local = set(local_hits)
+    remote_hits = [key for key in dict.fromkeys(citations) if key in processed_keys and key not in local]
+    return CitationResult(all_bibtex.strip(), not_found_entries, local_hits, remote_hits)
+
+def get_bibtex_from_citations(latex_text, max_workers=DEFAULT_MAX_WORKERS, use_batch=True, use_cache=True,
+                              on_result=None, cancel_event=None, library_path=None):
+    result = resolve_citations(latex_text, max_workers=max_workers, use_batch=use_batch, use_cache=use_cache,
+                               on_result=on_result, cancel_event=cancel_event, library_path=library_path)
+    return result.bibtex, result.not_found
+
+def get_entries_from_content(content, jobs=None):
+    """
+    :param content: BibTeX 文本
+    :param jobs: 解析进程数，默认为 CPU 核数；条目较少时总是在当前进程中解析
+    :return: 条目字典列表，保持原始顺序
+    """
+    from parallel_parser import parse_bib_content
+    return parse_bib_content(content, jobs=jobs).entries
+
+def _make_writer():
+    from bibtexparser.bwriter import BibTexWriter
     writer = BibTexWriter()
     writer.indent = '    '
     writer.display_order = ('title', 'author', 'year', 'journal', 'volume', 'number', 'pages', 'doi', 'arxiv')
@@ -219,54 +551,313 @@ def update_bibtex_file(new_content, existing_content):
     writer.add_trailing_commas = True
     writer.comma_first = False
     writer.string_bracket_type = '{'  # 使用单个大括号
-    
-    # 创建一个新的 BibDatabase 对象
-    updated_db = bibtexparser.bibdatabase.BibDatabase()
-    updated_db.entries = list(existing_ids.values())
-    
-    # 遍历所有条目，移除标题中的额外括号
-    for entry in updated_db.entries:
-        if 'title' in entry:
-            entry['title'] = entry['title'].strip('{}')
+    return writer
 
-    updated_bib = writer.write(updated_db)
+def update_bibtex_file(new_content, existing_content, jobs=None):
+    """
+    :param jobs: 解析进程数，默认为 CPU 核数；在 GUI 中调用时传入 1，不启动进程池
+    :return: (updated_bib, added_entries, skipped_entries)
+    """
+    with trace_span('update_bibtex_file') as span:
+        span['bytes'] = len(new_content.encode('utf-8')) + len(existing_content.encode('utf-8'))
+        updated_bib, added_entries, skipped_entries = _update_bibtex_file(new_content, existing_content, jobs)
+        span['entries'] = len(added_entries) + len(skipped_entries)
+        span['added'] = len(added_entries)
+        return updated_bib, added_entries, skipped_entries
+
+def _strip_title(entry):
+    if 'title' in entry:
+        entry['title'] = entry['title'].strip('{}')
+    return entry
+
+def _update_bibtex_file(new_content, existing_content, jobs):
+    from entry_store import EntryLibrary
+    from parallel_parser import iter_parsed_chunks
+    # 逐块转换为紧凑条目，只保留一份；键重复时保留最后出现的版本、第一次出现的位置
+    library = EntryLibrary()
+    if existing_content.strip():
+        for parsed in iter_parsed_chunks(existing_content, jobs=jobs):
+            for entry in parsed.entries:
+                library.add(_strip_title(entry), replace=True)
+
+    added_entries = []
+    skipped_entries = []
+    for entry in get_entries_from_content(new_content, jobs=jobs):
+        if library.add(_strip_title(entry)):
+            added_entries.append(entry['ID'])
+        else:
+            skipped_entries.append(entry['ID'])
+
+    updated_bib = library.to_bibtex(_make_writer())
     return updated_bib, added_entries, skipped_entries
 
-def get_existing_entries(file_path):
-    if not file_path or not os.path.exists(file_path):
-        return []
-    
-    with open(file_path, 'r') as file:
-        existing_content = file.read()
-    
-    return get_entries_from_content(existing_content)
+def append_bibtex_entries(file_path, new_content, jobs=None):
+    """
+    增量合并：只把文件中尚不存在的新条目追加到文件末尾，已有内容保持不变。
 
-def clean_bib_content(bib_content):
-    parser = BibTexParser()
-    bib_database = bibtexparser.loads(bib_content, parser)
-    
-    entries_dict = {}
+    :param file_path: .bib 文件路径（不存在时会创建）
+    :param new_content: 待添加的 BibTeX 文本
+    :param jobs: 解析进程数，默认为 CPU 核数；在 GUI 中调用时传入 1，不启动进程池
+    :return: (added_entries, skipped_entries)
+    """
+    with trace_span('append_bibtex_entries') as span:
+        span['bytes'] = len(new_content.encode('utf-8'))
+        added_entries, skipped_entries = _append_bibtex_entries(file_path, new_content, jobs)
+        span['entries'] = len(added_entries) + len(skipped_entries)
+        span['added'] = len(added_entries)
+        return added_entries, skipped_entries
+
+def _append_bibtex_entries(file_path, new_content, jobs):
+    from bibtexparser.bibdatabase import BibDatabase
+    # 持有该文件的锁，其他线程不会在追加和刷新索引之间读取或写入该文件
+    with get_library_lock(file_path):
+        index = get_library_index(file_path)
+        new_entries = get_entries_from_content(new_content, jobs=jobs)
+
+        added_entries = []
+        skipped_entries = []
+        entries_to_write = []
+        added_ids = set()
+        for entry in new_entries:
+            lower_id = entry['ID'].lower()
+            if lower_id not in added_ids and not index.contains_key(lower_id):
+                added_ids.add(lower_id)
+                added_entries.append(entry['ID'])
+                if 'title' in entry:
+                    entry['title'] = entry['title'].strip('{}')
+                entries_to_write.append(entry)
+            else:
+                skipped_entries.append(entry['ID'])
+
+        if entries_to_write:
+            new_db = BibDatabase()
+            new_db.entries = entries_to_write
+            new_bib = _make_writer().write(new_db)
+
+            # 确保新条目与原有内容之间有空行分隔
+            separator = ""
+            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                with open(file_path, 'rb') as file:
+                    file.seek(-1, os.SEEK_END)
+                    separator = "\n" if file.read(1) == b"\n" else "\n\n"
+            with open(file_path, 'a') as file:
+                file.write(separator + new_bib)
+            # 只扫描追加的部分
+            index.refresh()
+
+    return added_entries, skipped_entries
+
+def clean_bib_content(bib_content, jobs=None):
+    from bibtexparser.bibdatabase import BibDatabase
+    from bibtexparser.bwriter import BibTexWriter
+    from entry_store import EntryLibrary
+    from parallel_parser import iter_parsed_chunks, add_chunk_header
+    header = BibDatabase()
+    library = EntryLibrary()
     removed_entries = []
-    for entry in bib_database.entries:
-        lower_id = entry['ID'].lower()
-        if lower_id in entries_dict:
-            removed_entries.append(entry['ID'])
-        else:
-            entries_dict[lower_id] = entry
-    
-    bib_database.entries = list(entries_dict.values())
+    for parsed in iter_parsed_chunks(bib_content, jobs=jobs, ignore_nonstandard_types=True):
+        add_chunk_header(header, parsed)
+        for entry in parsed.entries:
+            if not library.add(entry):
+                removed_entries.append(entry['ID'])
+
     writer = BibTexWriter()
     writer.indent = '    '
     writer.display_order = ('title', 'author', 'year', 'journal', 'volume', 'number', 'pages', 'doi', 'arxiv')
-    return writer.write(bib_database), removed_entries
+    return library.to_bibtex(writer, header), removed_entries
+
+# 清理时每处理多少个条目报告一次进度
+CLEAN_PROGRESS_INTERVAL = 1000
+
+def check_and_clean_bib(bib_file_path, progress_callback=None):
+    """
+    流式删除 .bib 文件中的重复条目（ID 不区分大小写），保留每个 ID 第一次出现的条目。
+
+    逐条复制到同目录下的临时文件，内存中只保留 ID 集合；完成后原子地替换原文件，
+    中途出错时原文件保持不变。保留的条目原样写回，不重新格式化。
+
+    :param bib_file_path: .bib 文件路径
+    :param progress_callback: progress_callback(已处理字节数, 总字节数, 已处理条目数)
+    :return: 被删除的重复条目 ID 列表
+    """
+    seen_ids = set()
+    entry_count = 0
+
+    def keep(record):
+        nonlocal entry_count
+        entry_count += 1
+        lower_id = record.key.lower() if record.key else None
+        if lower_id in seen_ids:
+            return False
+        if lower_id:
+            seen_ids.add(lower_id)
+        return True
+
+    with trace_span('check_and_clean_bib') as span:
+        span['bytes'] = os.path.getsize(bib_file_path)
+        with get_library_lock(bib_file_path):
+            removed = _rewrite_bib_file(bib_file_path, keep, progress_callback)
+        span['entries'] = entry_count
+        span['removed'] = len(removed)
+        return removed
+
+# 合并重复条目的结果：aliases 为 [(删除的键, 保留的键)]，filled 为 {保留的键: 补充的字段名列表}，
+# skipped 为因无法解析而未合并的组 [(保留的键, 原因)]
+MergeResult = namedtuple('MergeResult', ['aliases', 'filled', 'skipped'])
+
+_FIELD_INDENT_PATTERN = re.compile(r'\n([ \t]+)[\w-]+[ \t]*=')
+
+def _add_missing_fields(entry_text, fields):
+    """
+    在条目的结束括号前追加字段，条目原有内容和格式保持不变。
+
+    :param entry_text: 条目原文（可能带有尾随空白）
+    :param fields: [(字段名, 值)]
+    :return: 新的条目文本
+    """
+    opener = entry_text.find('{')
+    paren = entry_text.find('(')
+    if paren != -1 and (opener == -1 or paren < opener):
+        close = entry_text.rfind(')')
+    else:
+        close = -1
+        depth = 0
+        for match in re.finditer(r'[{}]', entry_text):
+            depth += 1 if match.group() == '{' else -1
+            if depth == 0:
+                close = match.start()
+                break
+    if close == -1:
+        return entry_text
+    indent_match = _FIELD_INDENT_PATTERN.search(entry_text, 0, close)
+    indent = indent_match.group(1) if indent_match else '    '
+    body = entry_text[:close].rstrip()
+    if not body.endswith(','):
+        body += ','
+    added = ','.join(f"\n{indent}{name} = {{{value}}}" for name, value in fields)
+    return f"{body}{added}\n{entry_text[close:]}"
+
+def _parse_entry(strings, entry_text):
+    """
+    :param strings: 文件中的 @string 定义，放在条目前一起解析以展开宏
+    :return: 条目字典
+    :raise ValueError: 无法解析时（如使用了未定义的 @string）
+    """
+    try:
+        entries = get_entries_from_content(strings + entry_text, jobs=1)
+    except Exception as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from e
+    if not entries:
+        raise ValueError("not a valid BibTeX entry")
+    return entries[0]
+
+def merge_duplicate_entries(bib_file_path, clusters, progress_callback=None):
+    """
+    合并重复条目：每组保留第一个条目，把其余条目中保留条目缺少的字段补充进去，再删除其余条目。
+    被删除的键不再能被 \\cite 引用，调用方应把返回的别名报告给用户。
+
+    扫描、读取和改写都在持有文件锁时进行；各组条目已不在查找时的位置（文件已被修改）时抛出 IOError。
+    组中有条目无法解析时整组不合并，记录在 skipped 中。
+
+    :param clusters: 要合并的 DuplicateCluster 列表（由调用方逐组确认）
+    :return: MergeResult
+    """
+    if not clusters:
+        return MergeResult([], {}, [])
+    aliases = []
+    filled = {}
+    skipped = []
+    replacements = {}
+    removed_offsets = set()
+    with get_library_lock(bib_file_path):
+        records = {}
+        string_records = []
+        for record in scan_bib_file(bib_file_path):
+            if record.entry_type == 'string':
+                string_records.append(record)
+            elif record.key:
+                records[record.start] = record
+        for cluster in clusters:
+            for record in cluster.records:
+                current = records.get(record.start)
+                if current is None or (current.key, current.end) != (record.key, record.end):
+                    raise IOError(f"{bib_file_path} changed since the duplicates were found; search again")
+
+        with open(bib_file_path, 'rb') as file:
+            def read(record):
+                file.seek(record.start)
+                return file.read(record.end - record.start).decode('utf-8', 'replace')
+
+            strings = ''.join(read(record) for record in string_records)
+            for cluster in clusters:
+                kept, others = cluster.records[0], cluster.records[1:]
+                kept_text = read(kept)
+                missing = []
+                try:
+                    present = set(_parse_entry(strings, kept_text))
+                    for record in others:
+                        for name, value in _parse_entry(strings, read(record)).items():
+                            if name not in present:
+                                present.add(name)
+                                missing.append((name, value))
+                except ValueError as e:
+                    skipped.append((kept.key, str(e)))
+                    continue
+                for record in others:
+                    aliases.append((record.key, kept.key))
+                    removed_offsets.add(record.start)
+                if missing:
+                    replacements[kept.start] = _add_missing_fields(kept_text, missing).encode('utf-8')
+                    filled[kept.key] = [name for name, _ in missing]
+
+        def keep(record):
+            if record.start in removed_offsets:
+                return False
+            return replacements.get(record.start, True)
+
+        if removed_offsets:
+            _rewrite_bib_file(bib_file_path, keep, progress_callback)
+    return MergeResult(aliases, filled, skipped)
+
+def _rewrite_bib_file(bib_file_path, keep, progress_callback=None):
+    """
+    :param keep: keep(record) 返回 False 删除条目，返回 bytes 用其替换条目原文，否则原样保留
+    """
+    removed_entries = []
+    directory = os.path.dirname(os.path.abspath(bib_file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.bib.tmp', dir=directory)
+    try:
+        with open(bib_file_path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+            total = os.fstat(source.fileno()).st_size
+            if total:
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    position = 0
+                    count = 0
+                    for record in scan_bib_content(mm):
+                        # 第一个条目之前的内容
+                        if record.start > position:
+                            target.write(mm[position:record.start])
+                        kept = keep(record)
+                        if isinstance(kept, bytes):
+                            target.write(kept)
+                        elif kept:
+                            target.write(mm[record.start:record.end])
+                        else:
+                            removed_entries.append(record.key)
+                        position = record.end
+                        count += 1
+                        if progress_callback and count % CLEAN_PROGRESS_INTERVAL == 0:
+                            progress_callback(position, total, count)
+                    if position < total:
+                        target.write(mm[position:])
+                    if progress_callback:
+                        progress_callback(total, total, count)
+            target.flush()
+            os.fsync(target.fileno())
+        shutil.copymode(bib_file_path, tmp_path)
+        os.replace(tmp_path, bib_file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
-def check_and_clean_bib(bib_file_path):
-    with open(bib_file_path, 'r') as bibtex_file:
-        bib_content = bibtex_file.read()
-    
-    cleaned_bib, removed_entries = clean_bib_content(bib_content)
-    
-    with open(bib_file_path, 'w') as bibtex_file:
-        bibtex_file.write(cleaned_bib)
-    
     return removed_entries
@@ -1,10 +1,14 @@
-from PyQt6.QtWidgets import QLineEdit, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout
+from functools import partial
+from PyQt6.QtWidgets import QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout
 from PyQt6.QtCore import QThread, pyqtSignal,QTimer 
 import search_module
+from lookup_cache import get_lookup_cache, stats_delta
 from base_tab import BaseTab
+from result_view import ResultView
 
 class SearchThread(QThread):
     result_ready = pyqtSignal(str)
+    cache_stats = pyqtSignal(dict)
 
     def __init__(self, search_function, query, is_title=True):
         super().__init__()
@@ -13,8 +17,10 @@ class SearchThread(QThread):
         self.is_title = is_title
 
     def run(self):
+        before = get_lookup_cache().stats()
         result = self.search_function(self.query, self.is_title)
         self.result_ready.emit(result)
+        self.cache_stats.emit(stats_delta(before, get_lookup_cache().stats()))
 
 class SearchTab(BaseTab):
     def __init__(self, parent):
@@ -31,9 +37,11 @@ class SearchTab(BaseTab):
         search_button.clicked.connect(self.search_title)
         self.layout.addWidget(search_button)
 
-        self.result_text = QTextEdit()
+        self.result_text = ResultView()
         self.layout.addWidget(self.result_text)
 
+        self.layout.addWidget(self.setup_status_label())
+
         button_layout = QHBoxLayout()
         self.copy_button = self.setup_copy_button()
         button_layout.addWidget(self.copy_button)
@@ -51,8 +59,11 @@ class SearchTab(BaseTab):
             return
 
         self.result_text.setPlainText("Searching...")
-        self.search_thread = SearchThread(search_module.get_bibtex, query)
+        # 本地库中已有的条目直接返回，不再联网查询
+        search_function = partial(search_module.get_bibtex, library_path=self.bibtex_file_path or None)
+        self.search_thread = SearchThread(search_function, query)
         self.search_thread.result_ready.connect(self.update_result)
+        self.search_thread.cache_stats.connect(self.show_cache_stats)
         self.search_thread.start()
 
     def update_result(self, result):
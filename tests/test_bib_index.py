@@ -0,0 +1,114 @@
+"""
+BibIndex 的旁路索引校验、增量追加和字段提取。
+"""
+import json
+import os
+
+from bib_index import INDEX_VERSION, BibIndex, extract_fields, index_path_for
+
+LIBRARY = b"""@article{Smith2020,
+    title = {Dark Energy
+             Survey Results},
+    author = {Smith, John},
+    doi = {https://doi.org/10.1000/DES},
+    eprint = {arXiv:2001.00001v2},
+    year = 2020
+}
+"""
+
+APPENDED = b"""
+@article{Jones2021,
+    title = "Inflation",
+    doi = {10.1000/inf}
+}
+"""
+
+
+def write(path, data, mode='wb'):
+    with open(path, mode) as file:
+        file.write(data)
+
+
+def test_extract_fields_reads_multiline_values():
+    fields = extract_fields(LIBRARY)
+    assert fields['title'] == 'Dark Energy Survey Results'
+    assert fields['author'] == 'Smith, John'
+    assert fields['eprint'] == 'arXiv:2001.00001v2'
+    assert fields['year'] == '2020'
+
+
+def test_lookups_are_normalized(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    index = BibIndex.load(path)
+    assert index.contains_key('smith2020')
+    assert index.find_doi('doi:10.1000/des') == 'Smith2020'
+    assert index.find_eprint('2001.00001') == 'Smith2020'
+    assert index.find_title('dark energy survey results') == 'Smith2020'
+    assert os.path.exists(index_path_for(path))
+
+
+def test_append_is_indexed_incrementally(tmp_path, monkeypatch):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    index = BibIndex.load(path)
+    write(path, APPENDED, 'ab')
+
+    scanned = []
+    original = BibIndex._index_range
+
+    def record_range(self, mm, offset):
+        scanned.append(offset)
+        return original(self, mm, offset)
+
+    monkeypatch.setattr(BibIndex, '_index_range', record_range)
+    assert index.refresh()
+    assert scanned == [len(LIBRARY)]
+    assert index.find_doi('10.1000/inf') == 'Jones2021'
+    assert [entry[0] for entry in index.entries] == ['Smith2020', 'Jones2021']
+
+
+def test_sidecar_reused_only_when_file_matches(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    BibIndex.load(path)
+
+    # 内容被改写但大小不变：哈希不匹配，完全重建
+    write(path, LIBRARY.replace(b'Smith2020', b'Smyth2020'))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    index = BibIndex.load(path)
+    assert index.contains_key('Smyth2020')
+    assert not index.contains_key('Smith2020')
+
+
+def test_sidecar_with_other_version_is_ignored(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    index = BibIndex.load(path)
+    with open(index.index_path) as file:
+        data = json.load(file)
+    data['version'] = INDEX_VERSION - 1
+    data['entries'] = [['Stale', 'article', 0, 1, None, None, None]]
+    with open(index.index_path, 'w') as file:
+        json.dump(data, file)
+
+    index = BibIndex.load(path)
+    assert not index.contains_key('Stale')
+    assert index.contains_key('Smith2020')
+
+
+def test_corrupt_sidecar_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    write(index_path_for(path), b'{not json')
+    assert BibIndex.load(path).contains_key('Smith2020')
+
+
+def test_deleted_file_clears_index(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    write(path, LIBRARY)
+    index = BibIndex.load(path)
+    os.remove(path)
+    assert index.refresh()
+    assert len(index) == 0
@@ -0,0 +1,52 @@
+"""
+LaTeX、.aux 和 .bcf 中的引用提取。
+"""
+from citation_extractor import iter_aux_citations, iter_bcf_citations, iter_tex_citations, iter_text_citations
+
+
+def keys(citations):
+    return [citation.key for citation in citations]
+
+
+def test_cite_variants_and_optional_args():
+    text = (r"\cite{a} \citep[see][p.~3]{b, c} \autocite*{d} \Cite{e} \Parencite[p. 2]{f} \Citeauthor{g}"
+            "\n" r"\nocite{*} \nocite{h}")
+    assert keys(iter_text_citations(text)) == ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+
+
+def test_non_cite_commands_and_comments_are_ignored():
+    text = "\\citestyle{authoryear} \\CiteSetup{x}\n% \\cite{commented}\n100\\% \\cite{kept} % \\cite{trailing}"
+    assert keys(iter_text_citations(text)) == ['kept']
+
+
+def test_multicite_arguments():
+    text = r"\cites[see][]{a}[p. 4]{b}{c} \Textcites{d}{e}"
+    assert keys(iter_text_citations(text)) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_arguments_spanning_lines_report_start_position():
+    text = "Intro\nsee \\citep[\n  p. 2]{first,\n  second} and \\cite{third}"
+    citations = list(iter_text_citations(text))
+    assert keys(citations) == ['first', 'second', 'third']
+    assert (citations[0].line, citations[0].column) == (2, 5)
+    assert (citations[2].line, citations[2].command) == (4, 'cite')
+
+
+def test_includes_are_followed_in_document_order(tmp_path):
+    (tmp_path / 'chapters').mkdir()
+    (tmp_path / 'main.tex').write_text("\\cite{a}\n\\input{chapters/one}\n\\include{two}\n\\cite{d}\n")
+    (tmp_path / 'chapters' / 'one.tex').write_text("\\cite{b}\n\\input{main}\n")
+    (tmp_path / 'two.tex').write_text("\\cite{c}\n")
+    citations = list(iter_tex_citations(str(tmp_path / 'main.tex')))
+    assert keys(citations) == ['a', 'b', 'c', 'd']
+    assert citations[1].path.endswith('one.tex')
+    assert keys(iter_tex_citations(str(tmp_path / 'main.tex'), follow_includes=False)) == ['a', 'd']
+
+
+def test_aux_and_bcf(tmp_path):
+    (tmp_path / 'main.aux').write_text("\\citation{a,b}\n\\abx@aux@cite{0}{c}\n\\@input{chap.aux}\n\\citation{*}\n")
+    (tmp_path / 'chap.aux').write_text("\\citation{d}\n")
+    assert keys(iter_aux_citations(str(tmp_path / 'main.aux'))) == ['a', 'b', 'c', 'd']
+    (tmp_path / 'main.bcf').write_text('<bcf:citekey order="1">x</bcf:citekey>\n'
+                                       '<bcf:citekey order="2">y</bcf:citekey>\n')
+    assert keys(iter_bcf_citations(str(tmp_path / 'main.bcf'))) == ['x', 'y']
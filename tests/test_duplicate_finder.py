@@ -0,0 +1,76 @@
+"""
+按 ID、DOI、arXiv ID、标题 + 作者 + 年份和近似标题查找重复条目。
+"""
+from duplicate_finder import DuplicateRecord, find_duplicate_clusters, find_duplicates_in_file, first_author_surname
+
+
+def record(key, start, doi=None, eprint=None, title=None, author=None, year=None):
+    return DuplicateRecord(key, start, start + 1, doi, eprint, title, author, year)
+
+
+def cluster_keys(clusters):
+    return [[item.key for item in cluster.records] for cluster in clusters]
+
+
+def test_first_author_surname():
+    assert first_author_surname('Smith, John and Doe, Jane') == 'smith'
+    assert first_author_surname('John {O\'Neil} and Jane Doe') == 'oneil'
+    assert first_author_surname('') == ''
+
+
+def test_exact_blocks_are_merged_transitively():
+    records = [
+        record('a', 0, doi='10.1/x'),
+        record('b', 10, doi='10.1/x', eprint='2001.00001'),
+        record('c', 20, eprint='2001.00001'),
+        record('A', 30),
+        record('d', 40, title='dark energy', author='smith', year='2020'),
+        record('e', 50, title='dark energy', author='smith', year='2020'),
+        record('f', 60, title='dark energy', author='jones', year='2020'),
+    ]
+    clusters = find_duplicate_clusters(records)
+    assert cluster_keys(clusters) == [['a', 'b', 'c', 'A'], ['d', 'e']]
+    assert clusters[0].reasons == ['doi', 'eprint', 'id']
+    assert clusters[1].reasons == ['title+author+year']
+
+
+def test_minhash_requires_author_and_ignores_sequence_numbers():
+    title = 'constraints on dark energy from the survey of galaxy clusters'
+    records = [
+        record('a', 0, title=title, author='smith', year='2020'),
+        record('b', 10, title=title + ' revisited', author='smith', year='2020'),
+        record('c', 20, title=title + ' revisited', author='jones', year='2020'),
+        record('d', 30, title=title + ' revisited', year='2020'),
+        record('p1', 40, title='cosmic shear measurements from the deep survey paper i', author='lee', year='2021'),
+        record('p2', 50, title='cosmic shear measurements from the deep survey paper ii', author='lee', year='2021'),
+    ]
+    assert find_duplicate_clusters(records) == []
+    clusters = find_duplicate_clusters(records, use_minhash=True)
+    assert cluster_keys(clusters) == [['a', 'b']]
+    assert clusters[0].reasons == ['similar title']
+
+
+def test_find_duplicates_in_file(tmp_path):
+    path = tmp_path / 'refs.bib'
+    path.write_text("""@article{one,
+    title = {Dark
+             Energy},
+    author = {Smith, J.},
+    year = {2020}
+}
+
+@article{two,
+    title = "Dark energy",
+    author = {John Smith},
+    year = 2020
+}
+
+@article{three,
+    doi = {10.1/y}
+}
+""")
+    clusters = find_duplicates_in_file(str(path))
+    assert cluster_keys(clusters) == [['one', 'two']]
+    data = path.read_bytes()
+    assert [data[item.start:item.end].split(b',')[0] for item in clusters[0].records] == \
+        [b'@article{one', b'@article{two']
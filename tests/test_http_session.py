@@ -0,0 +1,66 @@
+"""
+429 响应不能被 urllib3 自动重试，必须交给 INSPIRE 的限速器和断路器处理。
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import search_module
+from http_session import HttpSession
+from rate_limit import OPEN, configure_limiter, get_limiter
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests += 1
+        body = b'Too Many Requests'
+        self.send_response(429)
+        self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def throttling_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    server.requests = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api/literature"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_does_not_retry_429(throttling_server):
+    session = HttpSession(retries=2, backoff=0.5)
+    start = time.monotonic()
+    response = session.get(throttling_server.url, params={'q': 'a'})
+    elapsed = time.monotonic() - start
+    session.close()
+
+    assert response.status_code == 429
+    assert throttling_server.requests == 1
+    assert elapsed < 1
+
+
+def test_429_reaches_inspire_limiter(throttling_server, monkeypatch):
+    monkeypatch.setattr(search_module, 'INSPIRE_API_URL', throttling_server.url)
+    limiter = configure_limiter('inspire', rate=100.0, burst=100)
+    try:
+        assert search_module.search_inspire('find t dark energy') is None
+        stats = get_limiter('inspire').stats()
+        assert stats['throttled'] == 1
+        assert stats['state'] == OPEN
+        # 断路器已断开，不再发出请求
+        assert search_module.search_inspire('find t dark energy') is None
+        assert throttling_server.requests == 1
+        assert limiter.stats()['rejected'] == 1
+    finally:
+        configure_limiter('inspire')
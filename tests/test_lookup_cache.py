@@ -0,0 +1,78 @@
+"""
+查询缓存的规范化、TTL、负缓存和 LRU 淘汰。
+"""
+import pytest
+
+import lookup_cache
+from lookup_cache import KIND_ARXIV, KIND_TEXKEY, KIND_TITLE, LookupCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(lookup_cache.time, 'time', clock)
+    return clock
+
+
+def test_normalize_query():
+    assert normalize_query(KIND_ARXIV, 'arXiv:2101.00001v3') == '2101.00001'
+    assert normalize_query(KIND_TITLE, ' {Dark}  Energy. ') == 'dark energy'
+    assert normalize_query(KIND_TEXKEY, 'Smith:2020ab') == 'smith:2020ab'
+
+
+def test_hit_after_normalization(clock):
+    cache = LookupCache(':memory:')
+    cache.set(KIND_TITLE, 'Dark Energy', '@article{a,}')
+    assert cache.get(KIND_TITLE, '{Dark} energy.') == (True, '@article{a,}')
+    assert cache.get(KIND_TEXKEY, 'Dark Energy') == (False, None)
+    assert cache.stats() == {'hits': 1, 'negative_hits': 0, 'misses': 1}
+
+
+def test_ttl_and_negative_ttl(clock):
+    cache = LookupCache(':memory:', ttl=100, negative_ttl=10)
+    cache.set(KIND_TEXKEY, 'found', '@article{found,}')
+    cache.set(KIND_TEXKEY, 'missing', None)
+    assert cache.get(KIND_TEXKEY, 'missing') == (True, None)
+
+    clock.now += 11
+    assert cache.get(KIND_TEXKEY, 'missing') == (False, None)
+    assert cache.get(KIND_TEXKEY, 'found') == (True, '@article{found,}')
+
+    clock.now += 100
+    assert cache.get(KIND_TEXKEY, 'found') == (False, None)
+
+
+def test_lru_eviction(clock):
+    cache = LookupCache(':memory:', max_entries=2)
+    cache.set(KIND_TEXKEY, 'a', 'A')
+    clock.now += 1
+    cache.set(KIND_TEXKEY, 'b', 'B')
+    clock.now += 1
+    # 访问 a 后 b 成为最久未使用的条目
+    assert cache.get(KIND_TEXKEY, 'a') == (True, 'A')
+    clock.now += 1
+    cache.set(KIND_TEXKEY, 'c', 'C')
+
+    assert cache.get(KIND_TEXKEY, 'b') == (False, None)
+    assert cache.get(KIND_TEXKEY, 'a') == (True, 'A')
+    assert cache.get(KIND_TEXKEY, 'c') == (True, 'C')
+
+
+def test_disabled_and_invalidate(clock):
+    cache = LookupCache(':memory:')
+    cache.set(KIND_TEXKEY, 'a', 'A')
+    cache.set(KIND_TITLE, 'b', 'B')
+    cache.invalidate(KIND_TEXKEY)
+    assert cache.get(KIND_TEXKEY, 'a') == (False, None)
+    assert cache.get(KIND_TITLE, 'b') == (True, 'B')
+
+    cache.enabled = False
+    assert cache.get(KIND_TITLE, 'b') == (False, None)
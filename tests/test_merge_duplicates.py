@@ -0,0 +1,74 @@
+"""
+merge_duplicate_entries：@string 宏、无法解析的条目和文件在查找后被修改的情况。
+"""
+import pytest
+
+import duplicate_finder
+import search_module
+
+LIBRARY = """@string{jn = "Journal of Tests"}
+
+@article{Smith2020,
+    title = {Dark Energy Survey Results},
+    author = {Smith, John},
+    year = {2020},
+    journal = jn
+}
+
+@article{Smith2020b,
+    title = {Dark Energy Survey Results},
+    author = {Smith, John},
+    year = {2020},
+    journal = jn,
+    doi = {10.1000/des}
+}
+"""
+
+
+def write_library(tmp_path, content=LIBRARY):
+    path = tmp_path / 'refs.bib'
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_merge_expands_string_macros(tmp_path):
+    path = write_library(tmp_path)
+    clusters = duplicate_finder.find_duplicates_in_file(path)
+    assert len(clusters) == 1
+
+    result = search_module.merge_duplicate_entries(path, clusters)
+
+    assert result.aliases == [('Smith2020b', 'Smith2020')]
+    assert result.filled == {'Smith2020': ['doi']}
+    assert result.skipped == []
+    content = open(path, encoding='utf-8').read()
+    assert 'Smith2020b' not in content
+    assert '@string{jn = "Journal of Tests"}' in content
+    entries = search_module.get_entries_from_content(content, jobs=1)
+    assert [entry['ID'] for entry in entries] == ['Smith2020']
+    assert entries[0]['doi'] == '10.1000/des'
+    assert entries[0]['journal'] == 'Journal of Tests'
+
+
+def test_unparsable_group_is_skipped(tmp_path):
+    path = write_library(tmp_path, LIBRARY.replace('@string{jn = "Journal of Tests"}\n', ''))
+    clusters = duplicate_finder.find_duplicates_in_file(path)
+    before = open(path, encoding='utf-8').read()
+
+    result = search_module.merge_duplicate_entries(path, clusters)
+
+    assert result.aliases == []
+    assert [key for key, _ in result.skipped] == ['Smith2020']
+    assert open(path, encoding='utf-8').read() == before
+
+
+def test_changed_file_is_rejected(tmp_path):
+    path = write_library(tmp_path)
+    clusters = duplicate_finder.find_duplicates_in_file(path)
+    with open(path, 'r+', encoding='utf-8') as file:
+        content = file.read()
+        file.seek(0)
+        file.write('% edited\n' + content)
+
+    with pytest.raises(IOError):
+        search_module.merge_duplicate_entries(path, clusters)
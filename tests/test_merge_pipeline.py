@@ -0,0 +1,104 @@
+"""
+merge_bib_files 的去重、冲突报告和规范化。
+"""
+import json
+
+import pytest
+
+from merge_pipeline import merge_bib_files, normalize_entry
+from search_module import get_entries_from_content
+
+FIRST = """@string{jn = "Journal of Tests"}
+
+@article{Smith2020,
+    title = {{Dark Energy}},
+    journal = jn,
+    doi = {https://doi.org/10.1000/DES},
+    eprint = {arXiv:2001.00001v2}
+}
+
+@article{Conflict,
+    title = {Original}
+}
+"""
+
+SECOND = """@article{smith2020,
+    title = {{Dark Energy}},
+    journal = {Journal of Tests},
+    doi = {10.1000/des},
+    eprint = {2001.00001}
+}
+
+@article{Conflict,
+    title = {Changed}
+}
+
+@article{SameDoi,
+    title = {Other Key},
+    doi = {doi:10.1000/DES}
+}
+
+@article{SameEprint,
+    title = {Preprint},
+    eprint = {2001.00001v1}
+}
+
+@article{Jones2021,
+    title = {Inflation}
+}
+"""
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    first = tmp_path / 'first.bib'
+    second = tmp_path / 'second.bib'
+    first.write_text(FIRST, encoding='utf-8')
+    second.write_text(SECOND, encoding='utf-8')
+    return str(first), str(second)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_merge_reports_conflicts(inputs, tmp_path, jobs):
+    output = str(tmp_path / 'merged.bib')
+    report = str(tmp_path / 'report.jsonl')
+    stats = merge_bib_files(list(inputs), output, report_path=report, jobs=jobs, chunk_size=2)
+
+    assert stats.entries_read == 7
+    assert stats.entries_written == 3
+    assert stats.duplicates == 3
+    assert stats.conflicts == 1
+    with open(report, encoding='utf-8') as file:
+        rows = [json.loads(line) for line in file]
+    assert [(row['type'], row['key'], row['kept_key']) for row in rows] == [
+        ('key-conflict', 'Conflict', 'Conflict'),
+        ('same-doi', 'SameDoi', 'Smith2020'),
+        ('same-eprint', 'SameEprint', 'Smith2020'),
+    ]
+    assert rows[0]['file'] == inputs[1] and rows[0]['kept_file'] == inputs[0]
+
+    with open(output, encoding='utf-8') as file:
+        merged = get_entries_from_content(file.read(), jobs=1)
+    assert [entry['ID'] for entry in merged] == ['Smith2020', 'Conflict', 'Jones2021']
+    # DOI 和 arXiv ID 原样写出，只在去重时规范化
+    assert merged[0]['doi'] == 'https://doi.org/10.1000/DES'
+    assert merged[0]['eprint'] == 'arXiv:2001.00001v2'
+    assert merged[0]['journal'] == 'Journal of Tests'
+    assert merged[1]['title'] == 'Original'
+
+
+def test_merge_into_one_of_the_inputs(inputs):
+    stats = merge_bib_files(list(inputs), inputs[0], jobs=1)
+    assert stats.entries_written == 3
+    with open(inputs[0], encoding='utf-8') as file:
+        assert len(get_entries_from_content(file.read(), jobs=1)) == 3
+
+
+def test_normalize_entry_strips_only_balanced_title_braces():
+    entry = {'ENTRYTYPE': 'ARTICLE', 'ID': ' key ', 'title': '{A} and {B}', 'note': '  ', 'journal': 'J\n  Tests'}
+    assert normalize_entry(entry) == {'ENTRYTYPE': 'article', 'ID': 'key', 'title': '{A} and {B}',
+                                      'journal': 'J Tests'}
+    assert normalize_entry({'ENTRYTYPE': 'article', 'ID': 'k', 'title': '{Dark} Energy}'})['title'] == \
+        '{Dark} Energy}'
+    assert normalize_entry({'ENTRYTYPE': 'article', 'ID': 'k', 'title': '{{Dark} Energy}'})['title'] == \
+        '{Dark} Energy'
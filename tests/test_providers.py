@@ -0,0 +1,114 @@
+"""
+race_providers 的超时与分级启动。
+"""
+import threading
+import time
+
+import providers
+import search_module
+from providers import MetadataProvider, race_providers
+
+
+class StaticProvider(MetadataProvider):
+    """
+    等待 latency 秒后返回 result；latency 为 None 时一直等到被取消。
+    """
+
+    def __init__(self, name, result=None, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.result = result
+        self.latency = latency
+        self.calls = 0
+        self.cancelled = 0
+
+    def search(self, query, is_title, cancel_event):
+        self.calls += 1
+        if cancel_event.wait(self.latency):
+            self.cancelled += 1
+            return None
+        return self.result
+
+
+def run_race(providers, limit=10, **kwargs):
+    """
+    在后台线程中竞速，超过 limit 秒仍未返回视为卡死。
+    """
+    outcome = {}
+
+    def target():
+        start = time.monotonic()
+        outcome['result'] = race_providers(providers, 'query', **kwargs)
+        outcome['elapsed'] = time.monotonic() - start
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(limit)
+    assert not thread.is_alive(), "race_providers did not return"
+    return outcome['result'], outcome['elapsed']
+
+
+def test_first_result_wins():
+    fast = StaticProvider('fast', '@article{a,}', priority=1)
+    slow = StaticProvider('slow', '@article{b,}', latency=2, priority=0, timeout=5)
+    result, elapsed = run_race([slow, fast])
+    assert result.provider is fast
+    assert elapsed < 1
+
+
+def test_fallback_starts_after_higher_priority_times_out():
+    stuck = StaticProvider('stuck', latency=None, priority=0, timeout=1)
+    fallback = StaticProvider('fallback', '@article{a,}', priority=1, timeout=5, start_delay=None)
+    result, elapsed = run_race([stuck, fallback])
+    assert result.bibtex == '@article{a,}'
+    assert result.provider is fallback
+    assert result.errors
+    assert 1 <= elapsed < 3
+
+
+def test_fallback_gets_its_own_deadline():
+    stuck = StaticProvider('stuck', latency=None, priority=0, timeout=0.5)
+    fallback = StaticProvider('fallback', latency=None, priority=1, timeout=0.5, start_delay=None)
+    result, elapsed = run_race([stuck, fallback])
+    assert result.bibtex is None
+    assert result.errors
+    assert elapsed < 3
+
+
+def test_fallback_not_started_when_higher_priority_succeeds():
+    first = StaticProvider('first', '@article{a,}', priority=0, timeout=5)
+    fallback = StaticProvider('fallback', '@article{b,}', priority=1, timeout=5, start_delay=None)
+    result, _ = run_race([first, fallback])
+    assert result.provider is first
+    time.sleep(0.1)
+    assert fallback.calls == 0
+
+
+def test_external_cancel_stops_race():
+    stuck = StaticProvider('stuck', latency=None, priority=0, timeout=30)
+    cancel_event = threading.Event()
+    threading.Timer(0.3, cancel_event.set).start()
+    result, elapsed = run_race([stuck], cancel_event=cancel_event)
+    assert result.bibtex is None
+    assert elapsed < 2
+
+
+def test_cancel_reaches_running_lookups():
+    stuck = StaticProvider('stuck', latency=None, priority=0, timeout=30)
+    cancel_event = threading.Event()
+    providers.set_providers([stuck])
+    try:
+        threading.Timer(0.3, cancel_event.set).start()
+        start = time.monotonic()
+        results = search_module.resolve_citation_keys(['a', 'b'], max_workers=2, use_batch=False, use_cache=False,
+                                                      cancel_event=cancel_event)
+        assert time.monotonic() - start < 2
+        assert not any(results.values())
+        # 正在进行的查询也收到了取消，而不是等到 30 秒超时
+        deadline = time.monotonic() + 2
+        while stuck.cancelled < stuck.calls and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stuck.calls == 2
+        assert stuck.cancelled == 2
+    finally:
+        providers.set_providers(None)
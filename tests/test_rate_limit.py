@@ -0,0 +1,93 @@
+"""
+令牌桶、断路器和 Retry-After 解析。
+"""
+import threading
+import time
+
+from rate_limit import CLOSED, HALF_OPEN, OPEN, BackendLimiter, CircuitBreaker, TokenBucket, parse_retry_after
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=20.0, burst=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+    start = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert 0.02 < time.monotonic() - start < 0.5
+
+
+def test_bucket_acquire_cancelled():
+    bucket = TokenBucket(rate=0.1, burst=1)
+    assert bucket.acquire(timeout=0)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert not bucket.acquire(cancel_event=cancel_event)
+
+
+def test_bucket_rate_aimd():
+    bucket = TokenBucket(rate=4.0, burst=4, min_rate=1.0)
+    bucket.decrease()
+    assert bucket.rate == 2.0
+    bucket.decrease()
+    bucket.decrease()
+    assert bucket.rate == 1.0
+    for _ in range(20):
+        bucket.increase()
+    assert bucket.rate == 4.0
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # 试探请求结束前不放行其他请求
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, cooldown=0.05)
+    breaker.trip()
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.remaining() > 0
+
+
+def test_limiter_releases_probe_when_no_token():
+    limiter = BackendLimiter('test', rate=0.1, burst=1, failure_threshold=1, cooldown=0.05)
+    assert limiter.acquire(timeout=0)
+    limiter.record_failure()
+    time.sleep(0.1)
+    # 断路器放行试探请求，但没有令牌；试探机会必须交还
+    assert not limiter.acquire(timeout=0)
+    assert limiter.breaker.allow()
+
+
+def test_limiter_throttled_trips_for_retry_after():
+    limiter = BackendLimiter('test', rate=10.0, burst=10, min_rate=1.0)
+    limiter.record_throttled(retry_after=5)
+    stats = limiter.stats()
+    assert stats['state'] == OPEN
+    assert stats['throttled'] == 1
+    assert stats['rate'] == 5.0
+    assert 4 < stats['cooldown_remaining'] <= 5
+    assert not limiter.acquire(timeout=0)
+    assert limiter.stats()['rejected'] == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,67 @@
+"""
+ResultModel 的过滤与勾选：复制和添加的内容与过滤条件无关。
+"""
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from result_view import ResultModel
+
+RESULTS = """Not found: missing2020
+
+@article{dark,
+    title = {Dark Energy}
+}
+
+@article{matter,
+    title = {Dark Matter}
+}
+
+@article{inflation,
+    title = {Inflation}
+}
+"""
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def uncheck(model, key):
+    for row in range(model.rowCount()):
+        index = model.index(row)
+        if model.data(index, Qt.ItemDataRole.ToolTipRole) == key:
+            model.setData(index, Qt.CheckState.Unchecked.value, Qt.ItemDataRole.CheckStateRole)
+            return
+    raise AssertionError(f"{key} not shown")
+
+
+def keys(text):
+    return [line.split('{', 1)[1].rstrip(',') for line in text.splitlines() if line.startswith('@')]
+
+
+def test_checked_text_ignores_filter(app):
+    model = ResultModel()
+    model.set_text(RESULTS)
+    model.set_filter('dark')
+    assert model.rowCount() == 2
+    uncheck(model, 'matter')
+
+    assert keys(model.to_text(checked_only=True)) == ['dark', 'inflation']
+    assert model.checked_count() == 2
+
+
+def test_check_all_only_affects_visible_rows(app):
+    model = ResultModel()
+    model.set_text(RESULTS)
+    model.set_filter('inflation')
+    model.set_all_checked(False)
+    model.set_filter('')
+
+    assert keys(model.to_text(checked_only=True)) == ['dark', 'matter']
+    assert 'Not found' not in model.to_text(checked_only=True)
@@ -1,8 +1,18 @@
-from PyQt6.QtGui import QAction, QActionGroup
-from PyQt6.QtWidgets import QMenu, QApplication,QTextEdit
-from PyQt6.QtCore import QTranslator, QLocale, QSettings
+from functools import lru_cache
+from PyQt6.QtGui import QAction, QActionGroup, QGuiApplication
+from PyQt6.QtWidgets import QMenu, QApplication,QTextEdit, QPlainTextEdit
+from PyQt6.QtCore import QTranslator, QLocale, QSettings, QObject, QTimer, Qt, pyqtSignal
 
+# 系统不提供主题变化通知时的轮询间隔（毫秒）：无变化时从最小值逐步加倍到最大值
+THEME_POLL_MIN_INTERVAL = 5000
+THEME_POLL_MAX_INTERVAL = 60000
+
+
+@lru_cache(maxsize=None)
 def load_stylesheet(dark_mode):
+    """
+    生成样式表，每种模式只生成一次。
+    """
     scrollbar_style = """
         QScrollBar:vertical {
             border: none;
@@ -178,18 +188,87 @@ def load_stylesheet(dark_mode):
         """
 
 def apply_stylesheet(window, dark_mode):
+    """
+    给一个顶层窗口设置样式表，子控件由 Qt 自动继承并只重新计算一次样式；
+    样式表没有变化时不做任何事。
+    """
     stylesheet = load_stylesheet(dark_mode)
-    window.setStyleSheet(stylesheet)
-    
-    # Force update of all widgets
-    app = QApplication.instance()
-    if app:
-        for widget in app.allWidgets():
-            widget.style().unpolish(widget)
-            widget.style().polish(widget)
-            widget.update()
+    if window.styleSheet() != stylesheet:
+        window.setStyleSheet(stylesheet)
 
     # 更新 CustomTextEdit 的暗色模式
-    for widget in window.findChildren(QTextEdit):
+    for widget in window.findChildren(QTextEdit) + window.findChildren(QPlainTextEdit):
         if hasattr(widget, 'set_dark_mode'):
-            widget.set_dark_mode(dark_mode)
\ No newline at end of file
+            widget.set_dark_mode(dark_mode)
+
+
+def apply_theme(dark_mode):
+    """
+    把样式表应用到所有没有父控件的顶层窗口（对话框、菜单等子窗口会继承）。
+    """
+    app = QApplication.instance()
+    if app:
+        for widget in app.topLevelWidgets():
+            if widget.parentWidget() is None:
+                apply_stylesheet(widget, dark_mode)
+
+
+def system_is_dark():
+    """
+    :return: 系统是否使用暗色主题；Qt 无法判断时使用 darkdetect
+    """
+    scheme = QGuiApplication.styleHints().colorScheme()
+    if scheme != Qt.ColorScheme.Unknown:
+        return scheme == Qt.ColorScheme.Dark
+    from darkdetect import isDark
+    return bool(isDark())
+
+
+class SystemThemeWatcher(QObject):
+    """
+    监视系统主题变化。优先使用 Qt 的 colorSchemeChanged 通知；
+    平台无法报告主题（colorScheme 为 Unknown）时才退回轮询，且无变化时逐步延长轮询间隔。
+    """
+
+    changed = pyqtSignal(bool)  # 新主题是否为暗色
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.is_dark = system_is_dark()
+        hints = QGuiApplication.styleHints()
+        hints.colorSchemeChanged.connect(self.on_color_scheme_changed)
+
+        self.poll_interval = THEME_POLL_MIN_INTERVAL
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self.poll)
+        if hints.colorScheme() == Qt.ColorScheme.Unknown:
+            self.poll_timer.start(self.poll_interval)
+
+    @property
+    def polling(self):
+        return self.poll_timer.isActive()
+
+    def on_color_scheme_changed(self, scheme):
+        if scheme == Qt.ColorScheme.Unknown:
+            return
+        # 平台能报告主题后不再需要轮询
+        self.poll_timer.stop()
+        self.set_dark(scheme == Qt.ColorScheme.Dark)
+
+    def poll(self):
+        if self.set_dark(system_is_dark()):
+            self.poll_interval = THEME_POLL_MIN_INTERVAL
+        else:
+            self.poll_interval = min(self.poll_interval * 2, THEME_POLL_MAX_INTERVAL)
+        self.poll_timer.start(self.poll_interval)
+
+    def set_dark(self, is_dark):
+        """
+        :return: 主题是否发生变化
+        """
+        if is_dark == self.is_dark:
+            return False
+        self.is_dark = is_dark
+        self.changed.emit(is_dark)
+        return True
@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import citation_extractor
+import search_module
+from bib_index import get_library_index, get_library_lock
+
+# 轮询间隔：无变化时从 POLL_MIN_INTERVAL 逐步加倍到 POLL_MAX_INTERVAL，有变化后恢复
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 5.0
+# inotify 收到事件后再等待的毫秒数，合并编辑器保存时的一连串事件
+INOTIFY_READ_DELAY = 200
+# 未找到的键在此秒数后才重新查询
+NOT_FOUND_RETRY_INTERVAL = 300
+
+# 一次同步的结果：new_keys 为本次新出现的键，added / skipped 为写入 .bib 时添加和跳过的条目 ID
+SyncResult = namedtuple('SyncResult', ['new_keys', 'added', 'skipped', 'not_found', 'changed_files', 'elapsed'])
+
+
+class PollingBackend:
+    """
+    通过比较文件修改时间检测变化，无变化时逐步延长轮询间隔。
+    """
+
+    name = 'polling'
+
+    def __init__(self, snapshot, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL):
+        self.snapshot = snapshot
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._last = snapshot()
+
+    def wait(self, stop_event, wake_event=None):
+        """
+        阻塞直到项目文件发生变化或 wake_event 被设置。
+
+        :return: 有变化时返回 True，stop_event 被设置时返回 False
+        """
+        while not stop_event.wait(self.interval):
+            if wake_event is not None and wake_event.is_set():
+                return True
+            current = self.snapshot()
+            if current != self._last:
+                self._last = current
+                self.interval = self.min_interval
+                return True
+            self.interval = min(self.interval * 2, self.max_interval)
+        return False
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """
+    使用 inotify（需要可选依赖 inotify_simple，仅 Linux）监视项目目录，无需轮询。
+    """
+
+    name = 'inotify'
+
+    def __init__(self, root):
+        from inotify_simple import INotify, flags
+        self.flags = flags
+        self.inotify = INotify()
+        self.mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.CREATE | flags.DELETE
+        self.directories = {}
+        for directory, dirnames, _ in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            self._add_watch(directory)
+
+    def _add_watch(self, directory):
+        try:
+            self.directories[self.inotify.add_watch(directory, self.mask)] = directory
+        except OSError as e:
+            print(f"Error watching {directory}: {e}")
+
+    def wait(self, stop_event, wake_event=None):
+        while not stop_event.is_set():
+            if wake_event is not None and wake_event.is_set():
+                return True
+            changed = False
+            # 使用超时以便定期检查 stop_event
+            for event in self.inotify.read(timeout=500, read_delay=INOTIFY_READ_DELAY):
+                if event.mask & self.flags.ISDIR:
+                    if event.mask & (self.flags.CREATE | self.flags.MOVED_TO) and not event.name.startswith('.'):
+                        self._add_watch(os.path.join(self.directories.get(event.wd, ''), event.name))
+                    changed = True
+                elif event.name.endswith('.tex'):
+                    changed = True
+            if changed:
+                return True
+        return False
+
+    def close(self):
+        self.inotify.close()
+
+
+def create_backend(root, snapshot, use_inotify=True):
+    """
+    优先使用 inotify，不可用时（未安装 inotify_simple 或非 Linux）退回轮询。
+    """
+    if use_inotify:
+        try:
+            return InotifyBackend(root)
+        except (ImportError, OSError, AttributeError):
+            # macOS / Windows 上 inotify_simple 可以导入但没有 inotify 系统调用
+            pass
+    return PollingBackend(snapshot)
+
+
+class ProjectWatcher:
+    """
+    监视 LaTeX 项目，只把新出现的引用键查询并追加到 .bib 文件。
+    每次同步只重新扫描发生变化的 .tex 文件，工作量与改动量成正比。
+
+    :param project_path: 项目目录或主 .tex 文件（监视其所在目录）
+    :param bib_path: 要保持同步的 .bib 文件
+    """
+
+    def __init__(self, project_path, bib_path, max_workers=search_module.DEFAULT_MAX_WORKERS, use_cache=True):
+        if os.path.isdir(project_path):
+            self.root = project_path
+        else:
+            self.root = os.path.dirname(project_path) or '.'
+        self.bib_path = bib_path
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        # 每个文件的状态 (mtime_ns, size) 和其中的引用键
+        self.file_state = {}
+        self.file_keys = {}
+        # 已在 .bib 中或已处理过的键
+        self.known_keys = set()
+        # 未找到的键 -> 上次查询时间
+        self.not_found = {}
+        # set_bib_path 设置的新 .bib 文件，在下一次同步开始时生效
+        self._next_bib_path = None
+        self.bib_changed = threading.Event()
+
+    def set_bib_path(self, bib_path):
+        """
+        切换要同步的 .bib 文件（可从其他线程调用）。下一次同步会对新文件重新检查所有引用键。
+        """
+        self._next_bib_path = bib_path
+        self.bib_changed.set()
+
+    def project_files(self):
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.endswith('.tex'):
+                    yield os.path.join(directory, filename)
+
+    def snapshot(self):
+        """
+        :return: {path: (mtime_ns, size)}
+        """
+        state = {}
+        for path in self.project_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def scan(self):
+        """
+        重新扫描发生变化的文件。
+
+        :return: 变化（新增、修改或删除）的文件列表
+        """
+        state = self.snapshot()
+        changed = [path for path, file_state in state.items() if self.file_state.get(path) != file_state]
+        removed = [path for path in self.file_keys if path not in state]
+        for path in removed:
+            del self.file_keys[path]
+        for path in changed:
+            try:
+                citations = citation_extractor.iter_tex_citations(path, follow_includes=False)
+                self.file_keys[path] = list(dict.fromkeys(citation.key for citation in citations))
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                state.pop(path)
+        self.file_state = state
+        return changed + removed
+
+    def citation_keys(self):
+        keys = {}
+        for path in sorted(self.file_keys):
+            keys.update(dict.fromkeys(self.file_keys[path]))
+        return list(keys)
+
+    def sync(self, cancel_event=None):
+        """
+        扫描变化的文件，查询新出现的引用键并追加到 .bib 文件。
+
+        :return: SyncResult
+        """
+        start = time.monotonic()
+        if self.bib_changed.is_set():
+            self.bib_changed.clear()
+            self.bib_path = self._next_bib_path
+            self.known_keys.clear()
+            self.not_found.clear()
+        changed = self.scan()
+        now = time.time()
+        new_keys = [key for key in self.citation_keys() if key not in self.known_keys
+                    and now - self.not_found.get(key, 0) >= NOT_FOUND_RETRY_INTERVAL]
+        if not new_keys:
+            return SyncResult([], [], [], [], changed, time.monotonic() - start)
+
+        pending = new_keys
+        bib_path = self.bib_path
+        # 与 append_bibtex_entries 使用同一把锁，不会读到其他线程写了一半的文件
+        with get_library_lock(bib_path):
+            if os.path.exists(bib_path):
+                index = get_library_index(bib_path)
+                self.known_keys.update(key for key in new_keys if index.contains_key(key))
+                pending = [key for key in new_keys if key not in self.known_keys]
+
+        results = search_module.resolve_citation_keys(pending, max_workers=self.max_workers,
+                                                      use_cache=self.use_cache, cancel_event=cancel_event)
+        found = [key for key in pending if results.get(key)]
+        not_found = [key for key in pending if key in results and not results[key]]
+
+        added, skipped = [], []
+        if found:
+            # 新条目很少，不值得启动进程池（GUI 的监视线程也会调用）
+            added, skipped = search_module.append_bibtex_entries(
+                bib_path, "\n\n".join(results[key] for key in found), jobs=1)
+        self.known_keys.update(found)
+        for key in found:
+            self.not_found.pop(key, None)
+        for key in not_found:
+            self.not_found[key] = now
+        return SyncResult(new_keys, added, skipped, not_found, changed, time.monotonic() - start)
+
+    def run(self, stop_event, on_sync=None, use_inotify=True):
+        """
+        先同步一次，然后每当项目文件变化时同步，直到 stop_event 被设置。
+
+        :param on_sync: 每次同步后调用 on_sync(SyncResult)
+        """
+        backend = create_backend(self.root, self.snapshot, use_inotify)
+        try:
+            while not stop_event.is_set():
+                try:
+                    result = self.sync(cancel_event=stop_event)
+                    if on_sync:
+                        on_sync(result)
+                except (IOError, OSError) as e:
+                    print(f"Error syncing {self.bib_path}: {e}")
+                if not backend.wait(stop_event, self.bib_changed):
+                    break
+        finally:
+            backend.close()
+        return backend.name
+